@@ -0,0 +1,229 @@
+from app.models import Order, OrderArchivePart, ArchivedOrder, utc_now
+from app.schemas.order import OrderResponse
+from app.database import SessionLocal
+from app.core.cache import response_cache
+from app.core.stats import adjust_summary
+from app.core.changes import log_changes
+from app.core.events import event_broker, order_event, event_driver_ids
+from app.core.pagination import decode_cursor, encode_cursor
+from sqlalchemy import select, insert, delete, tuple_
+from sqlalchemy.orm import Session
+from collections import namedtuple
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from functools import lru_cache
+from itertools import groupby
+from pathlib import Path
+import asyncio
+import bisect
+import gzip
+import logging
+import orjson
+import os
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+ORDER_ARCHIVE_DIR = Path(os.getenv('ORDER_ARCHIVE_DIR', 'archive/orders'))
+ORDER_ARCHIVE_AGE = timedelta(days=float(os.getenv('ORDER_ARCHIVE_AGE_DAYS', 90)))
+ORDER_ARCHIVE_SECONDS = float(os.getenv('ORDER_ARCHIVE_SECONDS', 24 * 3600))
+ARCHIVE_BATCH_SIZE = 10_000
+TERMINAL_STATUSES = ('completed', 'failed')
+DATETIME_FIELDS = ('created_at', 'updated_at', 'delivery_window_start', 'delivery_window_end')
+
+ARCHIVE_COLUMNS = tuple(Order.__table__.columns)
+ArchivedOrderRow = namedtuple('ArchivedOrderRow', OrderResponse.model_fields)
+
+
+def _write_part(directory: Path, month: str, rows: list) -> str:
+    """Write rows as gzip-compressed NDJSON, atomically, and return the path relative to `directory`."""
+    relative = f'{month}/part-{rows[0].id:010d}-{rows[-1].id:010d}.ndjson.gz'
+    target = directory / relative
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temporary = target.with_name(target.name + '.tmp')
+    body = b''.join(orjson.dumps(row._asdict(), option=orjson.OPT_APPEND_NEWLINE) for row in rows)
+    with gzip.open(temporary, 'wb') as part:
+        part.write(body)
+    os.replace(temporary, target)
+    return relative
+
+
+def archive_orders(db: Session, older_than: timedelta = ORDER_ARCHIVE_AGE,
+                   batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Move completed and failed orders last updated before `older_than` ago out of the orders table.
+
+    Each batch is deleted from the hot table first, with the archiving
+    conditions repeated in the DELETE so an order reopened meanwhile stays
+    put, and only the rows the DELETE returns are archived. They are written
+    to one part file per month of updated_at and recorded in
+    order_archive_parts, archived_orders and the change log in the same
+    commit; stream subscribers see them deleted once it lands. A crash
+    between writing a file and committing leaves only an unreferenced file;
+    the rows stay hot and are archived again next time. Returns the number
+    of orders archived.
+    """
+    cutoff = (utc_now() - older_than).replace(tzinfo=None)
+    archivable = (Order.status.in_(TERMINAL_STATUSES), Order.updated_at < cutoff)
+    archived = 0
+    while True:
+        batch = select(Order.id).where(*archivable).order_by(Order.id).limit(batch_size)
+        rows = db.execute(
+            delete(Order)
+            .where(Order.id.in_(batch), *archivable)
+            .returning(*ARCHIVE_COLUMNS)
+            .execution_options(synchronize_session=False)
+        ).all()
+        if not rows:
+            db.rollback()
+            break
+
+        for month, month_rows in groupby(sorted(rows, key=lambda row: (row.updated_at.strftime('%Y-%m'), row.id)),
+                                         key=lambda row: row.updated_at.strftime('%Y-%m')):
+            month_rows = list(month_rows)
+            part = OrderArchivePart(
+                month=month,
+                path=_write_part(ORDER_ARCHIVE_DIR, month, month_rows),
+                row_count=len(month_rows),
+                min_id=month_rows[0].id,
+                max_id=month_rows[-1].id,
+                min_updated_at=min(row.updated_at for row in month_rows),
+                max_updated_at=max(row.updated_at for row in month_rows)
+            )
+            db.add(part)
+            db.flush()
+            db.execute(insert(ArchivedOrder), [{'id': row.id, 'part_id': part.id} for row in month_rows])
+
+        adjust_summary(db, 'orders', ((row._mapping, -1) for row in rows))
+        drivers = event_driver_ids(db, (row.vehicle_id for row in rows))
+        log_changes(db, 'orders', 'delete', (row.id for row in rows))
+        db.commit()
+        archived += len(rows)
+        if event_broker.watching():
+            for row in rows:
+                event_broker.publish('order.deleted', order_event(row, drivers.get(row.vehicle_id)))
+
+    if archived:
+        response_cache.invalidate('orders')
+    return archived
+
+
+@lru_cache(maxsize=int(os.getenv('ORDER_ARCHIVE_PART_CACHE', 4)))
+def read_part(path: str) -> tuple[ArchivedOrderRow, ...]:
+    """Decode one part file into response rows sorted by id; parts never change, so they are cached."""
+    with gzip.open(ORDER_ARCHIVE_DIR / path, 'rb') as part:
+        records = [orjson.loads(line) for line in part]
+    rows = []
+    for record in records:
+        for field in DATETIME_FIELDS:
+            if record.get(field) is not None:
+                record[field] = datetime.fromisoformat(record[field])
+        rows.append(ArchivedOrderRow(**{field: record[field] for field in ArchivedOrderRow._fields}))
+    return tuple(rows)
+
+
+def archived_part_statement(order_id: int):
+    """Select the part file holding an archived order."""
+    return (
+        select(OrderArchivePart.path)
+        .join(ArchivedOrder, ArchivedOrder.part_id == OrderArchivePart.id)
+        .where(ArchivedOrder.id == order_id)
+    )
+
+
+def find_archived(path: str | None, order_id: int) -> ArchivedOrderRow | None:
+    if path is None:
+        return None
+    rows = read_part(path)
+    position = bisect.bisect_left(rows, order_id, key=lambda row: row.id)
+    return rows[position] if position < len(rows) and rows[position].id == order_id else None
+
+
+def get_archived_order(db: Session, order_id: int) -> ArchivedOrderRow | None:
+    """Look up an archived order through the id index, reading a single part file."""
+    return find_archived(db.scalar(archived_part_statement(order_id)), order_id)
+
+
+def archive_parts_statement(ordering: str, cursor: str | None):
+    """Select the parts that may hold rows past the cursor, in the order their keys start."""
+    after = decode_cursor(cursor, ordering) if cursor is not None else None
+    statement = select(OrderArchivePart.path, OrderArchivePart.min_id, OrderArchivePart.min_updated_at)
+    if ordering == 'updated_at':
+        if after is not None:
+            statement = statement.where(
+                tuple_(OrderArchivePart.max_updated_at, OrderArchivePart.max_id) > tuple_(*after)
+            )
+        return statement.order_by(OrderArchivePart.min_updated_at, OrderArchivePart.min_id)
+    if after is not None:
+        statement = statement.where(OrderArchivePart.max_id > after[0])
+    return statement.order_by(OrderArchivePart.min_id)
+
+
+def _sort_key(ordering: str):
+    if ordering == 'updated_at':
+        return lambda row: (row.updated_at, row.id)
+    return lambda row: (row.id,)
+
+
+def archived_matcher(filter_values: dict, due_from: datetime | None = None, due_to: datetime | None = None,
+                     window_from: datetime | None = None, window_to: datetime | None = None):
+    """Build the Python counterpart of the list filters for archived rows."""
+    def matches(row: ArchivedOrderRow) -> bool:
+        return (
+            all(getattr(row, key) == value for key, value in filter_values.items())
+            and (due_from is None or row.delivery_window_end >= due_from)
+            and (due_to is None or row.delivery_window_end < due_to)
+            and (window_to is None or row.delivery_window_start < window_to)
+            and (window_from is None or row.delivery_window_end > window_from)
+        )
+    return matches
+
+
+def collect_archived(parts: list, matches, ordering: str, cursor: str | None, limit: int) -> list[ArchivedOrderRow]:
+    """Return up to `limit + 1` matching archived rows past the cursor key, in page order.
+
+    Parts arrive sorted by their lowest key, so reading stops at the first
+    part that starts after the last row already needed.
+    """
+    key = _sort_key(ordering)
+    after = tuple(decode_cursor(cursor, ordering)) if cursor is not None else None
+    found = []
+    for part in parts:
+        part_start = (part.min_updated_at, part.min_id) if ordering == 'updated_at' else (part.min_id,)
+        if len(found) > limit and part_start > key(found[limit]):
+            break
+        found.extend(row for row in read_part(part.path) if (after is None or key(row) > after) and matches(row))
+        found.sort(key=key)
+        del found[limit + 1:]
+    return found
+
+
+def merge_pages(hot_rows: list, hot_cursor: str | None, archived_rows: list, ordering: str,
+                limit: int) -> tuple[list, str | None]:
+    """Merge a hot page and the archived look-ahead rows into one page and its next cursor.
+
+    Together they hold the first `limit` rows of the union, and the union has
+    more whenever either side does.
+    """
+    rows = sorted([*hot_rows, *archived_rows], key=_sort_key(ordering))
+    if hot_cursor is None and len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(ordering, rows[-1])
+
+
+def _archive() -> None:
+    with SessionLocal() as db:
+        archived = archive_orders(db)
+        if archived:
+            logger.info('Archived %d orders', archived)
+
+
+async def archive_periodically(interval: float = ORDER_ARCHIVE_SECONDS) -> None:
+    """Run the order archival at startup and then every `interval` seconds."""
+    while True:
+        try:
+            await asyncio.to_thread(_archive)
+        except Exception:
+            logger.exception('Could not archive orders')
+        await asyncio.sleep(interval)
@@ -0,0 +1,178 @@
+from app.core.metrics import registry
+from app.core.etags import etag_matches, not_modified, set_etag
+from fastapi import Response
+from collections import OrderedDict
+from dotenv import load_dotenv
+from typing import NamedTuple
+import os
+import threading
+import time
+
+load_dotenv()
+
+RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'local')
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv('RESPONSE_CACHE_TTL_SECONDS', 10))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+registry.describe('logitrack_response_cache_requests_total', 'counter', 'Response cache lookups by namespace and result.')
+registry.describe('logitrack_response_cache_evictions_total', 'counter', 'Response cache entries dropped by reason.')
+
+
+class CachedPage(NamedTuple):
+    etag: str
+    body: bytes
+
+
+class _Entry:
+    __slots__ = ('value', 'filters', 'size', 'expires')
+
+    def __init__(self, value: CachedPage, filters: dict, size: int, expires: float):
+        self.value = value
+        self.filters = filters
+        self.size = size
+        self.expires = expires
+
+
+def _matches(filters: dict, row: dict) -> bool:
+    # A column the writer did not report could hold any value, so it matches.
+    return all(key not in row or row[key] == value for key, value in filters.items())
+
+
+class LocalCacheBackend:
+    """Process-local TTL cache with LRU eviction under a byte budget.
+
+    Each entry remembers the column filters of the listing it holds, so a write
+    only drops the listings its old or new row values could appear in.
+    """
+
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL_SECONDS, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> CachedPage | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires <= time.monotonic():
+                self._drop(key, 'expired')
+                return None
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def set(self, key: tuple, value: CachedPage, filters: dict) -> None:
+        size = len(value.body) + len(value.etag)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key, None)
+            self._entries[key] = _Entry(value, filters, size, time.monotonic() + self.ttl)
+            self.size += size
+            while self.size > self.max_bytes:
+                self._drop(next(iter(self._entries)), 'capacity')
+
+    def invalidate(self, namespace: str, rows: tuple[dict, ...]) -> int:
+        with self._lock:
+            stale = [
+                key for key, entry in self._entries.items()
+                if key[0] == namespace and (not rows or any(_matches(entry.filters, row) for row in rows))
+            ]
+            for key in stale:
+                self._drop(key, 'invalidated')
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _drop(self, key: tuple, reason: str | None) -> None:
+        entry = self._entries.pop(key)
+        self.size -= entry.size
+        if reason is not None:
+            registry.inc('logitrack_response_cache_evictions_total', reason=reason)
+
+
+def row_values(row, columns: tuple[str, ...]) -> dict:
+    """Snapshot the filterable columns of an ORM object for ResponseCache.invalidate."""
+    return {column: getattr(row, column) for column in columns}
+
+
+def cached_response(page: CachedPage, if_none_match: str | None) -> Response:
+    if etag_matches(if_none_match, page.etag):
+        return not_modified(page.etag)
+    response = Response(content=page.body, media_type='application/json')
+    set_etag(response, page.etag)
+    return response
+
+
+CACHE_BACKENDS = {
+    'local': LocalCacheBackend,
+}
+
+
+def register_backend(name: str, factory) -> None:
+    """Make a backend selectable through RESPONSE_CACHE_BACKEND.
+
+    A backend needs get, set, invalidate and clear with the signatures of
+    LocalCacheBackend. One backed by a shared store or a pub/sub channel lets
+    every worker see the invalidations issued by the others.
+    """
+    CACHE_BACKENDS[name] = factory
+
+
+class ResponseCache:
+    """Read-through cache for rendered list pages, keyed by route and normalized parameters.
+
+    Every invalidation bumps a per-namespace generation. A reader takes the
+    generation before its query and passes it to `set`, which skips the page
+    if a write was invalidated in between: the page may predate that write.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else CACHE_BACKENDS[RESPONSE_CACHE_BACKEND]()
+        self._generations: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(namespace: str, filters: dict, **params) -> tuple:
+        return namespace, tuple(sorted(filters.items())), tuple(sorted(params.items()))
+
+    def get(self, key: tuple) -> CachedPage | None:
+        value = self.backend.get(key)
+        registry.inc('logitrack_response_cache_requests_total', namespace=key[0], result='miss' if value is None else 'hit')
+        return value
+
+    def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    def set(self, key: tuple, value: CachedPage, generation: int | None = None) -> None:
+        """Store a page, unless `namespace` has been invalidated since `generation` was taken."""
+        with self._lock:
+            if generation is not None and self._generations.get(key[0], 0) != generation:
+                return
+            self.backend.set(key, value, dict(key[1]))
+
+    def invalidate(self, namespace: str, *rows: dict) -> int:
+        """Drop cached listings that could contain any of `rows`; with no rows, drop the whole namespace.
+
+        Pass the filterable column values of every row a write touched, before
+        and after the change, once the transaction has committed.
+        """
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            return self.backend.invalidate(namespace, rows)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+response_cache = ResponseCache()
+registry.add_gauge(
+    'logitrack_response_cache_bytes', 'Bytes held by the local response cache.',
+    lambda: getattr(response_cache.backend, 'size', None)
+)
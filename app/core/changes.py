@@ -0,0 +1,84 @@
+from app.models import ChangeLog, utc_now
+from app.database import SessionLocal
+from sqlalchemy import select, insert, delete, func
+from sqlalchemy.orm import Session
+from datetime import timedelta
+from dotenv import load_dotenv
+from typing import Iterable
+import asyncio
+import logging
+import os
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CHANGE_LOG_RETENTION = timedelta(days=float(os.getenv('CHANGE_LOG_RETENTION_DAYS', 7)))
+CHANGE_LOG_PURGE_SECONDS = float(os.getenv('CHANGE_LOG_PURGE_SECONDS', 3600))
+# Any constant works; it only has to be the same for every writer.
+CHANGE_LOG_LOCK_KEY = 7_300_417
+
+
+def _serialize_writers(db: Session) -> None:
+    """Make change-log sequence numbers commit in order.
+
+    SQLite already runs one writer at a time. On PostgreSQL a transaction
+    holding seq 11 could commit before the one holding seq 10, and a consumer
+    that read up to 11 in between would never see 10. A transaction-level
+    advisory lock taken just before the log insert closes that gap; it is
+    held only from the last statement to the commit.
+    """
+    if db.get_bind().dialect.name == 'postgresql':
+        db.execute(select(func.pg_advisory_xact_lock(CHANGE_LOG_LOCK_KEY)))
+
+
+def log_changes(db: Session, entity: str, operation: str, entity_ids: Iterable[int]) -> None:
+    """Append one change per id to the log, in the caller's transaction.
+
+    Call it as the last statement before the commit, after every row the
+    transaction writes, so the advisory lock is always taken after the row
+    locks and never between them.
+    """
+    rows = [{'entity': entity, 'entity_id': entity_id, 'operation': operation} for entity_id in entity_ids]
+    if not rows:
+        return
+    _serialize_writers(db)
+    db.execute(insert(ChangeLog), rows)
+
+
+def log_change(db: Session, entity: str, operation: str, entity_id: int) -> None:
+    log_changes(db, entity, operation, (entity_id,))
+
+
+def change_log_bounds(db: Session) -> tuple[int | None, int | None]:
+    """The lowest and highest sequence numbers still in the log; both None while it is empty."""
+    oldest, latest = db.execute(select(func.min(ChangeLog.seq), func.max(ChangeLog.seq))).one()
+    return oldest, latest
+
+
+def purge_change_log(db: Session, retention: timedelta = CHANGE_LOG_RETENTION) -> int:
+    """Delete changes older than `retention`; the caller commits.
+
+    The newest entry is always kept so the lowest remaining sequence number
+    keeps telling consumers how far the log reaches back.
+    """
+    cutoff = (utc_now() - retention).replace(tzinfo=None)
+    newest = select(func.max(ChangeLog.seq)).scalar_subquery()
+    result = db.execute(delete(ChangeLog).where(ChangeLog.changed_at < cutoff, ChangeLog.seq < newest))
+    return result.rowcount
+
+
+def _purge() -> None:
+    with SessionLocal() as db:
+        purge_change_log(db)
+        db.commit()
+
+
+async def purge_periodically(interval: float = CHANGE_LOG_PURGE_SECONDS) -> None:
+    """Apply the change-log retention at startup and then every `interval` seconds."""
+    while True:
+        try:
+            await asyncio.to_thread(_purge)
+        except Exception:
+            logger.exception('Could not purge the change log')
+        await asyncio.sleep(interval)
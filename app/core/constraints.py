@@ -0,0 +1,28 @@
+from sqlalchemy.exc import IntegrityError
+
+UNIQUE_VIOLATION = 'unique'
+FOREIGN_KEY_VIOLATION = 'foreign_key'
+
+# SQLSTATE codes PostgreSQL drivers attach to the error.
+_SQLSTATES = {
+    '23505': UNIQUE_VIOLATION,
+    '23503': FOREIGN_KEY_VIOLATION,
+}
+# SQLite only tells them apart in the message.
+_SQLITE_PREFIXES = {
+    'UNIQUE constraint failed': UNIQUE_VIOLATION,
+    'FOREIGN KEY constraint failed': FOREIGN_KEY_VIOLATION,
+}
+
+
+def violation(error: IntegrityError) -> str | None:
+    """Classify the constraint an IntegrityError broke as UNIQUE_VIOLATION, FOREIGN_KEY_VIOLATION or None.
+
+    Handlers write first and map the violation to a response, instead of
+    querying for the duplicate or the missing row beforehand.
+    """
+    code = getattr(error.orig, 'sqlstate', None) or getattr(error.orig, 'pgcode', None)
+    if code is not None:
+        return _SQLSTATES.get(code)
+    message = str(error.orig)
+    return next((kind for prefix, kind in _SQLITE_PREFIXES.items() if message.startswith(prefix)), None)
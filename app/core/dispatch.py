@@ -0,0 +1,153 @@
+from app.models import Order, Vehicle, utc_now
+from sqlalchemy import select, update, case
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+from typing import NamedTuple
+import numpy as np
+import json
+import os
+
+load_dotenv()
+
+DEFAULT_SIZE_WEIGHTS_KG = {'xs': 1, 's': 5, 'm': 20, 'l': 50, 'xl': 150}
+SIZE_WEIGHTS_KG = {**DEFAULT_SIZE_WEIGHTS_KG, **json.loads(os.getenv('SIZE_WEIGHTS_KG', '{}'))}
+LOADED_STATUSES = ('pending', 'in_transit')
+DELIVERY_SERVICE_SECONDS = int(float(os.getenv('DELIVERY_SERVICE_MINUTES', 15)) * 60)
+# Each assignment takes two bound parameters in the CASE and one in the IN list.
+DISPATCH_CHUNK_SIZE = 1000
+
+_OPEN_START = np.iinfo(np.int64).min
+
+
+class DispatchPlan(NamedTuple):
+    assignments: list[tuple[int, int]]
+    unassigned_order_ids: list[int]
+
+
+def _seconds(values) -> np.ndarray:
+    return np.array(values, dtype='datetime64[s]').astype(np.int64)
+
+
+def _weights(sizes) -> np.ndarray:
+    return np.array([SIZE_WEIGHTS_KG[size] for size in sizes], dtype=np.float64)
+
+
+def solve(weights: np.ndarray, priority: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+          capacity: np.ndarray, ready: np.ndarray, service: int = DELIVERY_SERVICE_SECONDS) -> np.ndarray:
+    """Assign orders to vehicles; returns the vehicle index per order, or -1 when none fits.
+
+    Orders are taken priority first, then by earliest window end and heaviest
+    first, and each vehicle delivers them in that sequence. `ready` holds the
+    time each vehicle finishes the stops it already has; an order fits a
+    vehicle whose remaining capacity covers its weight and that can arrive
+    within the order's window and spend `service` seconds there before the
+    window closes, so orders with disjoint windows can share a vehicle. Among
+    the vehicles that fit, the one left with the least spare capacity wins
+    (best fit). The feasibility check and the choice run as array operations
+    over all vehicles at once, so the Python loop is one step per order.
+    """
+    remaining = capacity.astype(np.float64)
+    ready = ready.copy()
+    assigned = np.full(len(weights), -1, dtype=np.int64)
+    if len(remaining) == 0:
+        return assigned
+
+    sequence = np.lexsort((np.arange(len(weights)), -weights, ends, ~priority.astype(bool)))
+    slack = np.empty_like(remaining)
+    arrival = np.empty_like(ready)
+    largest = remaining.max()
+
+    for index in sequence:
+        weight = weights[index]
+        if weight > largest:
+            continue
+
+        np.maximum(ready, starts[index], out=arrival)
+        fits = remaining >= weight
+        fits &= arrival <= ends[index] - service
+        np.subtract(remaining, weight, out=slack)
+        slack[~fits] = np.inf
+        vehicle = slack.argmin()
+        if not fits[vehicle]:
+            continue
+
+        assigned[index] = vehicle
+        was_largest = remaining[vehicle] == largest
+        remaining[vehicle] -= weight
+        ready[vehicle] = arrival[vehicle] + service
+        if was_largest:
+            largest = remaining.max()
+
+    return assigned
+
+
+def _loaded_ready(ready: np.ndarray, positions: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+                  service: int = DELIVERY_SERVICE_SECONDS) -> None:
+    """Advance `ready` past the stops vehicles already carry, each route in window-end order."""
+    route = np.lexsort((ends, positions))
+    for position, start in zip(positions[route].tolist(), starts[route].tolist()):
+        ready[position] = max(ready[position], start) + service
+
+
+def plan_dispatch(db: Session) -> DispatchPlan:
+    """Match every unassigned pending order with an available vehicle."""
+    orders = db.execute(
+        select(Order.id, Order.size, Order.priority, Order.delivery_window_start, Order.delivery_window_end)
+        .where(Order.status == 'pending', Order.vehicle_id.is_(None))
+        .order_by(Order.id)
+    ).all()
+    vehicles = db.execute(
+        select(Vehicle.id, Vehicle.capacity_kg).where(Vehicle.status == 'available').order_by(Vehicle.id)
+    ).all()
+    if not orders:
+        return DispatchPlan([], [])
+
+    order_ids, sizes, priorities, starts, ends = zip(*orders)
+    vehicle_ids = np.array([row.id for row in vehicles], dtype=np.int64)
+    capacity = np.array([row.capacity_kg for row in vehicles], dtype=np.float64)
+    ready = np.full(len(vehicles), _OPEN_START, dtype=np.int64)
+
+    # Orders already on a vehicle use up its capacity and come first on its route.
+    if vehicles:
+        loaded = db.execute(
+            select(Order.vehicle_id, Order.size, Order.delivery_window_start, Order.delivery_window_end)
+            .where(Order.status.in_(LOADED_STATUSES), Order.vehicle_id.in_(select(Vehicle.id).where(Vehicle.status == 'available')))
+        ).all()
+        if loaded:
+            loaded_vehicles, loaded_sizes, loaded_starts, loaded_ends = zip(*loaded)
+            loaded_vehicles = np.array(loaded_vehicles, dtype=np.int64)
+            positions = np.minimum(np.searchsorted(vehicle_ids, loaded_vehicles), len(vehicle_ids) - 1)
+            # A vehicle that became available after the first query is not in the plan; skip its load.
+            known = vehicle_ids[positions] == loaded_vehicles
+            positions = positions[known]
+            np.subtract.at(capacity, positions, _weights(loaded_sizes)[known])
+            _loaded_ready(ready, positions, _seconds(loaded_starts)[known], _seconds(loaded_ends)[known])
+
+    assigned = solve(
+        _weights(sizes), np.array(priorities, dtype=bool), _seconds(starts), _seconds(ends), capacity, ready
+    )
+
+    order_ids = np.array(order_ids, dtype=np.int64)
+    matched = assigned >= 0
+    assignments = list(zip(order_ids[matched].tolist(), vehicle_ids[assigned[matched]].tolist()))
+    return DispatchPlan(assignments, order_ids[~matched].tolist())
+
+
+def apply_dispatch(db: Session, plan: DispatchPlan) -> list:
+    """Write the plan's assignments, skipping orders that were assigned or changed meanwhile.
+
+    Returns the id, vehicle_id and status of the orders actually written,
+    sorted by id; the caller commits.
+    """
+    now = utc_now()
+    applied = []
+    for start in range(0, len(plan.assignments), DISPATCH_CHUNK_SIZE):
+        chunk = dict(plan.assignments[start:start + DISPATCH_CHUNK_SIZE])
+        statement = (
+            update(Order.__table__)
+            .where(Order.id.in_(chunk), Order.vehicle_id.is_(None), Order.status == 'pending')
+            .values(vehicle_id=case(chunk, value=Order.id), updated_at=now)
+            .returning(Order.id, Order.vehicle_id, Order.status)
+        )
+        applied.extend(db.connection().execute(statement))
+    return sorted(applied, key=lambda row: row.id)
@@ -0,0 +1,347 @@
+from app.models import VehiclePosition, VehiclePositionMinute, VehiclePositionQuarterHour, TelemetryCompaction, utc_now
+from app.database import SessionLocal
+from sqlalchemy import select, delete, update, insert, func, case, and_, tuple_, null
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from typing import NamedTuple
+import asyncio
+import logging
+import numpy as np
+import os
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+TELEMETRY_COMPACTION_SECONDS = float(os.getenv('TELEMETRY_COMPACTION_SECONDS', 60))
+TELEMETRY_COMPACTION_CHUNK = int(os.getenv('TELEMETRY_COMPACTION_CHUNK', 50_000))
+TELEMETRY_RAW_RETENTION = timedelta(days=float(os.getenv('TELEMETRY_RAW_RETENTION_DAYS', 7)))
+TELEMETRY_MINUTE_RETENTION = timedelta(days=float(os.getenv('TELEMETRY_MINUTE_RETENTION_DAYS', 90)))
+
+EARTH_RADIUS_KM = 6371.0088
+_UPSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+class Resolution(NamedTuple):
+    name: str
+    model: type | None
+    step: timedelta | None
+    max_span: timedelta | None
+    retention: timedelta | None
+
+
+# Finest first. A track is read from the first resolution whose span limit
+# covers the requested range and whose retention still reaches its start.
+RESOLUTIONS = (
+    Resolution('raw', None, None, timedelta(hours=float(os.getenv('TRACK_RAW_MAX_HOURS', 1))), TELEMETRY_RAW_RETENTION),
+    Resolution('1m', VehiclePositionMinute, timedelta(minutes=1),
+               timedelta(hours=float(os.getenv('TRACK_MINUTE_MAX_HOURS', 24))), TELEMETRY_MINUTE_RETENTION),
+    Resolution('15m', VehiclePositionQuarterHour, timedelta(minutes=15), None, None),
+)
+ROLLUPS = tuple(resolution for resolution in RESOLUTIONS if resolution.model is not None)
+
+
+def haversine_km(latitude_1, longitude_1, latitude_2, longitude_2):
+    """Great-circle distance in kilometres between points given in degrees, as scalars or arrays."""
+    phi_1, phi_2 = np.radians(latitude_1), np.radians(latitude_2)
+    half_dphi = (phi_2 - phi_1) / 2
+    half_dlambda = np.radians(np.subtract(longitude_2, longitude_1)) / 2
+    a = np.sin(half_dphi) ** 2 + np.cos(phi_1) * np.cos(phi_2) * np.sin(half_dlambda) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+def bucket_start(value: datetime, step: timedelta) -> datetime:
+    """Floor a timestamp to the start of its `step`-wide bucket."""
+    return datetime.min + (value - datetime.min) // step * step
+
+
+def track_resolution(start: datetime, end: datetime, now: datetime | None = None) -> Resolution:
+    """Pick the resolution a track from `start` to `end` is read from."""
+    now = now or utc_now().replace(tzinfo=None)
+    for resolution in RESOLUTIONS:
+        if resolution.max_span is not None and end - start > resolution.max_span:
+            continue
+        if resolution.retention is not None and start < now - resolution.retention:
+            continue
+        return resolution
+    return RESOLUTIONS[-1]
+
+
+def track_statement(resolution: Resolution, vehicle_id: int, start: datetime, end: datetime):
+    """Select recorded_at, latitude, longitude, speed_kmh and distance_km of a vehicle's track, oldest first.
+
+    Raw points are read through ix_vehicle_positions_vehicle_id_recorded_at,
+    rollups through their (vehicle_id, bucket) primary key.
+    """
+    if resolution.model is None:
+        return (
+            select(VehiclePosition.recorded_at, VehiclePosition.latitude, VehiclePosition.longitude,
+                   VehiclePosition.speed_kmh, null().label('distance_km'))
+            .where(VehiclePosition.vehicle_id == vehicle_id, VehiclePosition.recorded_at >= start,
+                   VehiclePosition.recorded_at < end)
+            .order_by(VehiclePosition.recorded_at)
+        )
+    model = resolution.model
+    return (
+        select(model.recorded_at, model.latitude, model.longitude, model.avg_speed_kmh, model.distance_km)
+        .where(model.vehicle_id == vehicle_id, model.bucket >= bucket_start(start, resolution.step), model.bucket < end)
+        .order_by(model.bucket)
+    )
+
+
+def _microseconds(values) -> np.ndarray:
+    return np.array(values, dtype='datetime64[us]').astype(np.int64)
+
+
+def _datetimes(values: np.ndarray) -> list[datetime]:
+    return values.astype('datetime64[us]').tolist()
+
+
+def _legs(vehicle: np.ndarray, stamps: np.ndarray, latitude: np.ndarray, longitude: np.ndarray, previous: dict):
+    """Distance from each ping to the one before it, for pings sorted by vehicle and time.
+
+    A vehicle's first ping in the chunk starts from its last rolled-up point.
+    Pings older than that point come first in the sort; they add no distance
+    and the chain starts after them.
+    """
+    vehicles, inverse = np.unique(vehicle, return_inverse=True)
+    stored = [previous.get(vehicle_id) for vehicle_id in vehicles.tolist()]
+    stored_stamp = _microseconds([row.recorded_at if row else None for row in stored])
+    stored_stamp[[row is None for row in stored]] = np.iinfo(np.int64).min
+    stored_latitude = np.array([row.latitude if row else np.nan for row in stored])[inverse]
+    stored_longitude = np.array([row.longitude if row else np.nan for row in stored])[inverse]
+
+    late = stamps < stored_stamp[inverse]
+    chained = np.r_[False, (vehicle[1:] == vehicle[:-1]) & ~late[:-1]]
+    from_latitude = np.where(chained, np.r_[np.nan, latitude[:-1]], stored_latitude)
+    from_longitude = np.where(chained, np.r_[np.nan, longitude[:-1]], stored_longitude)
+    legs = haversine_km(from_latitude, from_longitude, latitude, longitude)
+    return np.where(late | np.isnan(legs), 0.0, legs)
+
+
+def _rollup_rows(vehicle, stamps, latitude, longitude, speed, legs, step: timedelta) -> list[dict]:
+    """One row per vehicle and bucket of `step`, for pings sorted by vehicle and time.
+
+    Each group of pings is a contiguous run, so every aggregate is a single
+    reduceat over the chunk and the position is the run's last ping.
+    """
+    buckets = stamps // (step // timedelta(microseconds=1)) * (step // timedelta(microseconds=1))
+    starts = np.flatnonzero(np.r_[True, (vehicle[1:] != vehicle[:-1]) | (buckets[1:] != buckets[:-1])])
+    ends = np.r_[starts[1:], len(vehicle)] - 1
+    reported = ~np.isnan(speed)
+    speed_samples = np.add.reduceat(reported.astype(np.int64), starts)
+    speed_total = np.add.reduceat(np.where(reported, speed, 0.0), starts)
+
+    columns = {
+        'vehicle_id': vehicle[starts].tolist(),
+        'bucket': _datetimes(buckets[starts]),
+        'recorded_at': _datetimes(stamps[ends]),
+        'latitude': latitude[ends].tolist(),
+        'longitude': longitude[ends].tolist(),
+        'distance_km': np.add.reduceat(legs, starts).tolist(),
+        'avg_speed_kmh': [
+            total / samples if samples else None for total, samples in zip(speed_total.tolist(), speed_samples.tolist())
+        ],
+        'speed_samples': speed_samples.tolist(),
+        'ping_count': np.diff(np.r_[starts, len(vehicle)]).tolist(),
+    }
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+def _last_positions(db: Session, vehicle_ids: set[int]) -> dict:
+    """The last rolled-up point of each vehicle, where the distance of its next pings starts from."""
+    model = VehiclePositionMinute
+    latest = (
+        select(model.vehicle_id, func.max(model.bucket).label('bucket'))
+        .where(model.vehicle_id.in_(vehicle_ids))
+        .group_by(model.vehicle_id)
+        .subquery()
+    )
+    rows = db.execute(
+        select(model.vehicle_id, model.recorded_at, model.latitude, model.longitude)
+        .join(latest, and_(model.vehicle_id == latest.c.vehicle_id, model.bucket == latest.c.bucket))
+    )
+    return {row.vehicle_id: row for row in rows}
+
+
+def _merge_rollups(db: Session, model, rows: list[dict]) -> None:
+    """Add freshly aggregated buckets to `model`, merging them into buckets that already have rows."""
+    upsert = _UPSERTS.get(db.get_bind().dialect.name)
+    if upsert is not None:
+        # On the table rather than the entity, which would take the slower ORM bulk path.
+        statement = upsert(model.__table__)
+        excluded = statement.excluded
+        samples = model.speed_samples + excluded.speed_samples
+        newer = excluded.recorded_at >= model.recorded_at
+        db.execute(statement.on_conflict_do_update(
+            index_elements=['vehicle_id', 'bucket'],
+            set_={
+                'recorded_at': case((newer, excluded.recorded_at), else_=model.recorded_at),
+                'latitude': case((newer, excluded.latitude), else_=model.latitude),
+                'longitude': case((newer, excluded.longitude), else_=model.longitude),
+                'distance_km': model.distance_km + excluded.distance_km,
+                'avg_speed_kmh': (
+                    func.coalesce(model.avg_speed_kmh * model.speed_samples, 0)
+                    + func.coalesce(excluded.avg_speed_kmh * excluded.speed_samples, 0)
+                ) / func.nullif(samples, 0),
+                'speed_samples': samples,
+                'ping_count': model.ping_count + excluded.ping_count,
+            }
+        ), rows)
+        return
+
+    for row in rows:
+        current = db.get(model, (row['vehicle_id'], row['bucket']))
+        if current is None:
+            db.add(model(**row))
+            continue
+        samples = current.speed_samples + row['speed_samples']
+        if samples:
+            current.avg_speed_kmh = (
+                (current.avg_speed_kmh or 0) * current.speed_samples + (row['avg_speed_kmh'] or 0) * row['speed_samples']
+            ) / samples
+        if row['recorded_at'] >= current.recorded_at:
+            current.recorded_at, current.latitude, current.longitude = (
+                row['recorded_at'], row['latitude'], row['longitude']
+            )
+        current.distance_km += row['distance_km']
+        current.speed_samples = samples
+        current.ping_count += row['ping_count']
+    db.flush()
+
+
+def _claim_watermark(db: Session) -> int:
+    """Lock the compaction watermark until the transaction ends and return it.
+
+    A no-op UPDATE rather than a SELECT: on PostgreSQL it takes the row lock,
+    so a compaction running in another worker waits and then reads the
+    watermark the first one committed; on SQLite it takes the write lock.
+    Either way no two compactions roll up the same chunk.
+    """
+    claim = (
+        update(TelemetryCompaction)
+        .where(TelemetryCompaction.id == 1)
+        .values(last_position_id=TelemetryCompaction.last_position_id)
+        .returning(TelemetryCompaction.last_position_id)
+    )
+    last_id = db.scalar(claim)
+    if last_id is None:
+        upsert = _UPSERTS.get(db.get_bind().dialect.name)
+        if upsert is not None:
+            db.execute(upsert(TelemetryCompaction).values(id=1, last_position_id=0).on_conflict_do_nothing())
+        else:
+            db.execute(insert(TelemetryCompaction).values(id=1, last_position_id=0))
+        last_id = db.scalar(claim)
+    return last_id
+
+
+def compact_chunk(db: Session, chunk_size: int = TELEMETRY_COMPACTION_CHUNK) -> int:
+    """Roll the next `chunk_size` raw positions into every rollup table and commit; returns how many were read.
+
+    Raw rows are taken in id order after the stored watermark, which stays
+    locked until the commit, so each is counted once even with a compaction
+    running in every worker. Distance is the sum of the great-circle legs
+    between a vehicle's consecutive pings, starting from its last rolled-up
+    point; a ping older than that point still counts towards its bucket but
+    adds no distance.
+    """
+    last_id = _claim_watermark(db)
+
+    # Through the connection: plain tuples, without the ORM's row loading.
+    pings = db.connection().execute(
+        select(VehiclePosition.id, VehiclePosition.vehicle_id, VehiclePosition.recorded_at, VehiclePosition.latitude,
+               VehiclePosition.longitude, VehiclePosition.speed_kmh)
+        .where(VehiclePosition.id > last_id)
+        .order_by(VehiclePosition.id)
+        .limit(chunk_size)
+    ).all()
+    if not pings:
+        db.rollback()
+        return 0
+
+    ids, vehicle, stamps, latitude, longitude, speed = zip(*pings)
+    vehicle = np.array(vehicle, dtype=np.int64)
+    stamps = _microseconds(stamps)
+    order = np.lexsort((stamps, vehicle))
+    vehicle, stamps = vehicle[order], stamps[order]
+    latitude = np.array(latitude, dtype=np.float64)[order]
+    longitude = np.array(longitude, dtype=np.float64)[order]
+    # None becomes NaN.
+    speed = np.array(speed, dtype=np.float64)[order]
+    legs = _legs(vehicle, stamps, latitude, longitude, _last_positions(db, set(vehicle.tolist())))
+
+    for resolution in ROLLUPS:
+        rows = _rollup_rows(vehicle, stamps, latitude, longitude, speed, legs, resolution.step)
+        _merge_rollups(db, resolution.model, rows)
+    db.execute(
+        update(TelemetryCompaction).where(TelemetryCompaction.id == 1).values(last_position_id=ids[-1])
+    )
+    db.commit()
+    return len(pings)
+
+
+def _delete_chunks(db: Session, model, key_columns: tuple, condition, chunk_size: int) -> int:
+    """Delete the rows of `model` matching `condition`, `chunk_size` per committed transaction."""
+    deleted = 0
+    key = tuple_(*key_columns) if len(key_columns) > 1 else key_columns[0]
+    while True:
+        chunk = select(*key_columns).where(condition).order_by(*key_columns).limit(chunk_size)
+        removed = db.execute(delete(model).where(key.in_(chunk)).execution_options(synchronize_session=False)).rowcount
+        db.commit()
+        deleted += removed
+        if removed < chunk_size:
+            return deleted
+
+
+def apply_retention(db: Session, now: datetime | None = None, chunk_size: int = TELEMETRY_COMPACTION_CHUNK) -> int:
+    """Delete raw positions past TELEMETRY_RAW_RETENTION and minute rollups past TELEMETRY_MINUTE_RETENTION.
+
+    Raw rows go only once they have been rolled up. Each chunk commits on
+    its own, so no transaction holds its locks for long. Returns the number
+    of rows deleted.
+    """
+    now = now or utc_now().replace(tzinfo=None)
+    last_id = db.scalar(select(TelemetryCompaction.last_position_id).where(TelemetryCompaction.id == 1)) or 0
+    deleted = _delete_chunks(
+        db, VehiclePosition, (VehiclePosition.id,),
+        and_(VehiclePosition.id <= last_id, VehiclePosition.recorded_at < now - TELEMETRY_RAW_RETENTION), chunk_size
+    )
+    for resolution in ROLLUPS:
+        if resolution.retention is None:
+            continue
+        model = resolution.model
+        deleted += _delete_chunks(
+            db, model, (model.vehicle_id, model.bucket), model.bucket < now - resolution.retention, chunk_size
+        )
+    return deleted
+
+
+def compact_telemetry(db: Session, chunk_size: int = TELEMETRY_COMPACTION_CHUNK) -> int:
+    """Roll up every raw position written so far, chunk by chunk, then apply retention; returns the rows rolled up."""
+    compacted = 0
+    while rolled := compact_chunk(db, chunk_size):
+        compacted += rolled
+    apply_retention(db, chunk_size=chunk_size)
+    return compacted
+
+
+def _compact() -> None:
+    with SessionLocal() as db:
+        compacted = compact_telemetry(db)
+        if compacted:
+            logger.info('Rolled up %d positions', compacted)
+
+
+async def compact_periodically(interval: float = TELEMETRY_COMPACTION_SECONDS) -> None:
+    """Run the telemetry compaction at startup and then every `interval` seconds."""
+    while True:
+        try:
+            await asyncio.to_thread(_compact)
+        except Exception:
+            logger.exception('Could not compact telemetry')
+        await asyncio.sleep(interval)
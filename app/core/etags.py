@@ -0,0 +1,55 @@
+from fastapi import Response
+from sqlalchemy import select, func
+from starlette import status
+import hashlib
+
+CACHE_CONTROL = 'private, no-cache'
+
+
+def make_etag(*parts) -> str:
+    """Build a strong ETag from values that change whenever the representation does."""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def resource_etag(model, row_id: int, updated_at) -> str:
+    return make_etag(model.__tablename__, row_id, updated_at)
+
+
+def collection_etag(model, count: int, max_updated_at, **params) -> str:
+    """ETag of a filtered listing; the params (filters, cursor, limit) identify the page."""
+    return make_etag(model.__tablename__, count, max_updated_at, sorted(params.items()))
+
+
+def version_statement(model, row_id: int):
+    """Column-only lookup of what a resource's ETag depends on."""
+    return select(model.updated_at).where(model.id == row_id)
+
+
+def collection_statement(model, filters: list):
+    """Aggregate lookup of what a listing's ETag depends on."""
+    return select(func.count(), func.max(model.updated_at)).select_from(model).where(*filters)
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Evaluate If-None-Match with the weak comparison RFC 9110 prescribes for it."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    return any(
+        candidate.strip().removeprefix('W/') == etag
+        for candidate in if_none_match.split(',')
+    )
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={'ETag': etag, 'Cache-Control': CACHE_CONTROL}
+    )
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = CACHE_CONTROL
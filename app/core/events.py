@@ -0,0 +1,179 @@
+from app.core.metrics import registry
+from app.models import Vehicle
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+from typing import NamedTuple
+import asyncio
+import orjson
+import os
+import threading
+
+load_dotenv()
+
+STREAM_QUEUE_SIZE = int(os.getenv('STREAM_QUEUE_SIZE', 100))
+STREAM_HEARTBEAT_SECONDS = float(os.getenv('STREAM_HEARTBEAT_SECONDS', 15))
+FILTER_KEYS = ('vehicle_id', 'driver_id', 'status')
+
+registry.describe('logitrack_stream_events_total', 'counter', 'Events published to the stream broker by type.')
+registry.describe('logitrack_stream_dropped_total', 'counter', 'Stream subscribers disconnected for falling behind.')
+
+
+class Event(NamedTuple):
+    type: str
+    values: dict[str, frozenset]
+    payload: bytes
+
+
+class Subscription:
+    """One stream client: its filters and a bounded queue owned by the event loop it was opened on.
+
+    `get()` returns the next event, or None once the broker has dropped the
+    client for letting its queue fill up.
+    """
+
+    __slots__ = ('filters', 'loop', 'queue', 'dropped')
+
+    def __init__(self, filters: dict, loop: asyncio.AbstractEventLoop, max_size: int):
+        self.filters = filters
+        self.loop = loop
+        self.queue: asyncio.Queue[Event | None] = asyncio.Queue(max_size)
+        self.dropped = False
+
+    def matches(self, event: Event) -> bool:
+        return all(value in event.values.get(key, ()) for key, value in self.filters.items())
+
+    async def get(self) -> Event | None:
+        return await self.queue.get()
+
+
+class EventBroker:
+    """In-process fan-out of order and vehicle changes to stream subscribers.
+
+    Subscribers are indexed by their most selective filter (vehicle, then
+    driver, then status) so an event only visits the subscribers that could
+    want it instead of every open connection. Each event is serialized once
+    and the same bytes are queued for every match. Publishing from a
+    threadpool handler hands delivery to each subscriber loop with a single
+    call_soon_threadsafe; a subscriber whose queue is full is dropped rather
+    than slowing the others down.
+    """
+
+    def __init__(self, max_queue_size: int = STREAM_QUEUE_SIZE):
+        self.max_queue_size = max_queue_size
+        self._index: dict[tuple, set[Subscription]] = {}
+        self._loops: dict[asyncio.AbstractEventLoop, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(self._loops.values())
+
+    def subscribe(self, **filters) -> Subscription:
+        """Open a subscription on the running loop; filters left as None match everything."""
+        filters = {key: value for key, value in filters.items() if value is not None}
+        subscription = Subscription(filters, asyncio.get_running_loop(), self.max_queue_size)
+        key = next(((name, filters[name]) for name in FILTER_KEYS if name in filters), None)
+        with self._lock:
+            self._index.setdefault(key, set()).add(subscription)
+            self._loops[subscription.loop] = self._loops.get(subscription.loop, 0) + 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        key = next(((name, subscription.filters[name]) for name in FILTER_KEYS if name in subscription.filters), None)
+        with self._lock:
+            subscribers = self._index.get(key)
+            if subscribers is None or subscription not in subscribers:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._index[key]
+            self._loops[subscription.loop] -= 1
+            if not self._loops[subscription.loop]:
+                del self._loops[subscription.loop]
+
+    def publish(self, event_type: str, data: dict, previous: dict | None = None) -> None:
+        """Push a change to matching subscribers; call it after the change has been committed.
+
+        `data` holds the entity's current id, vehicle_id, driver_id and status;
+        `previous` the old values of fields that changed, so a subscriber
+        filtering on a status or driver also sees rows moving away from it.
+        """
+        if not self._loops:
+            return
+
+        previous = previous or {}
+        values = {
+            key: frozenset(value for value in (data.get(key), previous.get(key)) if value is not None)
+            for key in FILTER_KEYS
+        }
+        payload = orjson.dumps({'event': event_type, **data, 'previous': previous})
+        event = Event(event_type, values, payload)
+        registry.inc('logitrack_stream_events_total', type=event_type)
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        for loop in list(self._loops):
+            if loop is running:
+                self._deliver(event, loop)
+            elif not loop.is_closed():
+                loop.call_soon_threadsafe(self._deliver, event, loop)
+
+    def _deliver(self, event: Event, loop: asyncio.AbstractEventLoop) -> None:
+        with self._lock:
+            candidates = set(self._index.get(None, ()))
+            for key, values in event.values.items():
+                for value in values:
+                    candidates.update(self._index.get((key, value), ()))
+
+        for subscription in candidates:
+            if subscription.loop is not loop or not subscription.matches(event):
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._drop(subscription)
+
+    def _drop(self, subscription: Subscription) -> None:
+        self.unsubscribe(subscription)
+        subscription.dropped = True
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+        registry.inc('logitrack_stream_dropped_total')
+
+    def watching(self) -> bool:
+        """Whether anyone is subscribed, so publishers can skip work done only for the payload."""
+        return bool(self._loops)
+
+
+def order_event(order, driver_id: int | None) -> dict:
+    return {'id': order.id, 'vehicle_id': order.vehicle_id, 'driver_id': driver_id, 'status': order.status}
+
+
+def vehicle_event(vehicle) -> dict:
+    return {'id': vehicle.id, 'vehicle_id': vehicle.id, 'driver_id': vehicle.driver_id, 'status': vehicle.status}
+
+
+def event_driver_id(db: Session, vehicle_id: int | None) -> int | None:
+    """Look up the driver of an order's vehicle for its event, only when someone is listening."""
+    if vehicle_id is None or not event_broker.watching():
+        return None
+    return db.scalar(select(Vehicle.driver_id).where(Vehicle.id == vehicle_id))
+
+
+def event_driver_ids(db: Session, vehicle_ids) -> dict[int, int]:
+    """Look up the drivers of many orders' vehicles at once, only when someone is listening."""
+    vehicle_ids = {vehicle_id for vehicle_id in vehicle_ids if vehicle_id is not None}
+    if not vehicle_ids or not event_broker.watching():
+        return {}
+    return dict(db.execute(select(Vehicle.id, Vehicle.driver_id).where(Vehicle.id.in_(vehicle_ids))).all())
+
+
+def sse_frame(event: Event) -> bytes:
+    return b'event: ' + event.type.encode() + b'\ndata: ' + event.payload + b'\n\n'
+
+
+event_broker = EventBroker()
+registry.add_gauge('logitrack_stream_subscribers', 'Open /stream connections.', lambda: len(event_broker))
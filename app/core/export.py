@@ -0,0 +1,49 @@
+from app.schemas.base import format_datetime
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Iterator
+import csv
+import io
+import json
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def _format_value(value):
+    if isinstance(value, datetime):
+        return format_datetime(value)
+    return value
+
+
+def stream_rows(bind, statement, export_format: str, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """Yield `statement` results as NDJSON or CSV text, one chunk per fetched batch.
+
+    The statement runs on its own session with `yield_per`, which turns on
+    server-side cursors where the driver supports them, so only one batch of
+    rows is held in memory at a time.
+    """
+    with Session(bind=bind) as session:
+        result = session.execute(statement.execution_options(yield_per=batch_size))
+        columns = list(result.keys())
+
+        if export_format == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            yield buffer.getvalue()
+
+        for batch in result.partitions():
+            if export_format == 'csv':
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerows([_format_value(value) for value in row] for row in batch)
+                yield buffer.getvalue()
+            else:
+                yield ''.join(
+                    json.dumps(dict(zip(columns, map(_format_value, row))), separators=(',', ':')) + '\n'
+                    for row in batch
+                )
@@ -0,0 +1,280 @@
+from app.models import Order
+from app.database import SessionLocal, engine
+from sqlalchemy import select, func, and_
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+import asyncio
+import logging
+import numpy as np
+import os
+import threading
+import time
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+INTERVAL_LEAF_SIZE = 64
+INTERVAL_INDEX_MAX_AGE_SECONDS = float(os.getenv('INTERVAL_INDEX_MAX_AGE_SECONDS', 300))
+INTERVAL_INDEX_REFRESH_SECONDS = float(os.getenv('INTERVAL_INDEX_REFRESH_SECONDS', 1))
+INTERVAL_OVERLAY_LIMIT = int(os.getenv('INTERVAL_OVERLAY_LIMIT', 10000))
+CANDIDATE_CHUNK_SIZE = 500
+
+
+def naive_utc(value: datetime | None) -> datetime | None:
+    """Stored delivery windows are naive UTC; bring query bounds to the same form."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def window_overlap(dialect_name: str, window_from: datetime | None, window_to: datetime | None):
+    """SQL condition for orders whose delivery window overlaps [window_from, window_to).
+
+    On PostgreSQL it is written as a range overlap so it can use the GiST
+    index on tsrange(delivery_window_start, delivery_window_end).
+    """
+    if dialect_name == 'postgresql' and window_from is not None and window_to is not None:
+        window = func.tsrange(Order.delivery_window_start, Order.delivery_window_end)
+        return window.op('&&')(func.tsrange(window_from, window_to))
+
+    conditions = []
+    if window_to is not None:
+        conditions.append(Order.delivery_window_start < window_to)
+    if window_from is not None:
+        conditions.append(Order.delivery_window_end > window_from)
+    return and_(*conditions)
+
+
+class IntervalTree:
+    """Static centered interval tree over closed intervals [starts[i], ends[i]].
+
+    Each node keeps the intervals containing its center, sorted once by start
+    and once by end, so the matches at a node are a prefix or suffix found by
+    binary search. An overlap query visits O(log n) nodes and returns the
+    positions of the k matching intervals in O(log n + k). Small subtrees are
+    stored as leaves and filtered with one vectorized comparison.
+    """
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, leaf_size: int = INTERVAL_LEAF_SIZE):
+        self.starts = starts
+        self.ends = ends
+        self.leaf_size = leaf_size
+        self._nodes = []
+        self._root = self._build(np.arange(len(starts))) if len(starts) else None
+
+    def _build(self, positions: np.ndarray) -> int:
+        if len(positions) <= self.leaf_size:
+            self._nodes.append(('leaf', positions))
+            return len(self._nodes) - 1
+
+        starts, ends = self.starts[positions], self.ends[positions]
+        endpoints = np.sort(np.concatenate((starts, ends)))
+        # An actual endpoint is contained by at least one interval, so every
+        # node keeps something and the recursion always shrinks.
+        center = endpoints[len(endpoints) // 2]
+
+        here = positions[(starts <= center) & (ends >= center)]
+        by_start = here[np.argsort(self.starts[here], kind='stable')]
+        by_end = here[np.argsort(self.ends[here], kind='stable')]
+        left, right = positions[ends < center], positions[starts > center]
+
+        index = len(self._nodes)
+        self._nodes.append(None)
+        left_node = self._build(left) if len(left) else None
+        right_node = self._build(right) if len(right) else None
+        self._nodes[index] = (
+            'node', center, by_start, self.starts[by_start], by_end, self.ends[by_end], left_node, right_node
+        )
+        return index
+
+    def overlapping(self, low, high) -> np.ndarray:
+        """Positions of intervals with start <= high and end >= low."""
+        found = []
+        pending = [self._root] if self._root is not None else []
+        while pending:
+            node = self._nodes[pending.pop()]
+            if node[0] == 'leaf':
+                positions = node[1]
+                found.append(positions[(self.starts[positions] <= high) & (self.ends[positions] >= low)])
+                continue
+
+            _, center, by_start, sorted_starts, by_end, sorted_ends, left_node, right_node = node
+            if high < center:
+                found.append(by_start[:np.searchsorted(sorted_starts, high, side='right')])
+                children = (left_node,)
+            elif low > center:
+                found.append(by_end[np.searchsorted(sorted_ends, low, side='left'):])
+                children = (right_node,)
+            else:
+                found.append(by_start)
+                children = (left_node, right_node)
+            pending.extend(child for child in children if child is not None)
+
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+
+class OrderWindowIndex:
+    """In-memory interval index over order delivery windows, for databases without range indexes.
+
+    A snapshot of (id, start, end, updated_at) for every order is loaded into
+    an IntervalTree. Rows written since then are read incrementally through
+    the updated_at index into an overlay that shadows their snapshot entries,
+    the way TokenVersionTable follows revocations. Once the overlay grows past
+    INTERVAL_OVERLAY_LIMIT or the snapshot is older than
+    INTERVAL_INDEX_MAX_AGE_SECONDS, the index is stale and
+    rebuild_periodically loads a new tree off the request path, swapping it
+    in when it is ready; reads keep using the old one meanwhile. Deleted rows
+    may linger until then, so callers re-check candidates against the
+    database.
+    """
+
+    overlap = timedelta(seconds=30)
+
+    def __init__(self, max_age: float = INTERVAL_INDEX_MAX_AGE_SECONDS,
+                 refresh_interval: float = INTERVAL_INDEX_REFRESH_SECONDS,
+                 overlay_limit: int = INTERVAL_OVERLAY_LIMIT):
+        self.max_age = max_age
+        self.refresh_interval = refresh_interval
+        self.overlay_limit = overlay_limit
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        """Drop the snapshot, e.g. after the database has been reset."""
+        self._tree = None
+        self._ids = np.empty(0, dtype=np.int64)
+        self._updated = np.empty(0, dtype='datetime64[us]')
+        self._overlay: dict[int, tuple[datetime, datetime, datetime]] = {}
+        self._since = None
+        self._built_at = 0.0
+        self._next_refresh = 0.0
+
+    def rebuild(self, db: Session) -> None:
+        """Load a new snapshot and swap it in; only the swap holds the lock, so reads go on meanwhile."""
+        since = db.scalar(select(func.max(Order.updated_at)))
+        rows = db.execute(
+            select(Order.id, Order.delivery_window_start, Order.delivery_window_end, Order.updated_at)
+        ).all()
+        ids, starts, ends, updated = zip(*rows) if rows else ((), (), (), ())
+        tree = IntervalTree(np.array(starts, dtype='datetime64[us]'), np.array(ends, dtype='datetime64[us]'))
+        ids = np.array(ids, dtype=np.int64)
+        updated = np.array(updated, dtype='datetime64[us]')
+
+        with self._lock:
+            self._tree, self._ids, self._updated = tree, ids, updated
+            # Rows written since `since` are read back into the new overlay on the next refresh.
+            self._overlay = {}
+            self._since = since or datetime(1970, 1, 1)
+            self._built_at = time.monotonic()
+            self._next_refresh = 0.0
+
+    def stale(self) -> bool:
+        """Whether the snapshot is missing, older than max_age or shadowed by an overlay past overlay_limit."""
+        return (
+            self._tree is None
+            or time.monotonic() - self._built_at >= self.max_age
+            or len(self._overlay) > self.overlay_limit
+        )
+
+    def _read_changes(self, db: Session) -> None:
+        rows = db.execute(
+            select(Order.id, Order.delivery_window_start, Order.delivery_window_end, Order.updated_at)
+            .where(Order.updated_at >= self._since - self.overlap)
+        ).all()
+        for row_id, start, end, updated_at in rows:
+            self._overlay[row_id] = (start, end, updated_at)
+            if updated_at > self._since:
+                self._since = updated_at
+
+    def refresh(self, db: Session) -> bool:
+        """Read the rows written since the last refresh into the overlay; returns False until a snapshot exists."""
+        with self._lock:
+            if self._tree is None:
+                return False
+            now = time.monotonic()
+            if now >= self._next_refresh:
+                self._read_changes(db)
+                self._next_refresh = now + self.refresh_interval
+            return True
+
+    def candidates(self, db: Session, window_from: datetime | None, window_to: datetime | None,
+                   ordering: str, after: list | None = None) -> list[int] | None:
+        """Ids of orders whose window may overlap [window_from, window_to), in page order after the cursor key.
+
+        Returns None while the first snapshot is still being built; callers
+        then filter in SQL.
+        """
+        if not self.refresh(db):
+            return None
+        low = np.datetime64(window_from, 'us') if window_from is not None else np.datetime64('0001-01-01', 'us')
+        high = np.datetime64(window_to, 'us') if window_to is not None else np.datetime64('9999-12-31', 'us')
+
+        with self._lock:
+            positions = self._tree.overlapping(low, high)
+            ids, updated = self._ids[positions], self._updated[positions]
+            overlay = dict(self._overlay)
+
+        if overlay:
+            keep = ~np.isin(ids, np.fromiter(overlay, dtype=np.int64, count=len(overlay)))
+            ids, updated = ids[keep], updated[keep]
+            changed = [
+                (row_id, updated_at) for row_id, (start, end, updated_at) in overlay.items()
+                if (window_to is None or start <= window_to) and (window_from is None or end >= window_from)
+            ]
+            if changed:
+                ids = np.concatenate((ids, np.array([row_id for row_id, _ in changed], dtype=np.int64)))
+                updated = np.concatenate((updated, np.array([value for _, value in changed], dtype='datetime64[us]')))
+
+        if ordering == 'updated_at':
+            order = np.lexsort((ids, updated))
+            ids, updated = ids[order], updated[order]
+            if after is not None:
+                key = np.datetime64(after[0], 'us')
+                ids = ids[(updated > key) | ((updated == key) & (ids > after[1]))]
+        else:
+            ids = np.sort(ids)
+            if after is not None:
+                ids = ids[ids > after[0]]
+
+        return ids.tolist()
+
+
+def fetch_candidates(fetch, candidate_ids: list[int], limit: int, chunk_size: int = CANDIDATE_CHUNK_SIZE) -> list:
+    """Collect up to `limit + 1` rows by re-checking ordered candidate ids against the database chunk by chunk.
+
+    `fetch(ids)` runs the page query restricted to `ids` and returns its rows
+    in page order.
+    """
+    rows = []
+    for start in range(0, len(candidate_ids), chunk_size):
+        rows.extend(fetch(candidate_ids[start:start + chunk_size]))
+        if len(rows) > limit:
+            break
+    return rows[:limit + 1]
+
+
+order_windows = OrderWindowIndex()
+
+
+def _rebuild() -> None:
+    with SessionLocal() as db:
+        order_windows.rebuild(db)
+
+
+async def rebuild_periodically() -> None:
+    """Build the order window index at startup, then rebuild it in a worker thread whenever it goes stale.
+
+    PostgreSQL answers window overlaps from its GiST index and never reads
+    the in-memory one.
+    """
+    if engine.dialect.name == 'postgresql':
+        return
+    while True:
+        if order_windows.stale():
+            try:
+                await asyncio.to_thread(_rebuild)
+            except Exception:
+                logger.exception('Could not rebuild the order window index')
+        await asyncio.sleep(order_windows.refresh_interval)
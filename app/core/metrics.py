@@ -0,0 +1,198 @@
+from bisect import bisect_left
+from time import perf_counter
+import threading
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Histogram:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * (buckets + 1)
+        self.total = 0.0
+        self.count = 0
+
+
+class _Shard:
+    """Metric values written by a single thread."""
+
+    def __init__(self):
+        self.thread = threading.current_thread()
+        self.counters: dict[tuple, float] = {}
+        self.histograms: dict[tuple, _Histogram] = {}
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms exported in Prometheus text format.
+
+    Every thread writes to its own shard, so recording a value is a plain
+    dict update with no lock. Shards are merged only when /metrics is
+    scraped. Gauges whose value lives elsewhere, like the connection pool,
+    are read through callbacks at scrape time.
+    """
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._descriptions: dict[str, tuple[str, str]] = {}
+        self._callbacks: dict[str, callable] = {}
+        self._local = threading.local()
+        self._shards: list[_Shard] = []
+        self._retired = _Shard()
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        self._descriptions[name] = (kind, help_text)
+
+    def add_gauge(self, name: str, help_text: str, callback) -> None:
+        """Register a gauge read at scrape time; `callback` returns a number or None to skip it."""
+        self.describe(name, 'gauge', help_text)
+        self._callbacks[name] = callback
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        counters = self._shard().counters
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        histograms = self._shard().histograms
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = _Histogram(len(self.buckets))
+        histogram.counts[bisect_left(self.buckets, value)] += 1
+        histogram.total += value
+        histogram.count += 1
+
+    def _collect(self) -> tuple[dict, dict]:
+        """Merge all shards, folding those of finished threads into one retired shard."""
+        with self._shards_lock:
+            finished = [shard for shard in self._shards if not shard.thread.is_alive()]
+            for shard in finished:
+                self._merge(shard, self._retired.counters, self._retired.histograms)
+            self._shards = [shard for shard in self._shards if shard.thread.is_alive()]
+            shards = [self._retired, *self._shards]
+
+            counters: dict[tuple, float] = {}
+            histograms: dict[tuple, _Histogram] = {}
+            for shard in shards:
+                self._merge(shard, counters, histograms)
+        return counters, histograms
+
+    def _merge(self, shard: _Shard, counters: dict, histograms: dict) -> None:
+        for key, amount in shard.counters.copy().items():
+            counters[key] = counters.get(key, 0) + amount
+        for key, histogram in shard.histograms.copy().items():
+            merged = histograms.get(key)
+            if merged is None:
+                merged = histograms[key] = _Histogram(len(self.buckets))
+            for index, count in enumerate(list(histogram.counts)):
+                merged.counts[index] += count
+            merged.total += histogram.total
+            merged.count += histogram.count
+
+    def value(self, name: str, **labels) -> float:
+        """Return the merged value of a counter, mostly useful in tests."""
+        counters, _ = self._collect()
+        return counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def render(self) -> str:
+        counters, histograms = self._collect()
+
+        lines = []
+        for name, (kind, help_text) in self._descriptions.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+            if name in self._callbacks:
+                value = self._callbacks[name]()
+                if value is not None:
+                    lines.append(f'{name} {value}')
+                continue
+
+            for (metric, labels), amount in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{_format_labels(labels)} {amount:g}')
+
+            for (metric, labels), histogram in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + ('+Inf',), histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{_format_labels(labels + (("le", bound),))} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {histogram.total:g}')
+                lines.append(f'{name}_count{_format_labels(labels)} {histogram.count}')
+
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+registry.describe('logitrack_http_request_duration_seconds', 'histogram', 'Request latency in seconds by route.')
+registry.describe('logitrack_http_requests_total', 'counter', 'Completed requests by route and status code.')
+registry.describe('logitrack_http_requests_in_flight', 'gauge', 'Requests currently being served.')
+
+
+def register_pool_gauges(engine, prefix: str = 'logitrack_db_pool') -> None:
+    """Export the connection pool's size, checked-out and overflow connections."""
+    pool = engine.pool
+    for suffix, method, help_text in (
+        ('size', 'size', 'Configured number of pooled connections.'),
+        ('checked_out', 'checkedout', 'Connections currently checked out of the pool.'),
+        ('overflow', 'overflow', 'Connections opened beyond the pool size.'),
+    ):
+        if hasattr(pool, method):
+            registry.add_gauge(f'{prefix}_{suffix}', help_text, getattr(pool, method))
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status codes and in-flight requests per route template."""
+
+    def __init__(self, app, metrics: MetricsRegistry = registry):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        started = perf_counter()
+        self.metrics.inc('logitrack_http_requests_in_flight')
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.metrics.inc('logitrack_http_requests_in_flight', -1)
+            route = scope.get('route')
+            labels = {
+                'method': scope['method'],
+                'route': getattr(route, 'path', 'unmatched'),
+            }
+            self.metrics.observe('logitrack_http_request_duration_seconds', perf_counter() - started, **labels)
+            self.metrics.inc('logitrack_http_requests_total', status=str(status_code), **labels)
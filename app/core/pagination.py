@@ -0,0 +1,84 @@
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from starlette import status
+from datetime import datetime
+from dotenv import load_dotenv
+import base64
+import json
+import os
+
+load_dotenv()
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 500))
+ORDERINGS = ('id', 'updated_at')
+
+
+def encode_cursor(ordering: str, row) -> str:
+    """Build an opaque cursor pointing just past the given row."""
+    if ordering == 'updated_at':
+        key = [ordering, row.updated_at.isoformat(), row.id]
+    else:
+        key = [ordering, row.id]
+    raw = json.dumps(key, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, ordering: str) -> list:
+    """Decode a cursor produced by encode_cursor for the same ordering."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if key[0] != ordering:
+            raise ValueError('cursor ordering mismatch')
+        if ordering == 'updated_at':
+            _, updated_at, row_id = key
+            return [datetime.fromisoformat(updated_at), int(row_id)]
+        _, row_id = key
+        return [int(row_id)]
+    except (ValueError, TypeError, IndexError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='The provided cursor is invalid.'
+        )
+
+
+def ordering_columns(model, ordering: str) -> tuple:
+    """Columns a page is sorted by; id breaks ties so the order is total."""
+    if ordering == 'updated_at':
+        return model.updated_at, model.id
+    return (model.id,)
+
+
+def keyset(query, model, ordering: str, cursor: str | None, limit: int):
+    """Restrict a Query or Select to the page that starts after `cursor`.
+
+    Rows are ordered by `(id)` or `(updated_at, id)` and the cursor is turned into
+    a range predicate on those columns, so every page is an index range scan of
+    `limit + 1` rows no matter how deep into the table it starts.
+    """
+    columns = ordering_columns(model, ordering)
+
+    if cursor is not None:
+        key = decode_cursor(cursor, ordering)
+        if len(columns) == 1:
+            query = query.filter(columns[0] > key[0])
+        else:
+            query = query.filter(tuple_(*columns) > tuple_(*key))
+
+    return query.order_by(*columns).limit(limit + 1)
+
+
+def split_page(rows: list, ordering: str, limit: int) -> tuple[list, str | None]:
+    """Trim the look-ahead row fetched by keyset and build the next cursor."""
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, encode_cursor(ordering, rows[-1])
+
+
+def paginate(query, model, ordering: str, cursor: str | None, limit: int) -> tuple[list, str | None]:
+    """Return one keyset page of `query` and the cursor for the next page."""
+    rows = keyset(query, model, ordering, cursor, limit).all()
+    return split_page(rows, ordering, limit)
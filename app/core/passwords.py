@@ -0,0 +1,149 @@
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from concurrent.futures import Future, ProcessPoolExecutor
+from starlette import status
+from dotenv import load_dotenv
+import asyncio
+import bcrypt
+import multiprocessing
+import os
+import threading
+import time
+
+load_dotenv()
+
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+PASSWORD_HASH_QUEUE_DEPTH = int(os.getenv('PASSWORD_HASH_QUEUE_DEPTH', 4 * PASSWORD_HASH_WORKERS))
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 0)) or None
+BCRYPT_TARGET_MS = float(os.getenv('BCRYPT_TARGET_MS', 250))
+MIN_BCRYPT_ROUNDS = 4
+MAX_BCRYPT_ROUNDS = 16
+
+_contexts: dict[int, CryptContext] = {}
+
+
+def _context(rounds: int) -> CryptContext:
+    # Pinning min and max to the same cost makes verify_and_update report every
+    # hash created with a different cost as needing an upgrade.
+    if rounds not in _contexts:
+        _contexts[rounds] = CryptContext(
+            schemes=['bcrypt'],
+            deprecated='auto',
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds
+        )
+    return _contexts[rounds]
+
+
+def _hash(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def _verify(password: str, hashed_password: str, rounds: int) -> tuple[bool, str | None]:
+    return _context(rounds).verify_and_update(password, hashed_password)
+
+
+def _time_hash(rounds: int) -> float:
+    started = time.perf_counter()
+    bcrypt.hashpw(b'calibration', bcrypt.gensalt(rounds))
+    return (time.perf_counter() - started) * 1000
+
+
+def calibrate_rounds(target_ms: float = BCRYPT_TARGET_MS, min_rounds: int = MIN_BCRYPT_ROUNDS,
+                     max_rounds: int = MAX_BCRYPT_ROUNDS) -> int:
+    """Return the highest bcrypt cost whose hash time on this machine stays within `target_ms`.
+
+    Each extra round doubles the work, so the search stops as soon as the next
+    cost would exceed the target; calibration takes about twice the target time.
+    """
+    rounds = min_rounds
+    elapsed = _time_hash(rounds)
+    while rounds < max_rounds and elapsed * 2 <= target_ms:
+        rounds += 1
+        elapsed = _time_hash(rounds)
+    return rounds
+
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded pool of worker processes.
+
+    At most `workers + queue_depth` hash operations may be running or waiting
+    at once. Further calls are rejected immediately with 503 instead of
+    queueing behind a login storm, and the CPU cost stays off the request
+    threads and the GIL. With `workers=0` hashing runs inline.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, queue_depth: int = PASSWORD_HASH_QUEUE_DEPTH,
+                 rounds: int | None = BCRYPT_ROUNDS, target_ms: float = BCRYPT_TARGET_MS):
+        self.workers = workers
+        self.target_ms = target_ms
+        self._rounds = rounds
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + queue_depth)
+        self._lock = threading.Lock()
+
+    @property
+    def rounds(self) -> int:
+        if self._rounds is None:
+            with self._lock:
+                if self._rounds is None:
+                    self._rounds = calibrate_rounds(self.target_ms)
+        return self._rounds
+
+    async def arounds(self) -> int:
+        """Return the bcrypt cost, calibrating on a worker thread so the event loop keeps running."""
+        if self._rounds is None:
+            return await asyncio.to_thread(lambda: self.rounds)
+        return self._rounds
+
+    def _submit(self, function, *args) -> Future:
+        if not self._slots.acquire(blocking=False):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail='The server is busy. Please try again shortly.',
+                headers={'Retry-After': '1'}
+            )
+
+        if self.workers == 0:
+            future = Future()
+            try:
+                future.set_result(function(*args))
+            except Exception as error:
+                future.set_exception(error)
+            finally:
+                self._slots.release()
+            return future
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+        future = self._executor.submit(function, *args)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def hash(self, password: str) -> str:
+        return self._submit(_hash, password, self.rounds).result()
+
+    def verify(self, password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """Check a password; the second item is a rehashed value when the stored cost is outdated."""
+        return self._submit(_verify, password, hashed_password, self.rounds).result()
+
+    async def ahash(self, password: str) -> str:
+        rounds = await self.arounds()
+        return await asyncio.wrap_future(self._submit(_hash, password, rounds))
+
+    async def averify(self, password: str, hashed_password: str) -> tuple[bool, str | None]:
+        rounds = await self.arounds()
+        return await asyncio.wrap_future(self._submit(_verify, password, hashed_password, rounds))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,57 @@
+from app.models import Order
+from app.core.cache import response_cache
+from app.core.stats import summary_rows_statement, adjust_summary, removed_rows
+from app.core.changes import log_changes
+from sqlalchemy import select, delete
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from dotenv import load_dotenv
+import logging
+import os
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+PURGE_BATCH_SIZE = int(os.getenv('PURGE_BATCH_SIZE', 5000))
+
+
+def purge_orders(db: Session, condition, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """Delete the orders matching `condition` in batches of `batch_size`, committing after each.
+
+    Each batch leaves the summary counts, change log and list caches in step,
+    so a purge that stops halfway is consistent and can simply be run again.
+    Returns the number of orders deleted.
+    """
+    purged = 0
+    while True:
+        order_ids = db.scalars(select(Order.id).where(condition).order_by(Order.id).limit(batch_size)).all()
+        if not order_ids:
+            return purged
+
+        batch = Order.id.in_(order_ids)
+        order_rows = db.execute(summary_rows_statement('orders', batch)).all()
+        adjust_summary(db, 'orders', removed_rows(order_rows))
+        db.execute(delete(Order).where(batch))
+        log_changes(db, 'orders', 'delete', order_ids)
+        db.commit()
+        response_cache.invalidate('orders', *(dict(row._mapping) for row in order_rows))
+        purged += len(order_ids)
+
+
+def run_purge(bind, purge, *args) -> None:
+    """Run `purge(db, *args)` in a session of its own, once the 202 response has been sent."""
+    try:
+        with Session(bind=bind, autoflush=False) as db:
+            purge(db, *args)
+    except Exception:
+        logger.exception('Background purge %s%r failed', purge.__name__, args)
+
+
+async def run_purge_async(bind, purge, *args) -> None:
+    """The run_purge counterpart for the async routers; `bind` is an AsyncEngine."""
+    try:
+        async with AsyncSession(bind=bind, autoflush=False) as db:
+            await db.run_sync(purge, *args)
+    except Exception:
+        logger.exception('Background purge %s%r failed', purge.__name__, args)
@@ -0,0 +1,108 @@
+from collections import Counter
+from contextvars import ContextVar
+from time import perf_counter
+from sqlalchemy import event
+from dotenv import load_dotenv
+import logging
+import os
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DEBUG = os.getenv('DEBUG', '').lower() in ('1', 'true', 'yes')
+EXPOSE_HEADERS = DEBUG
+REPEATED_QUERY_THRESHOLD = int(os.getenv('REPEATED_QUERY_THRESHOLD', 3))
+
+
+class QueryStats:
+    """Statements executed while serving one request."""
+
+    __slots__ = ('count', 'duration', 'statements')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter = Counter()
+
+    def repeated(self, threshold: int = REPEATED_QUERY_THRESHOLD) -> dict[str, int]:
+        """Statement texts run at least `threshold` times, whatever their parameters: the usual N+1 shape."""
+        return {statement: count for statement, count in self.statements.items() if count >= threshold}
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar('query_stats', default=None)
+
+
+def current_stats() -> QueryStats | None:
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault('query_started', []).append(perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    started = conn.info['query_started'].pop()
+    stats.count += 1
+    stats.duration += perf_counter() - started
+    stats.statements[statement] += 1
+
+
+def instrument_engine(engine) -> None:
+    """Count statements and database time per request on `engine` (a sync Engine)."""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware that attaches per-request query statistics.
+
+    When EXPOSE_HEADERS is on (DEBUG), responses carry X-DB-Query-Count,
+    X-DB-Time-Ms and, if any statement repeated REPEATED_QUERY_THRESHOLD or
+    more times, X-DB-Repeated-Queries. Every request is also logged with the
+    same fields, and repeated statements are logged as warnings.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_with_stats(message):
+            if message['type'] == 'http.response.start' and EXPOSE_HEADERS:
+                headers = list(message.get('headers', []))
+                headers.append((b'x-db-query-count', str(stats.count).encode()))
+                headers.append((b'x-db-time-ms', f'{stats.duration * 1000:.2f}'.encode()))
+                repeated = stats.repeated()
+                if repeated:
+                    headers.append((b'x-db-repeated-queries', str(sum(repeated.values())).encode()))
+                message = {**message, 'headers': headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current_stats.reset(token)
+            route = getattr(scope.get('route'), 'path', scope['path'])
+            logger.info(
+                'db stats for %s %s: %d queries in %.2f ms',
+                scope['method'], route, stats.count, stats.duration * 1000,
+                extra={'db_query_count': stats.count, 'db_time_ms': round(stats.duration * 1000, 2), 'route': route}
+            )
+            for statement, count in stats.repeated().items():
+                logger.warning(
+                    'possible N+1 in %s %s: statement ran %d times: %s',
+                    scope['method'], route, count, statement,
+                    extra={'db_repeated_count': count, 'route': route}
+                )
@@ -0,0 +1,77 @@
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+from starlette import status
+from datetime import datetime
+from app.schemas.base import format_datetime
+from collections import namedtuple
+from functools import lru_cache
+import orjson
+
+
+def response_columns(model, schema: type[BaseModel]) -> list:
+    """Return the columns of `model` backing `schema`, in the schema's field order."""
+    return [getattr(model, name) for name in schema.model_fields]
+
+
+def sparse_fields(schema: type[BaseModel], fields: str | None) -> tuple[str, ...]:
+    """Parse a comma-separated `fields` parameter into response field names, in the schema's order."""
+    if fields is None:
+        return tuple(schema.model_fields)
+
+    requested = {name.strip() for name in fields.split(',')} - {''}
+    unknown = requested - schema.model_fields.keys()
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}." if unknown else 'No fields were requested.'
+        )
+    return tuple(name for name in schema.model_fields if name in requested)
+
+
+def projection_columns(model, names: tuple[str, ...], *keys: str) -> list:
+    """Columns to select for `names`, then any `keys` the handler needs (cursor, ETag) that were not asked for.
+
+    Rendering zips rows with `names`, so the trailing key columns never reach
+    the response.
+    """
+    return [getattr(model, name) for name in dict.fromkeys((*names, *keys))]
+
+
+@lru_cache(maxsize=64)
+def _row_type(names: tuple[str, ...]):
+    return namedtuple('ProjectedRow', names)
+
+
+def project_rows(rows, columns: list) -> list:
+    """Narrow full rows (such as archived orders) to the shape of a projected column query."""
+    row_type = _row_type(tuple(column.key for column in columns))
+    return [row_type._make(getattr(row, name) for name in row_type._fields) for row in rows]
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return format_datetime(value)
+    raise TypeError
+
+
+def render_page(rows, fields, next_cursor: str | None, **extra) -> Response:
+    """Serialize a page of column rows with one orjson call.
+
+    Rows come straight from a column query, so no ORM objects or response
+    models are built per row. orjson hands only datetimes to the default
+    hook, and the output is byte-for-byte what the page's response model
+    would produce. `extra` adds page-level keys after next_cursor.
+    """
+    items = [dict(zip(fields, row)) for row in rows]
+    return render_json({'items': items, 'next_cursor': next_cursor, **extra})
+
+
+def render_row(row, fields) -> Response:
+    """Serialize a single column row the way render_page serializes each item."""
+    return render_json(dict(zip(fields, row)))
+
+
+def render_json(content) -> Response:
+    """Serialize plain dicts and lists with the API's datetime format."""
+    body = orjson.dumps(content, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    return Response(content=body, media_type='application/json')
@@ -0,0 +1,146 @@
+from app.models import Order, SummaryCount
+from app.core.intervals import window_overlap
+from fastapi import HTTPException
+from sqlalchemy import select, text, func
+from sqlalchemy.orm import Session
+from starlette import status
+from datetime import datetime
+from dotenv import load_dotenv
+import base64
+import json
+import os
+import re
+
+load_dotenv()
+
+SEARCH_SIMILARITY_THRESHOLD = float(os.getenv('SEARCH_SIMILARITY_THRESHOLD', 0.3))
+
+_DESTINATIONS = (
+    SummaryCount.entity == 'orders',
+    SummaryCount.dimension == 'destination',
+    SummaryCount.count > 0,
+)
+_FTS_CANDIDATES = text(
+    'SELECT summary_counts.value FROM order_destination_search '
+    'JOIN summary_counts ON summary_counts.rowid = order_destination_search.rowid '
+    "WHERE order_destination_search MATCH :query AND summary_counts.entity = 'orders' "
+    "AND summary_counts.dimension = 'destination' AND summary_counts.count > 0"
+)
+
+
+def trigrams(value: str) -> set[str]:
+    """Trigrams the way pg_trgm builds them: per lowercased word, padded with two spaces in front and one behind."""
+    return {
+        padded[index:index + 3]
+        for word in re.findall(r'\w+', value.lower())
+        for padded in (f'  {word} ',)
+        for index in range(len(padded) - 2)
+    }
+
+
+def similarity(left: str, right: str) -> float:
+    """Shared trigrams over all trigrams, as pg_trgm's similarity()."""
+    left, right = trigrams(left), trigrams(right)
+    return len(left & right) / len(left | right) if left and right else 0.0
+
+
+def _fts_query(query: str) -> str:
+    """OR together the query's trigrams so one typo only costs the trigrams it touches."""
+    query = query.lower()
+    grams = {query[index:index + 3] for index in range(len(query) - 2)}
+    return ' OR '.join('"' + gram.replace('"', '""') + '"' for gram in sorted(grams))
+
+
+def _candidates(db: Session, query: str) -> list[str]:
+    dialect_name = db.get_bind().dialect.name
+    if dialect_name == 'sqlite' and len(query) >= 3:
+        return list(db.scalars(_FTS_CANDIDATES, {'query': _fts_query(query)}))
+    if dialect_name == 'postgresql':
+        # % compares against pg_trgm.similarity_threshold; set it for this transaction so the index applies ours.
+        db.execute(select(func.set_config('pg_trgm.similarity_threshold', str(SEARCH_SIMILARITY_THRESHOLD), True)))
+        return list(db.scalars(
+            select(SummaryCount.value)
+            .where(*_DESTINATIONS, SummaryCount.value.op('%')(query) | SummaryCount.value.icontains(query, autoescape=True))
+        ))
+    # Queries too short for trigrams: the distinct destinations are few, so filter them all.
+    return list(db.scalars(
+        select(SummaryCount.value).where(*_DESTINATIONS, SummaryCount.value.icontains(query, autoescape=True))
+    ))
+
+
+def rank_destinations(db: Session, query: str) -> list[tuple[int, float, str]]:
+    """Rank the destinations matching `query`: prefix matches, then substrings, then typos by similarity.
+
+    The index narrows the distinct destinations in summary_counts to those
+    sharing trigrams with the query in one query; they are then ranked here
+    so SQLite and PostgreSQL order results the same way. Every match is
+    kept, since pages walk the whole ranking. Returns (tier, -similarity,
+    destination) keys, best first.
+    """
+    folded = query.casefold()
+    ranked = []
+    for destination in _candidates(db, query):
+        name = destination.casefold()
+        score = similarity(folded, name)
+        tier = 0 if name.startswith(folded) else 1 if folded in name else 2
+        if tier < 2 or score >= SEARCH_SIMILARITY_THRESHOLD:
+            ranked.append((tier, -score, destination))
+    return sorted(ranked)
+
+
+def match_destinations(db: Session, query: str) -> list[str]:
+    """The destinations matching `query`, best first."""
+    return [destination for *_, destination in rank_destinations(db, query)]
+
+
+def encode_search_cursor(key: tuple[int, float, str], row) -> str:
+    raw = json.dumps(['rank', *key, row.id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_search_cursor(cursor: str) -> tuple[tuple[int, float, str], int]:
+    """Return the rank key of the destination the cursor stopped in and the last id seen there."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        ordering, tier, score, destination, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if ordering != 'rank' or not isinstance(destination, str):
+            raise ValueError('cursor ordering mismatch')
+        return (int(tier), float(score), destination), int(row_id)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='The provided cursor is invalid.'
+        )
+
+
+def search_page(db: Session, query: str, columns: list, filters: list, window_from: datetime | None,
+                window_to: datetime | None, cursor: str | None, limit: int) -> tuple[list, str | None]:
+    """Fetch one page of rows whose destination matches `query`, grouped by destination rank and then by id.
+
+    Each destination is read as an index range on (destination, id), so a
+    page costs one query per destination it spans. The cursor holds the rank
+    key of the destination it stopped in, not its position: the ranking is
+    rebuilt on every request, and a page resumes at the first destination
+    ranking after that key even if the destination itself has dropped out.
+    """
+    if window_from is not None or window_to is not None:
+        filters = [*filters, window_overlap(db.get_bind().dialect.name, window_from, window_to)]
+    ranked = rank_destinations(db, query)
+    last_key, after_id = decode_search_cursor(cursor) if cursor is not None else (None, None)
+    if last_key is not None:
+        ranked = [key for key in ranked if key >= last_key]
+
+    rows = []
+    for key in ranked:
+        statement = select(*columns).where(Order.destination == key[2], *filters)
+        if key == last_key:
+            statement = statement.where(Order.id > after_id)
+        destination_rows = db.execute(statement.order_by(Order.id).limit(limit + 1 - len(rows))).all()
+        rows.extend((key, row) for row in destination_rows)
+        if len(rows) > limit:
+            break
+
+    if len(rows) <= limit:
+        return [row for _, row in rows], None
+    rows = rows[:limit]
+    return [row for _, row in rows], encode_search_cursor(*rows[-1])
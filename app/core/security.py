@@ -1,47 +1,182 @@
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
-from app.models import User
-from app.database import db_dependency
+from app.models import User, TokenRevocation
+from app.schemas.user import CurrentUser
+from app.database import SessionLocal
 from datetime import datetime, timedelta, timezone
 from passlib.context import CryptContext
 from jose import jwt, JWTError
+from sqlalchemy import select, delete
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
 from typing import Annotated
 from starlette import status
 from dotenv import load_dotenv
+import logging
 import os
+import threading
+import time
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 SECRET_KEY = os.getenv('SECRET_KEY')
 ALGORITHM = 'HS256'
+ACCESS_TOKEN_EXPIRES = timedelta(minutes=60)
+TOKEN_VERSION_REFRESH_SECONDS = float(os.getenv('TOKEN_VERSION_REFRESH_SECONDS', 5))
 
 bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl='auth/token')
 
 
-def create_access_token(username: str, user_id: int, expiry_time: timedelta) -> str:
+class TokenVersionTable:
+    """In-process mirror of the token_revocations table.
+
+    Maps user IDs to the lowest token version that is still accepted, or to None
+    once the account is deleted. Users without an entry have no revocation that
+    could still match an unexpired token. The table is refreshed incrementally,
+    reading only revocations from the last few seconds, at most once per
+    `refresh_interval`, so authorization does not query the database per
+    request. Local revocations are recorded right after commit; other workers
+    pick them up on their next refresh.
+    """
+
+    overlap = timedelta(seconds=30)
+
+    def __init__(self, session_factory, refresh_interval: float = TOKEN_VERSION_REFRESH_SECONDS,
+                 retention: timedelta = ACCESS_TOKEN_EXPIRES):
+        self.session_factory = session_factory
+        self.refresh_interval = refresh_interval
+        self.retention = retention
+        self._versions: dict[int, tuple[int | None, datetime]] = {}
+        self._since = None
+        self._next_refresh = 0.0
+        self._next_purge = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, user_id: int, token_version: int | None) -> None:
+        """Remember a revocation that has just been committed."""
+        current = self._versions.get(user_id)
+        if current is not None and (current[0] is None or (token_version is not None and current[0] > token_version)):
+            return
+        self._versions[user_id] = (token_version, datetime.now(timezone.utc))
+
+    def clear(self) -> None:
+        """Forget every revocation, e.g. after the database has been reset."""
+        self._versions.clear()
+        self._since = None
+
+    def is_current(self, user_id: int, token_version: int) -> bool:
+        """Return whether a token carrying `token_version` is still valid for the user."""
+        if time.monotonic() >= self._next_refresh:
+            self._try_refresh()
+
+        entry = self._versions.get(user_id)
+        if entry is None:
+            return True
+
+        current_version, _ = entry
+        return current_version is not None and token_version >= current_version
+
+    def refresh(self, db: Session) -> None:
+        """Load recently committed revocations and drop entries older than the token lifetime."""
+        now = datetime.now(timezone.utc)
+        since = self._since or now - self.retention
+        rows = db.execute(
+            select(TokenRevocation.user_id, TokenRevocation.token_version)
+            .where(TokenRevocation.revoked_at >= since.replace(tzinfo=None))
+            .order_by(TokenRevocation.id)
+        ).all()
+
+        for user_id, token_version in rows:
+            self.record(user_id, token_version)
+
+        # Re-read a short overlap next time so rows committed late by a
+        # concurrent transaction are not missed.
+        self._since = now - self.overlap
+
+        # Tokens issued before a revocation expire within the token lifetime, so
+        # older entries can no longer reject anything.
+        cutoff = now - self.retention
+        for user_id in [user_id for user_id, (_, recorded_at) in self._versions.items() if recorded_at < cutoff]:
+            del self._versions[user_id]
+
+    def _try_refresh(self) -> None:
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            with self.session_factory() as db:
+                self.refresh(db)
+                if time.monotonic() >= self._next_purge:
+                    purge_expired_revocations(db)
+                    db.commit()
+                    self._next_purge = time.monotonic() + self.retention.total_seconds()
+        except SQLAlchemyError:
+            logger.exception('Could not refresh the token version table')
+        finally:
+            self._next_refresh = time.monotonic() + self.refresh_interval
+            self._lock.release()
+
+
+token_versions = TokenVersionTable(SessionLocal)
+
+
+def create_access_token(username: str, user_id: int, expiry_time: timedelta, role: str = None,
+                        email: str = None, token_version: int = 0) -> str:
     expires = datetime.now(timezone.utc) + expiry_time
     encode = {
         'sub': username,
         'id': user_id,
+        'email': email,
+        'role': role,
+        'ver': token_version,
         'exp': expires,
     }
     return jwt.encode(encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def get_current_user(db: db_dependency, token: Annotated[str, Depends(oauth2_bearer)]) -> User:
+def revoke_tokens(db, user: User, deleted: bool = False) -> int | None:
+    """Invalidate every token issued to `user` so far, in the caller's transaction.
+
+    Returns the new minimum token version (None for a deleted account). Pass it
+    to `token_versions.record` once the transaction has been committed.
+    """
+    token_version = None
+    if not deleted:
+        user.token_version = (user.token_version or 0) + 1
+        token_version = user.token_version
+
+    db.add(TokenRevocation(user_id=user.id, token_version=token_version))
+    return token_version
+
+
+def purge_expired_revocations(db: Session) -> int:
+    """Delete revocations older than the token lifetime; they can no longer match a live token."""
+    cutoff = (datetime.now(timezone.utc) - ACCESS_TOKEN_EXPIRES).replace(tzinfo=None)
+    result = db.execute(delete(TokenRevocation).where(TokenRevocation.revoked_at < cutoff))
+    return result.rowcount
+
+
+def get_current_user(token: Annotated[str, Depends(oauth2_bearer)]) -> CurrentUser:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        current_user = CurrentUser(
+            id=payload['id'],
+            username=payload['sub'],
+            email=payload['email'],
+            role=payload['role'],
+            token_version=payload['ver'],
+        )
 
-    except JWTError:
+    except (JWTError, KeyError, ValueError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='Authentication failed'
         )
-    current_user = db.get(User, payload.get('id'))
-    if current_user is None:
+    if not token_versions.is_current(current_user.id, current_user.token_version):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='Authentication failed'
         )
-    return current_user
\ No newline at end of file
+    return current_user
@@ -0,0 +1,132 @@
+from app.models import Order, Vehicle, SummaryCount
+from app.database import SessionLocal
+from sqlalchemy import select, delete, func, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from collections import Counter
+from dotenv import load_dotenv
+from typing import Iterable
+import asyncio
+import logging
+import os
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+STATS_RECOUNT_SECONDS = float(os.getenv('STATS_RECOUNT_SECONDS', 3600))
+SUMMARY_DIMENSIONS = {
+    'orders': (Order, ('status', 'size', 'destination')),
+    'vehicles': (Vehicle, ('status', 'type')),
+}
+_UPSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def adjust_summary(db: Session, entity: str, rows: Iterable[tuple[dict, int]]) -> None:
+    """Add `weight` to the counters of each row's dimension values, in the caller's transaction.
+
+    Rows are column-value mappings; pass a negative weight for rows that are
+    removed or changed away from a value. The upserts go out as one
+    executemany in key order, so concurrent writers lock the counter rows in
+    the same sequence.
+    """
+    _, dimensions = SUMMARY_DIMENSIONS[entity]
+    deltas = Counter()
+    for row, weight in rows:
+        for dimension in dimensions:
+            deltas[(dimension, str(row[dimension]))] += weight
+
+    changes = [
+        {'entity': entity, 'dimension': dimension, 'value': value, 'count': delta}
+        for (dimension, value), delta in sorted(deltas.items()) if delta
+    ]
+    if not changes:
+        return
+
+    upsert = _UPSERTS.get(db.get_bind().dialect.name)
+    if upsert is not None:
+        statement = upsert(SummaryCount)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=['entity', 'dimension', 'value'],
+            set_={'count': SummaryCount.count + statement.excluded['count']}
+        ), changes)
+        return
+
+    for change in changes:
+        counter = db.get(SummaryCount, (entity, change['dimension'], change['value']))
+        if counter is None:
+            db.add(SummaryCount(**change))
+        else:
+            counter.count += change['count']
+
+
+def record_change(db: Session, entity: str, before: dict | None, after: dict | None) -> None:
+    """Move one row's counts from its old values to its new ones (None for an insert or delete)."""
+    rows = []
+    if before is not None:
+        rows.append((before, -1))
+    if after is not None:
+        rows.append((after, 1))
+    adjust_summary(db, entity, rows)
+
+
+def summary_rows_statement(entity: str, *conditions):
+    """Select each distinct combination of dimension values matching `conditions`, with its row count."""
+    model, dimensions = SUMMARY_DIMENSIONS[entity]
+    columns = [getattr(model, dimension) for dimension in dimensions]
+    return select(*columns, func.count()).where(*conditions).group_by(*columns)
+
+
+def removed_rows(rows) -> list[tuple[dict, int]]:
+    """Turn summary_rows_statement results into negative adjustments for rows about to be deleted."""
+    return [(dict(row._mapping), -row[-1]) for row in rows]
+
+
+def recount_summary(db: Session) -> None:
+    """Rebuild every counter from the source tables, correcting any drift; the caller commits."""
+    db.execute(delete(SummaryCount))
+    for entity, (model, dimensions) in SUMMARY_DIMENSIONS.items():
+        for dimension in dimensions:
+            column = getattr(model, dimension)
+            counts = db.execute(select(column, func.count()).group_by(column)).all()
+            if counts:
+                db.execute(insert(SummaryCount), [
+                    {'entity': entity, 'dimension': dimension, 'value': str(value), 'count': count}
+                    for value, count in counts
+                ])
+
+
+def read_summary(db: Session) -> dict:
+    """Return {entity: {'total': n, dimension: {value: count}}} for every tracked entity."""
+    summary = {
+        entity: {'total': 0, **{dimension: {} for dimension in dimensions}}
+        for entity, (_, dimensions) in SUMMARY_DIMENSIONS.items()
+    }
+    for entity, dimension, value, count in db.execute(
+        select(SummaryCount.entity, SummaryCount.dimension, SummaryCount.value, SummaryCount.count)
+    ):
+        if count:
+            summary[entity][dimension][value] = count
+
+    for entity, (_, dimensions) in SUMMARY_DIMENSIONS.items():
+        summary[entity]['total'] = sum(summary[entity][dimensions[0]].values())
+    return summary
+
+
+def _recount() -> None:
+    with SessionLocal() as db:
+        recount_summary(db)
+        db.commit()
+
+
+async def recount_periodically(interval: float = STATS_RECOUNT_SECONDS) -> None:
+    """Recount the summary table at startup and then every `interval` seconds."""
+    while True:
+        try:
+            await asyncio.to_thread(_recount)
+        except Exception:
+            logger.exception('Could not recount the summary table')
+        await asyncio.sleep(interval)
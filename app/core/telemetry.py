@@ -0,0 +1,249 @@
+from app.core.metrics import registry
+from app.database import SessionLocal
+from app.models import Vehicle, VehiclePosition, utc_now
+from sqlalchemy import select, insert, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from contextlib import suppress
+from dotenv import load_dotenv
+from datetime import datetime, timedelta
+from typing import NamedTuple, Iterable
+import asyncio
+import logging
+import os
+import threading
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+TELEMETRY_BUFFER_SIZE = int(os.getenv('TELEMETRY_BUFFER_SIZE', 200_000))
+TELEMETRY_BATCH_SIZE = int(os.getenv('TELEMETRY_BATCH_SIZE', 10_000))
+TELEMETRY_FLUSH_SECONDS = float(os.getenv('TELEMETRY_FLUSH_SECONDS', 1))
+FLUSH_INTERVAL = timedelta(seconds=TELEMETRY_FLUSH_SECONDS)
+
+# A Core insert on the table is a plain executemany; insert(VehiclePosition)
+# would take the ORM bulk path, which costs about a third of the throughput.
+POSITIONS_INSERT = insert(VehiclePosition.__table__)
+# Any constant works; it only has to be the same for every worker.
+TELEMETRY_LOCK_KEY = 7_300_418
+
+registry.describe('logitrack_telemetry_pings_total', 'counter', 'Telemetry pings by outcome: accepted, written or dropped.')
+
+
+class Ping(NamedTuple):
+    vehicle_id: int
+    recorded_at: datetime
+    latitude: float
+    longitude: float
+    speed_kmh: float | None
+    heading: float | None
+
+
+class TelemetryBuffer:
+    """Per-worker ring of pings waiting to be written, and the latest position of every vehicle seen.
+
+    Ingesting only appends to a preallocated ring under a lock; the database
+    sees the pings later, `batch_size` rows per INSERT. When writes fall so far
+    behind that the ring is full, the oldest unwritten pings are overwritten
+    and counted as dropped rather than blocking ingestion. The latest position
+    per vehicle is a dict lookup, kept up to date as pings arrive whether or
+    not they have been written yet.
+    """
+
+    def __init__(self, capacity: int = TELEMETRY_BUFFER_SIZE, batch_size: int = TELEMETRY_BATCH_SIZE):
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self._slots: list[Ping | None] = [None] * capacity
+        self._start = 0
+        self._size = 0
+        self._latest: dict[int, Ping] = {}
+        self._lock = threading.Lock()
+        self._wakeup: tuple[asyncio.AbstractEventLoop, asyncio.Event] | None = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, pings: Iterable[Ping]) -> int:
+        """Queue pings for writing and update the latest positions; returns how many older pings were overwritten."""
+        overwritten = 0
+        with self._lock:
+            latest = self._latest
+            for ping in pings:
+                end = self._start + self._size
+                self._slots[end - self.capacity if end >= self.capacity else end] = ping
+                if self._size == self.capacity:
+                    self._start = self._start + 1 if self._start + 1 < self.capacity else 0
+                    overwritten += 1
+                else:
+                    self._size += 1
+                current = latest.get(ping.vehicle_id)
+                if current is None or ping.recorded_at >= current.recorded_at:
+                    latest[ping.vehicle_id] = ping
+            ready = self._size >= self.batch_size
+            wakeup = self._wakeup
+
+        if overwritten:
+            registry.inc('logitrack_telemetry_pings_total', overwritten, result='dropped')
+        if ready and wakeup is not None:
+            loop, event = wakeup
+            with suppress(RuntimeError):
+                loop.call_soon_threadsafe(event.set)
+        return overwritten
+
+    def take(self, limit: int) -> list[Ping]:
+        """Remove and return up to `limit` of the oldest queued pings."""
+        with self._lock:
+            count = min(limit, self._size)
+            end = self._start + count
+            if end <= self.capacity:
+                batch = self._slots[self._start:end]
+            else:
+                batch = self._slots[self._start:] + self._slots[:end - self.capacity]
+            self._start = end % self.capacity
+            self._size -= count
+        return batch
+
+    def requeue(self, batch: list[Ping]) -> int:
+        """Put a batch taken by `take` back at the head of the ring, after a write that failed.
+
+        Pings that no longer fit because the ring filled up meanwhile are the
+        oldest; they are dropped, as `add` would have. Returns how many.
+        """
+        with self._lock:
+            dropped = max(0, len(batch) - (self.capacity - self._size))
+            batch = batch[dropped:]
+            self._start = (self._start - len(batch)) % self.capacity
+            for offset, ping in enumerate(batch):
+                index = self._start + offset
+                self._slots[index - self.capacity if index >= self.capacity else index] = ping
+            self._size += len(batch)
+        if dropped:
+            registry.inc('logitrack_telemetry_pings_total', dropped, result='dropped')
+        return dropped
+
+    def latest(self, vehicle_id: int) -> Ping | None:
+        return self._latest.get(vehicle_id)
+
+    def current_position(self, db: Session, vehicle_id: int):
+        """The newest known position of a vehicle, from the ring's latest positions or the database.
+
+        Each worker only sees the pings it ingested itself; the others reach
+        the database within a flush interval. A ping newer than that is served
+        as is; an older one is compared with the newest stored row.
+        """
+        position = self._latest.get(vehicle_id)
+        if position is not None and position.recorded_at >= utc_now().replace(tzinfo=None) - FLUSH_INTERVAL:
+            return position
+        stored = stored_position(db, vehicle_id)
+        if stored is not None and (position is None or stored.recorded_at > position.recorded_at):
+            return stored
+        return position
+
+    def forget(self, vehicle_ids: Iterable[int]) -> None:
+        """Drop the latest positions of vehicles whose pings were rejected because they do not exist."""
+        with self._lock:
+            for vehicle_id in vehicle_ids:
+                self._latest.pop(vehicle_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._slots = [None] * self.capacity
+            self._start = 0
+            self._size = 0
+            self._latest.clear()
+
+    async def wait(self, timeout: float) -> None:
+        """Sleep for `timeout` seconds, or until a full batch is waiting."""
+        event = asyncio.Event()
+        self._wakeup = (asyncio.get_running_loop(), event)
+        if self._size >= self.batch_size:
+            return
+        with suppress(TimeoutError):
+            await asyncio.wait_for(event.wait(), timeout)
+
+    def flush(self, db: Session) -> int:
+        """Write every queued ping in INSERTs of `batch_size` rows, committing each; returns the rows written.
+
+        A batch naming a vehicle that no longer exists fails its foreign key;
+        it is retried without the pings of missing vehicles, which are dropped.
+        Any other failure, such as a lost connection, puts the batch back in
+        the ring for the next flush and re-raises.
+        """
+        written = 0
+        while batch := self.take(self.batch_size):
+            try:
+                written += self._write(db, batch)
+            except Exception:
+                db.rollback()
+                self.requeue(batch)
+                raise
+        return written
+
+    def _write(self, db: Session, batch: list[Ping]) -> int:
+        try:
+            _insert(db, batch)
+        except IntegrityError:
+            db.rollback()
+            known = set(db.scalars(select(Vehicle.id).where(Vehicle.id.in_({ping.vehicle_id for ping in batch}))))
+            kept = [ping for ping in batch if ping.vehicle_id in known]
+            self.forget({ping.vehicle_id for ping in batch} - known)
+            registry.inc('logitrack_telemetry_pings_total', len(batch) - len(kept), result='dropped')
+            if not kept:
+                return 0
+            _insert(db, kept)
+            batch = kept
+        registry.inc('logitrack_telemetry_pings_total', len(batch), result='written')
+        return len(batch)
+
+
+def _insert(db: Session, pings: list[Ping]) -> None:
+    """Insert and commit one batch of pings.
+
+    Compaction rolls raw positions up in id order behind a watermark, so
+    ids must become visible in order. SQLite runs one writer at a time; on
+    PostgreSQL, workers take a transaction-level advisory lock so a batch
+    holding lower ids cannot commit after one holding higher ids.
+    """
+    if db.get_bind().dialect.name == 'postgresql':
+        db.execute(select(func.pg_advisory_xact_lock(TELEMETRY_LOCK_KEY)))
+    db.execute(POSITIONS_INSERT, [ping._asdict() for ping in pings])
+    db.commit()
+
+
+telemetry_buffer = TelemetryBuffer()
+registry.add_gauge('logitrack_telemetry_buffered_pings', 'Pings waiting to be written.', lambda: len(telemetry_buffer))
+
+
+def stored_position(db: Session, vehicle_id: int):
+    """The newest written position of a vehicle."""
+    return db.execute(
+        select(VehiclePosition.vehicle_id, VehiclePosition.recorded_at, VehiclePosition.latitude,
+               VehiclePosition.longitude, VehiclePosition.speed_kmh, VehiclePosition.heading)
+        .where(VehiclePosition.vehicle_id == vehicle_id)
+        .order_by(VehiclePosition.recorded_at.desc())
+        .limit(1)
+    ).first()
+
+
+def _flush() -> None:
+    with SessionLocal() as db:
+        telemetry_buffer.flush(db)
+
+
+async def flush_periodically(interval: float = TELEMETRY_FLUSH_SECONDS) -> None:
+    """Write buffered pings every `interval` seconds, or as soon as a full batch is waiting, and once more on shutdown."""
+    try:
+        while True:
+            await telemetry_buffer.wait(interval)
+            try:
+                await asyncio.to_thread(_flush)
+            except Exception:
+                logger.exception('Could not write telemetry')
+                # The batch is back in the ring; wait before retrying rather than spinning on a full batch.
+                await asyncio.sleep(interval)
+    finally:
+        try:
+            await asyncio.to_thread(_flush)
+        except Exception:
+            logger.exception('Could not write telemetry on shutdown')
@@ -1,7 +1,8 @@
 import os
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url, event
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from typing import Annotated
 from fastapi import Depends
@@ -10,13 +11,52 @@ from fastapi import Depends
 load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv('DATABASE_URL')
+DATABASE_MODE = os.getenv('DATABASE_MODE', 'sync')
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+
+def to_async_url(url: str) -> str:
+    """Swap the driver of a sync database URL for its asyncio counterpart."""
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+
+def enable_foreign_keys(engine) -> None:
+    """Have SQLite enforce foreign keys on every connection of `engine` (a sync Engine); it does not by default.
+
+    Writes rely on the constraints instead of checking referenced rows first.
+    """
+    if engine.dialect.name == 'sqlite' and not event.contains(engine, 'connect', _enable_sqlite_foreign_keys):
+        event.listen(engine, 'connect', _enable_sqlite_foreign_keys)
+
 
 engine = create_engine(SQLALCHEMY_DATABASE_URL)
+enable_foreign_keys(engine)
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
     bind=engine
     )
+
+async_engine = None
+if DATABASE_MODE == 'async':
+    async_engine = create_async_engine(os.getenv('ASYNC_DATABASE_URL') or to_async_url(SQLALCHEMY_DATABASE_URL))
+    enable_foreign_keys(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(
+    autoflush=False,
+    expire_on_commit=False,
+    bind=async_engine
+    )
 Base = declarative_base()
 
 def get_db() -> Session:
@@ -26,4 +66,10 @@ def get_db() -> Session:
     finally:
         db.close()
 
-db_dependency = Annotated[Session, Depends(get_db)]
\ No newline at end of file
+
+async def get_async_db() -> AsyncSession:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+db_dependency = Annotated[Session, Depends(get_db)]
+async_db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
@@ -1,15 +1,84 @@
-from fastapi import FastAPI
-from app.database import engine
+from fastapi import FastAPI, APIRouter
+from fastapi.responses import ORJSONResponse
+from app.database import engine, async_engine, DATABASE_MODE
 from app.models import Base
-from app.routers import auth, vehicles, users, orders
+from app.core.metrics import MetricsMiddleware, register_pool_gauges
+from app.core.querystats import QueryStatsMiddleware, instrument_engine
+from app.core.stats import recount_periodically
+from app.core.changes import purge_periodically
+from app.core.archive import archive_periodically
+from app.core.telemetry import flush_periodically
+from app.core.downsampling import compact_periodically
+from app.core.intervals import rebuild_periodically
+from app.core.passwords import password_hasher
+from app.routers import auth, vehicles, users, orders, dispatch, stats, stream, changes, metrics, telemetry
+from app.routers.aio import auth as aio_auth, users as aio_users, vehicles as aio_vehicles, orders as aio_orders
+from contextlib import asynccontextmanager, suppress
+import asyncio
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = [
+        asyncio.create_task(recount_periodically()),
+        asyncio.create_task(purge_periodically()),
+        asyncio.create_task(archive_periodically()),
+        asyncio.create_task(flush_periodically()),
+        asyncio.create_task(compact_periodically()),
+        asyncio.create_task(rebuild_periodically()),
+        asyncio.create_task(password_hasher.arounds()),
+    ]
+    yield
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        with suppress(asyncio.CancelledError):
+            await task
+
+
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 Base.metadata.create_all(bind=engine)
 
-app.include_router(auth.router)
-app.include_router(users.router)
-app.include_router(vehicles.router)
-app.include_router(orders.router)
+instrument_engine(engine)
+register_pool_gauges(engine)
+if async_engine is not None:
+    instrument_engine(async_engine.sync_engine)
+    register_pool_gauges(async_engine.sync_engine, prefix='logitrack_async_db_pool')
+
+
+def select_routers(mode: str) -> list[APIRouter]:
+    """Return the routers for the configured database mode.
+
+    In async mode every route that has an async implementation in app.routers.aio
+    replaces its sync counterpart in place, so route order is preserved and the
+    remaining sync-only routes (export, bulk) keep working next to them.
+    """
+    routers = [auth.router, users.router, vehicles.router, orders.router]
+    if mode != 'async':
+        return routers
+
+    overrides = {
+        (route.path, frozenset(route.methods)): route
+        for async_router in (aio_auth.router, aio_users.router, aio_vehicles.router, aio_orders.router)
+        for route in async_router.routes
+    }
+    selected = []
+    for router in routers:
+        merged = APIRouter()
+        merged.routes.extend(overrides.get((route.path, frozenset(route.methods)), route) for route in router.routes)
+        selected.append(merged)
+
+    return selected
+
 
+for router in select_routers(DATABASE_MODE):
+    app.include_router(router)
+app.include_router(dispatch.router)
+app.include_router(stats.router)
+app.include_router(stream.router)
+app.include_router(telemetry.router)
+app.include_router(changes.router)
+app.include_router(metrics.router)
@@ -1,28 +1,34 @@
 from sqlalchemy.orm import relationship
 from app.database import Base
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, CheckConstraint, UniqueConstraint, Enum, Boolean
+from sqlalchemy import Column, Integer, BigInteger, Float, String, Text, ForeignKey, DateTime, CheckConstraint, UniqueConstraint, Enum, Boolean, Index, func
+from sqlalchemy import event, DDL
 from datetime import datetime, timezone
 
 
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
 
 class User(Base):
     __tablename__ = 'users'
     id = Column(Integer, primary_key=True, index=True, nullable=False)
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utc_now)
     username = Column(String, nullable=False, unique=True)
     email = Column(String, nullable=False, unique=True)
     role = Column(Enum('admin', 'driver', name='role_name'), nullable=False)
     hashed_password = Column(String, nullable=False)
+    token_version = Column(Integer, nullable=False, default=0, server_default='0')
 
-    vehicles = relationship('Vehicle', back_populates='user', cascade='all, delete')
+    # passive_deletes leaves child rows to ON DELETE CASCADE instead of loading and deleting them one by one.
+    vehicles = relationship('Vehicle', back_populates='user', cascade='all, delete', passive_deletes=True)
 
 
 class Vehicle(Base):
     __tablename__ = 'vehicles'
 
     id = Column(Integer, primary_key=True, index=True, nullable=False)
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utc_now)
+    updated_at = Column(DateTime, default=utc_now, onupdate=utc_now)
     license_plate = Column(String(15), nullable=False)
     type = Column(Enum('motorcycle', 'sedan', 'pickup', 'van', 'truck', name='vehicle_type'))
     capacity_kg = Column(Integer, nullable=False)
@@ -30,7 +36,15 @@ class Vehicle(Base):
     driver_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), index=True, nullable=False)
 
     user = relationship('User', back_populates='vehicles')
-    orders = relationship('Order', back_populates='vehicle', cascade='all, delete')
+    orders = relationship('Order', back_populates='vehicle', cascade='all, delete', passive_deletes=True)
+
+    __table_args__ = (
+        Index('ix_vehicles_updated_at_id', 'updated_at', 'id'),
+        Index('ux_vehicles_license_plate', 'license_plate', unique=True),
+        Index('ix_vehicles_status_id', 'status', 'id'),
+        Index('ix_vehicles_type_id', 'type', 'id'),
+        Index('ix_vehicles_capacity_kg_id', 'capacity_kg', 'id'),
+    )
 
 
 
@@ -38,8 +52,8 @@ class Order(Base):
     __tablename__ = 'orders'
 
     id = Column(Integer, primary_key=True, index=True, nullable=False)
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utc_now)
+    updated_at = Column(DateTime, default=utc_now, onupdate=utc_now)
     destination = Column(String, nullable=False)
     size = Column(Enum('xs', 's', 'm', 'l', 'xl', name='package_size'), nullable=False)
     priority = Column(Boolean, nullable=False)
@@ -48,4 +62,177 @@ class Order(Base):
     status = Column(Enum('pending', 'in_transit', 'completed', 'failed', name='delivery_status'), nullable=False)
     vehicle_id = Column(Integer, ForeignKey('vehicles.id', ondelete='CASCADE'), index=True, nullable=True)
 
-    vehicle = relationship('Vehicle', back_populates='orders')
\ No newline at end of file
+    vehicle = relationship('Vehicle', back_populates='orders')
+
+    __table_args__ = (
+        Index('ix_orders_updated_at_id', 'updated_at', 'id'),
+        Index('ix_orders_status_id', 'status', 'id'),
+        Index('ix_orders_size_id', 'size', 'id'),
+        Index('ix_orders_destination_status_id', 'destination', 'status', 'id'),
+        Index('ix_orders_destination_id', 'destination', 'id'),
+        Index('ix_orders_delivery_window_end_id', 'delivery_window_end', 'id'),
+        Index(
+            'ix_orders_delivery_window',
+            func.tsrange(delivery_window_start, delivery_window_end),
+            postgresql_using='gist'
+        ).ddl_if(dialect='postgresql'),
+        # Archived orders keep their ids, so a new order must never get one back.
+        {'sqlite_autoincrement': True},
+    )
+
+
+class TokenRevocation(Base):
+    __tablename__ = 'token_revocations'
+
+    id = Column(Integer, primary_key=True, index=True, nullable=False)
+    revoked_at = Column(DateTime, default=utc_now, index=True, nullable=False)
+    user_id = Column(Integer, nullable=False)
+    token_version = Column(Integer, nullable=True)
+
+
+class SummaryCount(Base):
+    __tablename__ = 'summary_counts'
+
+    entity = Column(String(20), primary_key=True)
+    dimension = Column(String(20), primary_key=True)
+    value = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index(
+            'ix_summary_counts_destination_trgm', 'value',
+            postgresql_using='gin',
+            postgresql_ops={'value': 'gin_trgm_ops'},
+            postgresql_where=(entity == 'orders') & (dimension == 'destination')
+        ).ddl_if(dialect='postgresql'),
+    )
+
+
+# Destination search runs over the distinct destinations in summary_counts.
+# On SQLite an external-content FTS5 trigram index follows those rows
+# through triggers; PostgreSQL uses the pg_trgm index above.
+_DESTINATION_ROW = "{row}.entity = 'orders' AND {row}.dimension = 'destination'"
+for statement in (
+    "CREATE VIRTUAL TABLE order_destination_search USING fts5("
+    "value, content='summary_counts', tokenize='trigram')",
+    "CREATE TRIGGER order_destination_search_insert AFTER INSERT ON summary_counts "
+    f"WHEN {_DESTINATION_ROW.format(row='new')} BEGIN "
+    "INSERT INTO order_destination_search(rowid, value) VALUES (new.rowid, new.value); END",
+    "CREATE TRIGGER order_destination_search_delete AFTER DELETE ON summary_counts "
+    f"WHEN {_DESTINATION_ROW.format(row='old')} BEGIN "
+    "INSERT INTO order_destination_search(order_destination_search, rowid, value) "
+    "VALUES ('delete', old.rowid, old.value); END",
+    "CREATE TRIGGER order_destination_search_update AFTER UPDATE OF value ON summary_counts "
+    f"WHEN {_DESTINATION_ROW.format(row='old')} BEGIN "
+    "INSERT INTO order_destination_search(order_destination_search, rowid, value) "
+    "VALUES ('delete', old.rowid, old.value); "
+    "INSERT INTO order_destination_search(rowid, value) VALUES (new.rowid, new.value); END",
+):
+    event.listen(SummaryCount.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(
+    SummaryCount.__table__, 'before_drop',
+    DDL('DROP TABLE IF EXISTS order_destination_search').execute_if(dialect='sqlite')
+)
+event.listen(
+    Base.metadata, 'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql')
+)
+
+
+class ChangeLog(Base):
+    __tablename__ = 'change_log'
+
+    seq = Column(Integer, primary_key=True, nullable=False)
+    changed_at = Column(DateTime, default=utc_now, index=True, nullable=False)
+    entity = Column(String(20), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    operation = Column(Enum('insert', 'update', 'delete', name='change_operation'), nullable=False)
+
+    __table_args__ = {'sqlite_autoincrement': True}
+
+
+class OrderArchivePart(Base):
+    __tablename__ = 'order_archive_parts'
+
+    id = Column(Integer, primary_key=True, nullable=False)
+    created_at = Column(DateTime, default=utc_now)
+    month = Column(String(7), nullable=False)
+    path = Column(String, nullable=False, unique=True)
+    row_count = Column(Integer, nullable=False)
+    min_id = Column(Integer, nullable=False)
+    max_id = Column(Integer, nullable=False)
+    min_updated_at = Column(DateTime, nullable=False)
+    max_updated_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index('ix_order_archive_parts_max_id', 'max_id'),
+        Index('ix_order_archive_parts_max_updated_at', 'max_updated_at'),
+    )
+
+
+class ArchivedOrder(Base):
+    __tablename__ = 'archived_orders'
+
+    id = Column(Integer, primary_key=True, nullable=False)
+    part_id = Column(Integer, ForeignKey('order_archive_parts.id'), index=True, nullable=False)
+
+
+class VehiclePosition(Base):
+    __tablename__ = 'vehicle_positions'
+
+    # SQLite only autoincrements an INTEGER PRIMARY KEY.
+    id = Column(BigInteger().with_variant(Integer, 'sqlite'), primary_key=True, nullable=False)
+    vehicle_id = Column(Integer, ForeignKey('vehicles.id', ondelete='CASCADE'), nullable=False)
+    recorded_at = Column(DateTime, nullable=False)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    speed_kmh = Column(Float, nullable=True)
+    heading = Column(Float, nullable=True)
+
+    # The compaction watermark needs ids that never go back, even after retention empties the table.
+    __table_args__ = (
+        Index('ix_vehicle_positions_vehicle_id_recorded_at', 'vehicle_id', 'recorded_at'),
+        {'sqlite_autoincrement': True},
+    )
+
+
+class PositionRollup:
+    """Columns of the downsampled position tables: one row per vehicle and time bucket.
+
+    The position is the last ping in the bucket; speed_samples counts the pings
+    that reported a speed, so averages from later pings can be merged in.
+    """
+
+    vehicle_id = Column(Integer, ForeignKey('vehicles.id', ondelete='CASCADE'), primary_key=True, nullable=False)
+    bucket = Column(DateTime, primary_key=True, nullable=False)
+    recorded_at = Column(DateTime, nullable=False)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    distance_km = Column(Float, nullable=False)
+    avg_speed_kmh = Column(Float, nullable=True)
+    speed_samples = Column(Integer, nullable=False)
+    ping_count = Column(Integer, nullable=False)
+
+
+class VehiclePositionMinute(PositionRollup, Base):
+    __tablename__ = 'vehicle_positions_1m'
+
+    __table_args__ = (
+        Index('ix_vehicle_positions_1m_bucket', 'bucket'),
+    )
+
+
+class VehiclePositionQuarterHour(PositionRollup, Base):
+    __tablename__ = 'vehicle_positions_15m'
+
+    __table_args__ = (
+        Index('ix_vehicle_positions_15m_bucket', 'bucket'),
+    )
+
+
+class TelemetryCompaction(Base):
+    __tablename__ = 'telemetry_compaction'
+
+    id = Column(Integer, primary_key=True, nullable=False)
+    # Raw positions up to this id have been rolled up.
+    last_position_id = Column(BigInteger, nullable=False, default=0)
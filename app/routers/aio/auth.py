@@ -0,0 +1,77 @@
+from app.core.security import create_access_token, ACCESS_TOKEN_EXPIRES
+from app.core.passwords import password_hasher
+from app.core.changes import log_change
+from app.core.constraints import violation, UNIQUE_VIOLATION
+from app.routers.auth import insert_user_statement, user_exists_statement
+from app.schemas.user import CreateUserRequest, UserResponse
+from app.models import User
+from app.database import async_db_dependency
+from fastapi.security import OAuth2PasswordRequestForm
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Annotated
+from starlette import status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+
+router = APIRouter(
+    prefix='/auth',
+    tags=['Auth']
+)
+
+
+@router.post('/', status_code=status.HTTP_201_CREATED, response_model=UserResponse)
+async def create_user(db: async_db_dependency, create_user_request: CreateUserRequest):
+    """Create a new user account with a unique username and email."""
+    if await db.scalar(user_exists_statement(create_user_request)) is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail='A user with this username or email already exists.'
+        )
+
+    requested_data = create_user_request.model_dump(exclude={'password'})
+    hashed_password = await password_hasher.ahash(create_user_request.password)
+    try:
+        new_user = (await db.execute(insert_user_statement(requested_data, hashed_password))).one()
+    except IntegrityError as error:
+        await db.rollback()
+        if violation(error) != UNIQUE_VIOLATION:
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail='A user with this username or email already exists.'
+        )
+
+    await db.run_sync(log_change, 'users', 'insert', new_user.id)
+    await db.commit()
+
+    return new_user
+
+
+@router.post('/token', status_code=status.HTTP_200_OK)
+async def login_for_access_token(db: async_db_dependency, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]) -> dict:
+    """Authenticate a user and return a JWT access token for authorization."""
+    user = await db.scalar(select(User).filter(User.username == form_data.username).limit(1))
+    verified, new_hash = await password_hasher.averify(form_data.password, user.hashed_password) if user else (False, None)
+    if not verified:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='Invalid username or password. Please check your credentials and try again.'
+        )
+    if new_hash is not None:
+        user.hashed_password = new_hash
+        await db.commit()
+
+    token = create_access_token(
+        user.username,
+        user.id,
+        ACCESS_TOKEN_EXPIRES,
+        role=user.role,
+        email=user.email,
+        token_version=user.token_version
+    )
+
+    return {
+        'access_token': token,
+        'token_type': 'bearer',
+    }
@@ -0,0 +1,245 @@
+from app.schemas.order import OrderResponse, OrderRequest, OrderStatusRequest, OrderPage
+from app.core.pagination import keyset, split_page, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.routers.orders import (
+    order_filters, order_filter_values, due_filters, order_page, insert_order_statement, update_order_statement,
+    ORDER_CACHE_COLUMNS
+)
+from app.core.intervals import naive_utc
+from app.core.search import search_page
+from app.core.responses import render_page, render_row, sparse_fields, projection_columns, project_rows
+from app.core.cache import response_cache, row_values, cached_response, CachedPage
+from app.core.stats import record_change
+from app.core.events import event_broker, order_event, event_driver_id
+from app.core.changes import log_change
+from app.core.constraints import violation, FOREIGN_KEY_VIOLATION
+from app.core.archive import (
+    archived_part_statement, find_archived, archive_parts_statement, archived_matcher, collect_archived, merge_pages
+)
+from app.core.etags import (
+    resource_etag, collection_etag, version_statement, collection_statement, etag_matches, not_modified, set_etag
+)
+from fastapi import APIRouter, HTTPException, Path, Query, Header
+from app.database import async_db_dependency
+from starlette import status
+from app.models import Order
+from app.dependencies import user_dependency
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime
+import asyncio
+
+
+router = APIRouter(
+    prefix='/orders',
+    tags=['Orders']
+)
+
+@router.get('/', status_code=status.HTTP_200_OK, response_model=OrderPage)
+async def get_all_orders(
+        db: async_db_dependency,
+        user: user_dependency,
+        destination: str = Query(None, description='Filter by order destination'),
+        size: str = Query(None, description='Filter by order size'),
+        order_status: str = Query(None, description='Filter by order status'),
+        order_by: str = Query('id', pattern='^(id|updated_at)$', description='Sort key: id or updated_at'),
+        cursor: str = Query(None, description='Opaque cursor returned as next_cursor by the previous page'),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description='Maximum number of orders per page'),
+        window_from: datetime = Query(None, description='Only orders whose delivery window ends after this time'),
+        window_to: datetime = Query(None, description='Only orders whose delivery window starts before this time'),
+        due_from: datetime = Query(None, description='Only orders whose delivery window ends at or after this time'),
+        due_to: datetime = Query(None, description='Only orders whose delivery window ends before this time'),
+        include_archived: bool = Query(False, description='Also return completed and failed orders moved to the archive'),
+        q: str = Query(None, min_length=1, max_length=100, description='Search destinations by prefix, allowing typos; ranks the best matches first'),
+        fields: str = Query(None, description='Comma-separated order fields to return, e.g. id,status,vehicle_id'),
+        if_none_match: str = Header(None)
+    ):
+    """Retrieve a page of orders, with optional filters (destination, size, status, delivery window) or a destination search."""
+    if q is not None and include_archived:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Search cannot be combined with include_archived.'
+        )
+    names = sparse_fields(OrderResponse, fields)
+    window_from, window_to, due_from, due_to = map(naive_utc, (window_from, window_to, due_from, due_to))
+    params = dict(
+        order_by=order_by, cursor=cursor, limit=limit,
+        window_from=window_from, window_to=window_to, due_from=due_from, due_to=due_to,
+        include_archived=include_archived, q=q, fields=names
+    )
+    cache_key = response_cache.key('orders', order_filter_values(destination, size, order_status), **params)
+    generation = response_cache.generation('orders')
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached_response(cached, if_none_match)
+
+    filters = order_filters(destination, size, order_status) + due_filters(due_from, due_to)
+    count, max_updated_at = (await db.execute(collection_statement(Order, filters))).one()
+    etag = collection_etag(
+        Order, count, max_updated_at, destination=destination, size=size, order_status=order_status, **params
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    columns = projection_columns(Order, names, 'id', order_by)
+    if q is not None:
+        rows, next_cursor = await db.run_sync(search_page, q, columns, filters, window_from, window_to, cursor, limit)
+    elif window_from is not None or window_to is not None:
+        # The in-memory interval index works on a sync session.
+        rows, next_cursor = await db.run_sync(order_page, columns, filters, window_from, window_to, order_by, cursor, limit)
+    else:
+        statement = select(*columns).filter(*filters)
+        rows = (await db.execute(keyset(statement, Order, order_by, cursor, limit))).all()
+        rows, next_cursor = split_page(rows, order_by, limit)
+    if include_archived:
+        # Part files are read in a worker thread to keep the event loop free.
+        archived_rows = project_rows(await asyncio.to_thread(
+            collect_archived,
+            (await db.execute(archive_parts_statement(order_by, cursor))).all(),
+            archived_matcher(
+                order_filter_values(destination, size, order_status), due_from, due_to, window_from, window_to
+            ),
+            order_by, cursor, limit
+        ), columns)
+        rows, next_cursor = merge_pages(rows, next_cursor, archived_rows, order_by, limit)
+
+    page = render_page(rows, names, next_cursor)
+    set_etag(page, etag)
+    response_cache.set(cache_key, CachedPage(etag, page.body), generation)
+    return page
+
+
+@router.get('/{order_id}', status_code=status.HTTP_200_OK, response_model=OrderResponse)
+async def get_order_by_id(
+        db: async_db_dependency,
+        user: user_dependency,
+        order_id: int = Path(gt=0),
+        include_archived: bool = Query(False, description='Also look the order up in the archive'),
+        fields: str = Query(None, description='Comma-separated order fields to return, e.g. id,status,vehicle_id'),
+        if_none_match: str = Header(None)
+    ):
+    """Retrieve details of a specific order by its ID."""
+    names = sparse_fields(OrderResponse, fields)
+    if if_none_match:
+        updated_at = await db.scalar(version_statement(Order, order_id))
+        if updated_at is not None:
+            etag = resource_etag(Order, order_id, updated_at)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+
+    columns = projection_columns(Order, names, 'updated_at')
+    target_order = (await db.execute(select(*columns).where(Order.id == order_id))).first()
+    if target_order is None and include_archived:
+        part_path = await db.scalar(archived_part_statement(order_id))
+        archived_order = await asyncio.to_thread(find_archived, part_path, order_id)
+        if archived_order is not None:
+            target_order, = project_rows([archived_order], columns)
+            etag = resource_etag(Order, order_id, target_order.updated_at)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+
+    if target_order is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='The specified order could not be found.'
+        )
+
+    response = render_row(target_order, names)
+    set_etag(response, resource_etag(Order, order_id, target_order.updated_at))
+    return response
+
+
+@router.post('/', status_code=status.HTTP_201_CREATED, response_model=OrderResponse)
+async def add_order(db: async_db_dependency, user: user_dependency, order_request: OrderRequest):
+    """Create a new order with the specified details."""
+    if user.role != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail='You are not authorized to perform this action.'
+        )
+
+    try:
+        new_order = (await db.execute(insert_order_statement(order_request))).one()
+    except IntegrityError as error:
+        await db.rollback()
+        if violation(error) != FOREIGN_KEY_VIOLATION:
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='The specified vehicle could not be found.'
+        )
+
+    current = row_values(new_order, ORDER_CACHE_COLUMNS)
+    await db.run_sync(record_change, 'orders', None, current)
+    event = order_event(new_order, await db.run_sync(event_driver_id, new_order.vehicle_id))
+    await db.run_sync(log_change, 'orders', 'insert', new_order.id)
+    await db.commit()
+    response_cache.invalidate('orders', current)
+    event_broker.publish('order.created', event)
+
+    return new_order
+
+
+@router.put('/{order_id}/status', status_code=status.HTTP_200_OK, response_model=OrderResponse)
+async def update_order_status(
+        db: async_db_dependency,
+        user: user_dependency,
+        status_request: OrderStatusRequest,
+        order_id: int = Path(gt=0)
+    ):
+    """Update the status of an order by its ID (admin only)."""
+    if user.role != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail='You are not authorized to perform this action.'
+        )
+
+    target_order = await db.get(Order, order_id)
+    if target_order is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='The specified order could not be found.'
+        )
+    if target_order.status == status_request.order_status:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail= f"Order status is already set to '{target_order.status}'."
+        )
+
+    previous = row_values(target_order, ORDER_CACHE_COLUMNS)
+    updated_order = (await db.execute(update_order_statement(order_id, status=status_request.order_status))).one()
+    current = row_values(updated_order, ORDER_CACHE_COLUMNS)
+    await db.run_sync(record_change, 'orders', previous, current)
+    event = order_event(updated_order, await db.run_sync(event_driver_id, updated_order.vehicle_id))
+    await db.run_sync(log_change, 'orders', 'update', order_id)
+    await db.commit()
+    response_cache.invalidate('orders', previous, current)
+    event_broker.publish('order.status_changed', event, {'status': previous['status']})
+
+    return updated_order
+
+
+@router.delete('/{order_id}', status_code=status.HTTP_204_NO_CONTENT)
+async def delete_order(db: async_db_dependency, user: user_dependency, order_id: int = Path(gt=0)):
+    """Delete an order by its ID (admin only)."""
+    if user.role != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail='You are not authorized to perform this action.'
+        )
+
+    target_order = await db.get(Order, order_id)
+    if target_order is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='The specified order could not be found.'
+        )
+
+    previous = row_values(target_order, ORDER_CACHE_COLUMNS)
+    await db.run_sync(record_change, 'orders', previous, None)
+    event = order_event(target_order, await db.run_sync(event_driver_id, target_order.vehicle_id))
+    await db.delete(target_order)
+    await db.flush()
+    await db.run_sync(log_change, 'orders', 'delete', order_id)
+    await db.commit()
+    response_cache.invalidate('orders', previous)
+    event_broker.publish('order.deleted', event)
@@ -0,0 +1,159 @@
+from app.schemas.user import UserResponse, UpdateUserRequest, UpdateRoleRequest, PasswordRequest
+from app.schemas.common import MessageResponse
+from app.core.security import revoke_tokens, token_versions
+from app.core.passwords import password_hasher
+from app.dependencies import user_dependency
+from app.database import async_db_dependency
+from starlette import status
+from app.models import User
+from app.routers.users import (
+    remove_user_rows, log_user_removal, invalidate_user_listings, delete_user_statement, purge_user
+)
+from app.core.changes import log_change
+from app.core.purge import run_purge_async
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Path, Query, Response
+from sqlalchemy import select
+
+
+router = APIRouter(
+    prefix='/users',
+    tags=['Users']
+)
+
+@router.get('/me', status_code=status.HTTP_200_OK, response_model=UserResponse)
+async def get_me(user: user_dependency):
+    """Retrieve details of the currently authenticated user."""
+    return user
+
+
+@router.get('/', status_code=status.HTTP_200_OK, response_model=list[UserResponse])
+async def get_all_users(db: async_db_dependency, user: user_dependency):
+    """Retrieve a list of all users."""
+    return (await db.scalars(select(User))).all()
+
+
+@router.get('/{user_id}', status_code=status.HTTP_200_OK, response_model=UserResponse)
+async def get_user_by_id(db: async_db_dependency, user: user_dependency, user_id: int = Path(gt=0)):
+    """Retrieve a user by their unique ID."""
+    requested_user = await db.get(User, user_id)
+    if requested_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='The specified user could not be found.'
+        )
+
+    return requested_user
+
+
+@router.put('/password', status_code=status.HTTP_200_OK, response_model=MessageResponse)
+async def update_user_password(db: async_db_dependency, user: user_dependency, update_request: UpdateUserRequest):
+    """Update the password of the currently authenticated user."""
+    me = await db.get(User, user.id)
+    if me is None or not (await password_hasher.averify(update_request.old_password, me.hashed_password))[0]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail='The old password you entered is incorrect.'
+        )
+
+    me.hashed_password = await password_hasher.ahash(update_request.new_password)
+    token_version = revoke_tokens(db, me)
+    await db.flush()
+    await db.run_sync(log_change, 'users', 'update', me.id)
+    await db.commit()
+    token_versions.record(me.id, token_version)
+
+    return MessageResponse(
+        status='success',
+        message='Password has been updated successfully.'
+    )
+
+
+@router.put('/{user_id}/role', status_code=status.HTTP_200_OK, response_model=UserResponse)
+async def update_user_role(
+        db: async_db_dependency,
+        user: user_dependency,
+        update_request: UpdateRoleRequest,
+        user_id: int = Path(gt=0)
+    ):
+    """Update the role of a user by their ID (admin only)."""
+    target_user = await db.get(User, user_id)
+    if target_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='The specified user could not be found.'
+        )
+    if user.role != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail='You are not authorized to perform this action.'
+        )
+
+    target_user.role = update_request.role
+    token_version = revoke_tokens(db, target_user)
+    await db.flush()
+    await db.run_sync(log_change, 'users', 'update', user_id)
+    await db.commit()
+    token_versions.record(user_id, token_version)
+
+    # Async sessions keep attributes loaded across commit, so no refresh is needed.
+    return target_user
+
+
+@router.delete('/me', status_code=status.HTTP_204_NO_CONTENT)
+async def delete_me(db: async_db_dependency, user: user_dependency, password_request: PasswordRequest):
+    """Delete the account of the currently authenticated user."""
+    me = await db.get(User, user.id)
+
+    if me is None or not (await password_hasher.averify(password_request.password, me.hashed_password))[0]:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='The password you entered is incorrect.'
+        )
+
+    vehicle_ids, order_ids, order_rows = await db.run_sync(remove_user_rows, user.id)
+    revoke_tokens(db, me, deleted=True)
+    await db.execute(delete_user_statement(user.id))
+    await db.flush()
+    await db.run_sync(log_user_removal, user.id, vehicle_ids, order_ids)
+    await db.commit()
+    token_versions.record(user.id, None)
+    invalidate_user_listings(user.id, order_rows)
+
+
+@router.delete('/{user_id}', status_code=status.HTTP_204_NO_CONTENT)
+async def delete_user_by_id(
+        db: async_db_dependency,
+        user: user_dependency,
+        background_tasks: BackgroundTasks,
+        user_id: int = Path(gt=0),
+        background: bool = Query(False, description='Revoke access and respond 202 at once, then delete the orders in batches')
+    ):
+    """Delete a user by their ID (admin only)."""
+    target_user = await db.get(User, user_id)
+
+    if target_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='The specified user could not be found.'
+        )
+    if user.role != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail='You are not authorized to perform this action.'
+        )
+
+    if background:
+        revoke_tokens(db, target_user, deleted=True)
+        await db.commit()
+        token_versions.record(user_id, None)
+        background_tasks.add_task(run_purge_async, db.bind, purge_user, user_id)
+        return Response(status_code=status.HTTP_202_ACCEPTED)
+
+    vehicle_ids, order_ids, order_rows = await db.run_sync(remove_user_rows, user_id)
+    revoke_tokens(db, target_user, deleted=True)
+    await db.execute(delete_user_statement(user_id))
+    await db.flush()
+    await db.run_sync(log_user_removal, user_id, vehicle_ids, order_ids)
+    await db.commit()
+    token_versions.record(user_id, None)
+    invalidate_user_listings(user_id, order_rows)
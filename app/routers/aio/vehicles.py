@@ -0,0 +1,315 @@
+from app.schemas.vehicle import (
+    VehicleResponse, VehicleRequest, VehicleStatusRequest, VehicleDriverRequest, VehiclePage, VehicleWithOrdersPage,
+    VehicleOrderPage
+)
+from app.schemas.order import OrderResponse
+from app.core.pagination import keyset, split_page, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core.responses import render_page, render_row, render_json, sparse_fields, projection_columns
+from app.core.etags import (
+    resource_etag, collection_etag, version_statement, collection_statement, etag_matches, not_modified, set_etag
+)
+from app.core.cache import response_cache, row_values, cached_response, CachedPage
+from app.routers.vehicles import (
+    vehicle_filters, vehicle_filter_values, remove_vehicle, purge_vehicle, insert_vehicle_statement, update_vehicle_statement,
+    driver_condition, vehicle_orders_statement, nest_orders, vehicle_load_statement, VEHICLE_CACHE_COLUMNS,
+    DEFAULT_ORDERS_PER_VEHICLE
+)
+from app.core.stats import record_change
+from app.core.events import event_broker, vehicle_event
+from app.core.changes import log_change
+from app.core.constraints import violation, UNIQUE_VIOLATION
+from app.core.purge import run_purge_async
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Path, Query, Header, Response
+from app.database import async_db_dependency
+from starlette import status
+from app.models import Vehicle, Order
+from app.dependencies import user_dependency
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+
+router = APIRouter(
+    prefix='/vehicles',
+    tags=['Vehicles']
+)
+
+
+@router.get('/', status_code=status.HTTP_200_OK, response_model=VehiclePage | VehicleWithOrdersPage)
+async def get_all_vehicles(
+        db: async_db_dependency,
+        user: user_dependency,
+        driver_id: int = Query(None, description='Filter by driver ID'),
+        vehicle_type: str = Query(None, description='Filter by vehicle type'),
+        capacity_kg: int = Query(None, description='Filter by vehicle capacity in kg'),
+        vehicle_status: str = Query(None, description='Filter by vehicle status'),
+        order_by: str = Query('id', pattern='^(id|updated_at)$', description='Sort key: id or updated_at'),
+        cursor: str = Query(None, description='Opaque cursor returned as next_cursor by the previous page'),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description='Maximum number of vehicles per page'),
+        fields: str = Query(None, description='Comma-separated vehicle fields to return, e.g. id,status,driver_id'),
+        include: str = Query(None, pattern='^orders$', description='Set to orders to nest each vehicle\'s orders and load'),
+        orders_limit: int = Query(DEFAULT_ORDERS_PER_VEHICLE, ge=1, le=MAX_PAGE_SIZE, description='Maximum number of orders nested per vehicle'),
+        if_none_match: str = Header(None)
+):
+    """Retrieve a page of vehicles, with optional filters (driver, type, capacity, status) and their orders."""
+    names = sparse_fields(VehicleResponse, fields)
+    params = dict(order_by=order_by, cursor=cursor, limit=limit, fields=names)
+    if include is not None:
+        params.update(include=include, orders_limit=orders_limit)
+    cache_key = response_cache.key(
+        'vehicles', vehicle_filter_values(driver_id, vehicle_type, capacity_kg, vehicle_status), **params
+    )
+    generation = response_cache.generation('vehicles')
+    cached = response_cache.get(cache_key) if include is None else None
+    if cached is not None:
+        return cached_response(cached, if_none_match)
+
+    filters = vehicle_filters(driver_id, vehicle_type, capacity_kg, vehicle_status)
+    count, max_updated_at = (await db.execute(collection_statement(Vehicle, filters))).one()
+    if include is not None:
+        vehicle_orders = Order.vehicle_id.in_(select(Vehicle.id).where(*filters))
+        params.update(orders=tuple((await db.execute(collection_statement(Order, [vehicle_orders]))).one()))
+    etag = collection_etag(
+        Vehicle, count, max_updated_at,
+        driver_id=driver_id, vehicle_type=vehicle_type, capacity_kg=capacity_kg, vehicle_status=vehicle_status,
+        **params
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    statement = select(*projection_columns(Vehicle, names, 'id', order_by)).filter(*filters)
+    rows = (await db.execute(keyset(statement, Vehicle, order_by, cursor, limit))).all()
+    rows, next_cursor = split_page(rows, order_by, limit)
+
+    if include is not None:
+        order_rows = []
+        if rows:
+            order_rows = (await db.execute(vehicle_orders_statement([row.id for row in rows], orders_limit))).all()
+        page = render_json({'items': nest_orders(rows, names, order_rows, orders_limit), 'next_cursor': next_cursor})
+        set_etag(page, etag)
+        return page
+
+    page = render_page(rows, names, next_cursor)
+    set_etag(page, etag)
+    response_cache.set(cache_key, CachedPage(etag, page.body), generation)
+    return page
+
+
+@router.get('/{vehicle_id}', status_code=status.HTTP_200_OK, response_model=VehicleResponse)
+async def get_vehicle_by_id(
+        db: async_db_dependency,
+        user: user_dependency,
+        vehicle_id: int = Path(gt=0),
+        fields: str = Query(None, description='Comma-separated vehicle fields to return, e.g. id,status,driver_id'),
+        if_none_match: str = Header(None)
+):
+    """Retrieve details of a specific vehicle by its ID."""
+    names = sparse_fields(VehicleResponse, fields)
+    if if_none_match:
+        updated_at = await db.scalar(version_statement(Vehicle, vehicle_id))
+        if updated_at is not None:
+            etag = resource_etag(Vehicle, vehicle_id, updated_at)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+
+    statement = select(*projection_columns(Vehicle, names, 'updated_at')).where(Vehicle.id == vehicle_id)
+    target_vehicle = (await db.execute(statement)).first()
+
+    if target_vehicle is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='The specified vehicle could not be found.'
+        )
+
+    response = render_row(target_vehicle, names)
+    set_etag(response, resource_etag(Vehicle, vehicle_id, target_vehicle.updated_at))
+    return response
+
+
+@router.get('/{vehicle_id}/orders', status_code=status.HTTP_200_OK, response_model=VehicleOrderPage)
+async def get_vehicle_orders(
+        db: async_db_dependency,
+        user: user_dependency,
+        vehicle_id: int = Path(gt=0),
+        order_by: str = Query('id', pattern='^(id|updated_at)$', description='Sort key: id or updated_at'),
+        cursor: str = Query(None, description='Opaque cursor returned as next_cursor by the previous page'),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description='Maximum number of orders per page'),
+        fields: str = Query(None, description='Comma-separated order fields to return, e.g. id,status,vehicle_id'),
+        if_none_match: str = Header(None)
+):
+    """Retrieve a page of the orders assigned to a vehicle, with the vehicle's current load in kg."""
+    names = sparse_fields(OrderResponse, fields)
+    summary = (await db.execute(vehicle_load_statement(vehicle_id))).first()
+    if summary is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='The specified vehicle could not be found.'
+        )
+
+    _, load_kg, count, max_updated_at = summary
+    etag = collection_etag(
+        Order, count, max_updated_at, vehicle_id=vehicle_id, order_by=order_by, cursor=cursor, limit=limit, fields=names
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    statement = select(*projection_columns(Order, names, 'id', order_by)).where(Order.vehicle_id == vehicle_id)
+    rows = (await db.execute(keyset(statement, Order, order_by, cursor, limit))).all()
+    rows, next_cursor = split_page(rows, order_by, limit)
+
+    page = render_page(rows, names, next_cursor, load_kg=float(load_kg))
+    set_etag(page, etag)
+    return page
+
+
+@router.post('/', status_code=status.HTTP_201_CREATED, response_model=VehicleResponse)
+async def add_vehicle(db: async_db_dependency, user: user_dependency, vehicle_request: VehicleRequest):
+    """Create a new vehicle and assign it to a driver (admin only)."""
+    if user.role != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail='You are not authorized to perform this action.'
+        )
+
+    try:
+        new_vehicle = (await db.execute(insert_vehicle_statement(vehicle_request))).first()
+    except IntegrityError as error:
+        await db.rollback()
+        if violation(error) != UNIQUE_VIOLATION:
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='A vehicle with this license plate already exists.'
+        )
+    if new_vehicle is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='The specified driver could not be found.'
+        )
+
+    current = row_values(new_vehicle, VEHICLE_CACHE_COLUMNS)
+    await db.run_sync(record_change, 'vehicles', None, current)
+    await db.run_sync(log_change, 'vehicles', 'insert', new_vehicle.id)
+    await db.commit()
+    response_cache.invalidate('vehicles', current)
+    event_broker.publish('vehicle.created', vehicle_event(new_vehicle))
+
+    return new_vehicle
+
+
+@router.put('/{vehicle_id}/status', status_code=status.HTTP_200_OK, response_model=VehicleResponse)
+async def update_vehicle_status(
+        db: async_db_dependency,
+        user: user_dependency,
+        status_request: VehicleStatusRequest,
+        vehicle_id: int = Path(gt=0)
+    ):
+    """Update the operational status of a vehicle by its ID (admin only)."""
+    if user.role != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail='You are not authorized to perform this action.'
+        )
+
+    target_vehicle = await db.get(Vehicle, vehicle_id)
+    if target_vehicle is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='The specified vehicle could not be found.'
+        )
+    if target_vehicle.status == status_request.vehicle_status:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail= f"Vehicle status is already set to '{target_vehicle.status}'."
+        )
+
+    previous = row_values(target_vehicle, VEHICLE_CACHE_COLUMNS)
+    updated_vehicle = (await db.execute(
+        update_vehicle_statement(vehicle_id, status=status_request.vehicle_status)
+    )).one()
+    current = row_values(updated_vehicle, VEHICLE_CACHE_COLUMNS)
+    await db.run_sync(record_change, 'vehicles', previous, current)
+    await db.run_sync(log_change, 'vehicles', 'update', vehicle_id)
+    event = vehicle_event(updated_vehicle)
+    await db.commit()
+    response_cache.invalidate('vehicles', previous, current)
+    event_broker.publish('vehicle.status_changed', event, {'status': previous['status']})
+
+    return updated_vehicle
+
+
+@router.put('/{vehicle_id}/driver', status_code=status.HTTP_200_OK, response_model=VehicleResponse)
+async def change_vehicle_driver(
+        db: async_db_dependency,
+        user: user_dependency,
+        driver_request:
+        VehicleDriverRequest,
+        vehicle_id: int = Path(gt=0)
+    ):
+    """Reassign a vehicle to a different driver (admin only)."""
+    if user.role != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail='You are not authorized to perform this action.'
+        )
+
+    target_vehicle = await db.get(Vehicle, vehicle_id)
+    if target_vehicle is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='The specified vehicle could not be found.'
+        )
+    if target_vehicle.driver_id == driver_request.driver_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This vehicle is already assigned to the specified driver."
+        )
+
+    previous = row_values(target_vehicle, VEHICLE_CACHE_COLUMNS)
+    updated_vehicle = (await db.execute(update_vehicle_statement(
+        vehicle_id, driver_condition(driver_request.driver_id), driver_id=driver_request.driver_id
+    ))).first()
+    if updated_vehicle is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='The specified driver could not be found.'
+        )
+
+    current = row_values(updated_vehicle, VEHICLE_CACHE_COLUMNS)
+    await db.run_sync(log_change, 'vehicles', 'update', vehicle_id)
+    event = vehicle_event(updated_vehicle)
+    await db.commit()
+    response_cache.invalidate('vehicles', previous, current)
+    event_broker.publish('vehicle.driver_changed', event, {'driver_id': previous['driver_id']})
+
+    return updated_vehicle
+
+
+@router.delete('/{vehicle_id}', status_code=status.HTTP_204_NO_CONTENT)
+async def delete_vehicle(
+        db: async_db_dependency,
+        user: user_dependency,
+        background_tasks: BackgroundTasks,
+        vehicle_id: int = Path(gt=0),
+        background: bool = Query(False, description='Respond 202 at once and delete the orders in batches first')
+    ):
+    """Delete a vehicle by its ID (admin only)."""
+    if user.role != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail='You are not authorized to perform this action.'
+        )
+
+    if background:
+        if await db.scalar(select(Vehicle.id).where(Vehicle.id == vehicle_id)) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail='The specified vehicle could not be found.'
+            )
+        background_tasks.add_task(run_purge_async, db.bind, purge_vehicle, vehicle_id)
+        return Response(status_code=status.HTTP_202_ACCEPTED)
+
+    if not await db.run_sync(remove_vehicle, vehicle_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='The specified vehicle could not be found.'
+        )
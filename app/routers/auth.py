@@ -1,13 +1,16 @@
-from app.core.security import bcrypt_context, create_access_token
+from app.core.security import create_access_token, ACCESS_TOKEN_EXPIRES
+from app.core.passwords import password_hasher
+from app.core.changes import log_change
+from app.core.constraints import violation, UNIQUE_VIOLATION
 from app.schemas.user import CreateUserRequest, UserResponse
 from app.models import User
 from app.database import db_dependency
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi import APIRouter, Depends, HTTPException
 from typing import Annotated
-from datetime import timedelta
 from starlette import status
-from sqlalchemy import or_
+from sqlalchemy import select, insert, or_
+from sqlalchemy.exc import IntegrityError
 
 
 router = APIRouter(
@@ -16,27 +19,47 @@ router = APIRouter(
 )
 
 
-@router.post('/', status_code=status.HTTP_201_CREATED, response_model=UserResponse)
-def create_user(db: db_dependency, create_user_request: CreateUserRequest) -> User:
-    """Create a new user account with a unique username and email."""
-    user_exists = db.query(User).filter(or_(
+def insert_user_statement(requested_data: dict, hashed_password: str):
+    """INSERT ... RETURNING the response columns; a taken username or email fails its unique constraint."""
+    return (
+        insert(User)
+        .values(**requested_data, hashed_password=hashed_password)
+        .returning(*(getattr(User, name) for name in UserResponse.model_fields))
+    )
+
+
+def user_exists_statement(create_user_request: CreateUserRequest):
+    """Select any user holding the requested username or email, so a duplicate is refused before hashing."""
+    return select(User.id).where(or_(
         User.username == create_user_request.username,
         User.email == create_user_request.email
-    )).first()
+    )).limit(1)
+
 
-    if user_exists:
+@router.post('/', status_code=status.HTTP_201_CREATED, response_model=UserResponse)
+def create_user(db: db_dependency, create_user_request: CreateUserRequest):
+    """Create a new user account with a unique username and email."""
+    if db.scalar(user_exists_statement(create_user_request)) is not None:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail='A user with this username or email already exists.'
         )
 
     requested_data = create_user_request.model_dump(exclude={'password'})
-    hashed_password = bcrypt_context.hash(create_user_request.password)
-    new_user = User(**requested_data, hashed_password=hashed_password)
+    hashed_password = password_hasher.hash(create_user_request.password)
+    try:
+        new_user = db.execute(insert_user_statement(requested_data, hashed_password)).one()
+    except IntegrityError as error:
+        db.rollback()
+        if violation(error) != UNIQUE_VIOLATION:
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail='A user with this username or email already exists.'
+        )
 
-    db.add(new_user)
+    log_change(db, 'users', 'insert', new_user.id)
     db.commit()
-    db.refresh(new_user)
 
     return new_user
 
@@ -45,13 +68,24 @@ def create_user(db: db_dependency, create_user_request: CreateUserRequest) -> Us
 def login_for_access_token(db: db_dependency, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]) -> dict:
     """Authenticate a user and return a JWT access token for authorization."""
     user = db.query(User).filter(User.username == form_data.username).first()
-    if user is None or not bcrypt_context.verify(form_data.password, user.hashed_password):
+    verified, new_hash = password_hasher.verify(form_data.password, user.hashed_password) if user else (False, None)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='Invalid username or password. Please check your credentials and try again.'
         )
+    if new_hash is not None:
+        user.hashed_password = new_hash
+        db.commit()
 
-    token = create_access_token(user.username, user.id, timedelta(minutes=60))
+    token = create_access_token(
+        user.username,
+        user.id,
+        ACCESS_TOKEN_EXPIRES,
+        role=user.role,
+        email=user.email,
+        token_version=user.token_version
+    )
 
     return {
         'access_token': token,
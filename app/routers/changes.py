@@ -0,0 +1,85 @@
+from app.schemas.change import ChangePage
+from app.schemas.order import OrderResponse
+from app.schemas.vehicle import VehicleResponse
+from app.schemas.user import UserResponse
+from app.core.changes import change_log_bounds
+from app.core.responses import response_columns, render_json
+from app.routers.orders import ORDER_COLUMNS
+from app.routers.vehicles import VEHICLE_COLUMNS
+from fastapi import APIRouter, HTTPException, Query
+from app.database import db_dependency
+from starlette import status
+from app.models import ChangeLog, Order, Vehicle, User
+from app.dependencies import user_dependency
+from sqlalchemy import select
+
+
+router = APIRouter(
+    prefix='/changes',
+    tags=['Changes']
+)
+
+MAX_CHANGES_PAGE_SIZE = 1000
+ENTITY_COLUMNS = {
+    'orders': (Order, ORDER_COLUMNS, OrderResponse.model_fields),
+    'vehicles': (Vehicle, VEHICLE_COLUMNS, VehicleResponse.model_fields),
+    'users': (User, response_columns(User, UserResponse), UserResponse.model_fields),
+}
+
+
+@router.get('/', status_code=status.HTTP_200_OK, response_model=ChangePage)
+def get_changes(
+        db: db_dependency,
+        user: user_dependency,
+        since: int = Query(0, ge=0, description='Return changes with a sequence number above this; pass next_since'),
+        limit: int = Query(100, ge=1, le=MAX_CHANGES_PAGE_SIZE, description='Maximum number of changes per page')
+):
+    """Retrieve order, vehicle and user changes after a sequence number, with each row's current data (admin only).
+
+    `data` is null once the row has been deleted. `latest_seq` is the newest
+    sequence number in the log; a consumer starting from scratch, or told to
+    resynchronize, notes it first, reads the list endpoints and then follows
+    the log from there.
+    """
+    if user.role != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail='You are not authorized to perform this action.'
+        )
+    oldest, latest = change_log_bounds(db)
+    if since > (latest or 0):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='The sequence number is ahead of the change log.',
+            headers={'X-Latest-Seq': str(latest or 0)}
+        )
+    # Retention has purged past `since`: some of the changes after it are gone.
+    if oldest is not None and since < oldest - 1:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail='Changes after this sequence number have been purged; resynchronize from the list endpoints.',
+            headers={'X-Latest-Seq': str(latest)}
+        )
+
+    entries = db.execute(
+        select(ChangeLog.seq, ChangeLog.entity, ChangeLog.entity_id, ChangeLog.operation, ChangeLog.changed_at)
+        .where(ChangeLog.seq > since)
+        .order_by(ChangeLog.seq)
+        .limit(limit)
+    ).all()
+
+    current = {}
+    for entity, (model, columns, fields) in ENTITY_COLUMNS.items():
+        ids = {entry.entity_id for entry in entries if entry.entity == entity}
+        if ids:
+            rows = db.execute(select(*columns).where(model.id.in_(ids))).all()
+            current.update(((entity, row.id), dict(zip(fields, row))) for row in rows)
+
+    return render_json({
+        'items': [
+            {**entry._asdict(), 'data': current.get((entry.entity, entry.entity_id))}
+            for entry in entries
+        ],
+        'next_since': entries[-1].seq if entries else since,
+        'latest_seq': max(latest or 0, entries[-1].seq if entries else 0)
+    })
@@ -0,0 +1,51 @@
+from app.schemas.dispatch import DispatchResponse
+from app.core.dispatch import plan_dispatch, apply_dispatch
+from app.core.cache import response_cache
+from app.core.changes import log_changes
+from app.core.events import event_broker, order_event, event_driver_ids
+from fastapi import APIRouter, HTTPException, Query
+from app.database import db_dependency
+from starlette import status
+from app.dependencies import user_dependency
+
+
+router = APIRouter(
+    prefix='/dispatch',
+    tags=['Dispatch']
+)
+
+
+@router.post('/run', status_code=status.HTTP_200_OK, response_model=DispatchResponse)
+def run_dispatch(
+        db: db_dependency,
+        user: user_dependency,
+        dry_run: bool = Query(False, description='Compute the assignments without saving them')
+    ):
+    """Assign pending orders to available vehicles by capacity, priority and delivery window (admin only)."""
+    if user.role != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail='You are not authorized to perform this action.'
+        )
+
+    plan = plan_dispatch(db)
+    assignments = plan.assignments
+    if not dry_run:
+        applied = apply_dispatch(db, plan)
+        assignments = [(row.id, row.vehicle_id) for row in applied]
+        drivers = event_driver_ids(db, (row.vehicle_id for row in applied))
+        log_changes(db, 'orders', 'update', (row.id for row in applied))
+        db.commit()
+        if applied:
+            response_cache.invalidate('orders')
+        if event_broker.watching():
+            for row in applied:
+                event = order_event(row, drivers.get(row.vehicle_id))
+                event_broker.publish('order.updated', event, {'vehicle_id': None})
+
+    return {
+        'dry_run': dry_run,
+        'assigned': len(assignments),
+        'assignments': [{'order_id': order_id, 'vehicle_id': vehicle_id} for order_id, vehicle_id in assignments],
+        'unassigned_order_ids': plan.unassigned_order_ids
+    }
@@ -0,0 +1,15 @@
+from app.core.metrics import registry
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from starlette import status
+
+
+router = APIRouter(
+    tags=['Metrics']
+)
+
+
+@router.get('/metrics', status_code=status.HTTP_200_OK, response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    """Expose request, latency and connection pool metrics in Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type='text/plain; version=0.0.4; charset=utf-8')
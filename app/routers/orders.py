@@ -1,43 +1,263 @@
-from app.schemas.order import OrderResponse, OrderRequest, OrderStatusRequest
-from fastapi import APIRouter, HTTPException, Path, Query
+from app.schemas.order import OrderResponse, OrderRequest, OrderStatusRequest, OrderPage, BulkOrderResponse
+from app.core.pagination import paginate, split_page, decode_cursor, ordering_columns, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core.intervals import order_windows, window_overlap, fetch_candidates, naive_utc
+from app.core.search import search_page
+from app.core.export import stream_rows, EXPORT_MEDIA_TYPES
+from app.core.responses import response_columns, render_page, render_row, sparse_fields, projection_columns, project_rows
+from app.core.cache import response_cache, row_values, cached_response, CachedPage
+from app.core.stats import record_change, adjust_summary
+from app.core.events import event_broker, order_event, event_driver_id, event_driver_ids
+from app.core.changes import log_change, log_changes
+from app.core.constraints import violation, FOREIGN_KEY_VIOLATION
+from app.core.archive import (
+    get_archived_order, archive_parts_statement, archived_matcher, collect_archived, merge_pages
+)
+from app.core.etags import (
+    resource_etag, collection_etag, version_statement, collection_statement, etag_matches, not_modified, set_etag
+)
+from fastapi import APIRouter, HTTPException, Path, Query, Request, Depends, Header
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import select, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Annotated
+from dotenv import load_dotenv
+import json
+import os
 from app.database import db_dependency
 from starlette import status
 from app.models import Vehicle, User, Order
 from app.dependencies import user_dependency
 
+load_dotenv()
 
 router = APIRouter(
     prefix='/orders',
     tags=['Orders']
 )
 
-@router.get('/', status_code=status.HTTP_200_OK, response_model=list[OrderResponse])
+BULK_CHUNK_SIZE = int(os.getenv('BULK_CHUNK_SIZE', 1000))
+MAX_BULK_ORDERS = int(os.getenv('MAX_BULK_ORDERS', 50000))
+
+ORDER_COLUMNS = response_columns(Order, OrderResponse)
+ORDER_CACHE_COLUMNS = ('destination', 'size', 'status')
+
+EXPORT_COLUMNS = (
+    Order.id,
+    Order.updated_at,
+    Order.destination,
+    Order.size,
+    Order.priority,
+    Order.delivery_window_start,
+    Order.delivery_window_end,
+    Order.status,
+    Order.vehicle_id,
+)
+
+
+def order_filter_values(destination: str | None, size: str | None, order_status: str | None) -> dict:
+    """Map the order list filters that were given to the columns they compare."""
+    filters = {
+        'destination': destination,
+        'size': size,
+        'status': order_status
+    }
+
+    return {key: value for key, value in filters.items() if value is not None}
+
+
+def due_filters(due_from: datetime | None, due_to: datetime | None) -> list:
+    """Conditions on the end of the delivery window, served by ix_orders_delivery_window_end_id."""
+    filters = []
+    if due_from is not None:
+        filters.append(Order.delivery_window_end >= due_from)
+    if due_to is not None:
+        filters.append(Order.delivery_window_end < due_to)
+    return filters
+
+
+def order_page(db: Session, columns: list, filters: list, window_from: datetime | None, window_to: datetime | None,
+               order_by: str, cursor: str | None, limit: int) -> tuple[list, str | None]:
+    """Fetch one page of order rows, narrowing delivery-window overlaps with the best index available.
+
+    PostgreSQL answers the overlap from its GiST range index. Other databases
+    get candidate ids from the in-memory interval index, which are re-checked
+    against every filter in chunks of a few hundred ids; until its first
+    snapshot is built, the overlap is filtered in SQL.
+    """
+    dialect_name = db.get_bind().dialect.name
+    if window_from is not None or window_to is not None:
+        filters = [*filters, window_overlap(dialect_name, window_from, window_to)]
+
+        if dialect_name != 'postgresql':
+            after = decode_cursor(cursor, order_by) if cursor is not None else None
+            candidate_ids = order_windows.candidates(db, window_from, window_to, order_by, after)
+            if candidate_ids is not None:
+                statement = select(*columns).where(*filters).order_by(*ordering_columns(Order, order_by))
+                rows = fetch_candidates(
+                    lambda ids: db.execute(statement.where(Order.id.in_(ids))).all(), candidate_ids, limit
+                )
+                return split_page(rows, order_by, limit)
+
+    query = db.query(*columns).filter(*filters)
+    return paginate(query, Order, order_by, cursor, limit)
+
+
+def order_values(order_request: OrderRequest) -> dict:
+    """Column values of a new order."""
+    return {
+        'destination': order_request.destination,
+        'size': order_request.size,
+        'priority': order_request.priority,
+        'delivery_window_start': order_request.delivery_window_start,
+        'delivery_window_end': order_request.delivery_window_end,
+        'status': order_request.status,
+        'vehicle_id': order_request.vehicle_id
+    }
+
+
+def insert_order_statement(order_request: OrderRequest):
+    """INSERT ... RETURNING the response columns; a missing vehicle fails the vehicle_id foreign key."""
+    return insert(Order).values(**order_values(order_request)).returning(*ORDER_COLUMNS)
+
+
+def update_order_statement(order_id: int, **values):
+    """UPDATE ... RETURNING the response columns, so the handler needs no refresh after commit."""
+    return (
+        update(Order)
+        .where(Order.id == order_id)
+        .values(**values)
+        .returning(*ORDER_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def order_filters(destination: str | None, size: str | None, order_status: str | None) -> list:
+    """Build the SQL conditions shared by the order list and export endpoints."""
+    return [getattr(Order, key) == value for key, value in order_filter_values(destination, size, order_status).items()]
+
+
+@router.get('/', status_code=status.HTTP_200_OK, response_model=OrderPage)
 def get_all_orders(
         db: db_dependency,
         user: user_dependency,
         destination: str = Query(None, description='Filter by order destination'),
         size: str = Query(None, description='Filter by order size'),
-        order_status: str = Query(None, description='Filter by order status')
+        order_status: str = Query(None, description='Filter by order status'),
+        order_by: str = Query('id', pattern='^(id|updated_at)$', description='Sort key: id or updated_at'),
+        cursor: str = Query(None, description='Opaque cursor returned as next_cursor by the previous page'),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description='Maximum number of orders per page'),
+        window_from: datetime = Query(None, description='Only orders whose delivery window ends after this time'),
+        window_to: datetime = Query(None, description='Only orders whose delivery window starts before this time'),
+        due_from: datetime = Query(None, description='Only orders whose delivery window ends at or after this time'),
+        due_to: datetime = Query(None, description='Only orders whose delivery window ends before this time'),
+        include_archived: bool = Query(False, description='Also return completed and failed orders moved to the archive'),
+        q: str = Query(None, min_length=1, max_length=100, description='Search destinations by prefix, allowing typos; ranks the best matches first'),
+        fields: str = Query(None, description='Comma-separated order fields to return, e.g. id,status,vehicle_id'),
+        if_none_match: str = Header(None)
     ):
-    """Retrieve a list of all orders, with optional filters (destination, size, status)."""
-    query = db.query(Order)
-    filters = {
-        'destination': destination,
-        'size': size,
-        'status': order_status
-    }
+    """Retrieve a page of orders, with optional filters (destination, size, status, delivery window) or a destination search."""
+    if q is not None and include_archived:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Search cannot be combined with include_archived.'
+        )
+    names = sparse_fields(OrderResponse, fields)
+    window_from, window_to, due_from, due_to = map(naive_utc, (window_from, window_to, due_from, due_to))
+    params = dict(
+        order_by=order_by, cursor=cursor, limit=limit,
+        window_from=window_from, window_to=window_to, due_from=due_from, due_to=due_to,
+        include_archived=include_archived, q=q, fields=names
+    )
+    cache_key = response_cache.key('orders', order_filter_values(destination, size, order_status), **params)
+    generation = response_cache.generation('orders')
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached_response(cached, if_none_match)
+
+    # The ETag aggregate leaves out the overlap condition: a change anywhere in
+    # the wider set still alters it, and the remaining filters have indexes.
+    filters = order_filters(destination, size, order_status) + due_filters(due_from, due_to)
+    count, max_updated_at = db.execute(collection_statement(Order, filters)).one()
+    etag = collection_etag(
+        Order, count, max_updated_at, destination=destination, size=size, order_status=order_status, **params
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    columns = projection_columns(Order, names, 'id', order_by)
+    if q is not None:
+        rows, next_cursor = search_page(db, q, columns, filters, window_from, window_to, cursor, limit)
+    else:
+        rows, next_cursor = order_page(db, columns, filters, window_from, window_to, order_by, cursor, limit)
+    if include_archived:
+        archived_rows = project_rows(collect_archived(
+            db.execute(archive_parts_statement(order_by, cursor)).all(),
+            archived_matcher(
+                order_filter_values(destination, size, order_status), due_from, due_to, window_from, window_to
+            ),
+            order_by, cursor, limit
+        ), columns)
+        rows, next_cursor = merge_pages(rows, next_cursor, archived_rows, order_by, limit)
+
+    page = render_page(rows, names, next_cursor)
+    set_etag(page, etag)
+    response_cache.set(cache_key, CachedPage(etag, page.body), generation)
+    return page
+
 
-    for key, value in filters.items():
-        if value is not None:
-            query = query.filter(getattr(Order, key) == value)
+@router.get('/export', status_code=status.HTTP_200_OK, response_class=StreamingResponse)
+def export_orders(
+        db: db_dependency,
+        user: user_dependency,
+        destination: str = Query(None, description='Filter by order destination'),
+        size: str = Query(None, description='Filter by order size'),
+        order_status: str = Query(None, description='Filter by order status'),
+        export_format: str = Query('ndjson', alias='format', pattern='^(ndjson|csv)$', description='Export format: ndjson or csv')
+    ):
+    """Stream every matching order as NDJSON or CSV without buffering the full result."""
+    statement = (
+        select(*EXPORT_COLUMNS)
+        .where(*order_filters(destination, size, order_status))
+        .order_by(Order.id)
+    )
 
-    return query.all()
+    return StreamingResponse(
+        stream_rows(db.get_bind(), statement, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={'Content-Disposition': f'attachment; filename="orders.{export_format}"'}
+    )
 
 
 @router.get('/{order_id}', status_code=status.HTTP_200_OK, response_model=OrderResponse)
-def get_order_by_id(db: db_dependency, user: user_dependency, order_id: int = Path(gt=0)):
+def get_order_by_id(
+        db: db_dependency,
+        user: user_dependency,
+        order_id: int = Path(gt=0),
+        include_archived: bool = Query(False, description='Also look the order up in the archive'),
+        fields: str = Query(None, description='Comma-separated order fields to return, e.g. id,status,vehicle_id'),
+        if_none_match: str = Header(None)
+    ):
     """Retrieve details of a specific order by its ID."""
-    target_order = db.get(Order, order_id)
+    names = sparse_fields(OrderResponse, fields)
+    if if_none_match:
+        updated_at = db.scalar(version_statement(Order, order_id))
+        if updated_at is not None:
+            etag = resource_etag(Order, order_id, updated_at)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+
+    columns = projection_columns(Order, names, 'updated_at')
+    target_order = db.execute(select(*columns).where(Order.id == order_id)).first()
+    if target_order is None and include_archived:
+        archived_order = get_archived_order(db, order_id)
+        if archived_order is not None:
+            target_order, = project_rows([archived_order], columns)
+            etag = resource_etag(Order, order_id, target_order.updated_at)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
 
     if target_order is None:
         raise HTTPException(
@@ -45,7 +265,9 @@ def get_order_by_id(db: db_dependency, user: user_dependency, order_id: int = Pa
             detail='The specified order could not be found.'
         )
 
-    return target_order
+    response = render_row(target_order, names)
+    set_etag(response, resource_etag(Order, order_id, target_order.updated_at))
+    return response
 
 
 @router.post('/', status_code=status.HTTP_201_CREATED, response_model=OrderResponse)
@@ -57,29 +279,137 @@ def add_order(db: db_dependency, user: user_dependency, order_request: OrderRequ
             detail='You are not authorized to perform this action.'
         )
 
-    assigned_vehicle = None
-    if order_request.vehicle_id is not None:
-        assigned_vehicle = db.query(Vehicle).filter(Vehicle.id == order_request.vehicle_id).first()
-        if assigned_vehicle is None:
+    try:
+        new_order = db.execute(insert_order_statement(order_request)).one()
+    except IntegrityError as error:
+        db.rollback()
+        if violation(error) != FOREIGN_KEY_VIOLATION:
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='The specified vehicle could not be found.'
+        )
+
+    current = row_values(new_order, ORDER_CACHE_COLUMNS)
+    record_change(db, 'orders', None, current)
+    event = order_event(new_order, event_driver_id(db, new_order.vehicle_id))
+    log_change(db, 'orders', 'insert', new_order.id)
+    db.commit()
+    response_cache.invalidate('orders', current)
+    event_broker.publish('order.created', event)
+
+    return new_order
+
+
+async def read_bulk_orders(request: Request) -> list:
+    """Parse a bulk order body sent either as a JSON array or as NDJSON."""
+    body = await request.body()
+
+    if request.headers.get('content-type', '').startswith('application/x-ndjson'):
+        items = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                items.append(None)
+    else:
+        try:
+            items = json.loads(body)
+        except ValueError:
+            items = None
+        if not isinstance(items, list):
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail='The specified vehicle could not be found.'
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail='The request body must be a JSON array or NDJSON.'
             )
 
-    new_order = Order(
-        destination=order_request.destination,
-        size=order_request.size,
-        priority=order_request.priority,
-        delivery_window_start=order_request.delivery_window_start,
-        delivery_window_end=order_request.delivery_window_end,
-        status=order_request.status,
-        vehicle_id=order_request.vehicle_id
+    if len(items) > MAX_BULK_ORDERS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f'A bulk request may contain at most {MAX_BULK_ORDERS} orders.'
+        )
+
+    return items
+
+
+def _validation_detail(error: ValidationError) -> str:
+    return '; '.join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" if item['loc'] else item['msg']
+        for item in error.errors()
     )
-    db.add(new_order)
+
+
+@router.post('/bulk', status_code=status.HTTP_200_OK, response_model=BulkOrderResponse)
+def add_orders_bulk(
+        db: db_dependency,
+        user: user_dependency,
+        items: Annotated[list, Depends(read_bulk_orders)],
+        chunk_size: int = Query(BULK_CHUNK_SIZE, ge=1, le=10000, description='Number of rows per INSERT statement')
+    ):
+    """Create many orders at once, reporting invalid rows without rejecting the batch (admin only)."""
+    if user.role != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail='You are not authorized to perform this action.'
+        )
+
+    sizes = set(Order.__table__.c.size.type.enums)
+    statuses = set(Order.__table__.c.status.type.enums)
+    rows, errors = [], []
+
+    for index, item in enumerate(items):
+        if item is None:
+            errors.append({'index': index, 'detail': 'Invalid JSON.'})
+            continue
+        try:
+            order_request = OrderRequest.model_validate(item)
+        except ValidationError as error:
+            errors.append({'index': index, 'detail': _validation_detail(error)})
+            continue
+
+        if order_request.size not in sizes:
+            errors.append({'index': index, 'detail': f"Unknown order size '{order_request.size}'."})
+            continue
+        if order_request.status not in statuses:
+            errors.append({'index': index, 'detail': f"Unknown order status '{order_request.status}'."})
+            continue
+
+        rows.append((index, order_values(order_request)))
+
+    vehicle_ids = {row['vehicle_id'] for _, row in rows if row['vehicle_id'] is not None}
+    if vehicle_ids:
+        existing = set(db.scalars(select(Vehicle.id).where(Vehicle.id.in_(vehicle_ids))))
+        missing = [index for index, row in rows if row['vehicle_id'] is not None and row['vehicle_id'] not in existing]
+        errors.extend({'index': index, 'detail': 'The specified vehicle could not be found.'} for index in missing)
+        rows = [(index, row) for index, row in rows if row['vehicle_id'] is None or row['vehicle_id'] in existing]
+
+    # SQLite has no insert sentinel support, so sort_by_parameter_order falls back to
+    # one INSERT per row. SQLite assigns ids of a multi-row INSERT in VALUES
+    # order under its write lock, so sorting the returned ids is equivalent.
+    ordered = db.get_bind().dialect.name != 'sqlite'
+    statement = insert(Order).returning(Order.id, Order.vehicle_id, Order.status, sort_by_parameter_order=ordered)
+    created = []
+    for start in range(0, len(rows), chunk_size):
+        chunk = [row for _, row in rows[start:start + chunk_size]]
+        chunk_rows = db.execute(statement, chunk).all()
+        created.extend(chunk_rows if ordered else sorted(chunk_rows, key=lambda row: row.id))
+    order_ids = [row.id for row in created]
+    adjust_summary(db, 'orders', ((row, 1) for _, row in rows))
+    drivers = event_driver_ids(db, (row.vehicle_id for row in created))
+    log_changes(db, 'orders', 'insert', order_ids)
     db.commit()
-    db.refresh(new_order)
+    if rows:
+        distinct_rows = {tuple(row[column] for column in ORDER_CACHE_COLUMNS): row for _, row in rows}
+        response_cache.invalidate('orders', *distinct_rows.values())
+    if event_broker.watching():
+        for row in created:
+            event_broker.publish('order.created', order_event(row, drivers.get(row.vehicle_id)))
 
-    return new_order
+    errors.sort(key=lambda error: error['index'])
+
+    return {'created': len(order_ids), 'order_ids': order_ids, 'errors': errors}
 
 
 @router.put('/{order_id}/status', status_code=status.HTTP_200_OK, response_model=OrderResponse)
@@ -108,11 +438,17 @@ def update_order_status(
             detail= f"Order status is already set to '{target_order.status}'."
         )
 
-    target_order.status = status_request.order_status
+    previous = row_values(target_order, ORDER_CACHE_COLUMNS)
+    updated_order = db.execute(update_order_statement(order_id, status=status_request.order_status)).one()
+    current = row_values(updated_order, ORDER_CACHE_COLUMNS)
+    record_change(db, 'orders', previous, current)
+    event = order_event(updated_order, event_driver_id(db, updated_order.vehicle_id))
+    log_change(db, 'orders', 'update', order_id)
     db.commit()
-    db.refresh(target_order)
+    response_cache.invalidate('orders', previous, current)
+    event_broker.publish('order.status_changed', event, {'status': previous['status']})
 
-    return target_order
+    return updated_order
 
 
 @router.delete('/{order_id}', status_code=status.HTTP_204_NO_CONTENT)
@@ -131,5 +467,12 @@ def delete_order(db: db_dependency, user: user_dependency, order_id: int = Path(
             detail='The specified order could not be found.'
         )
 
+    previous = row_values(target_order, ORDER_CACHE_COLUMNS)
+    record_change(db, 'orders', previous, None)
+    event = order_event(target_order, event_driver_id(db, target_order.vehicle_id))
     db.delete(target_order)
-    db.commit()
\ No newline at end of file
+    db.flush()
+    log_change(db, 'orders', 'delete', order_id)
+    db.commit()
+    response_cache.invalidate('orders', previous)
+    event_broker.publish('order.deleted', event)
\ No newline at end of file
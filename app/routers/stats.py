@@ -0,0 +1,18 @@
+from app.schemas.stats import StatsResponse
+from app.core.stats import read_summary
+from fastapi import APIRouter
+from app.database import db_dependency
+from starlette import status
+from app.dependencies import user_dependency
+
+
+router = APIRouter(
+    prefix='/stats',
+    tags=['Stats']
+)
+
+
+@router.get('/', status_code=status.HTTP_200_OK, response_model=StatsResponse)
+def get_stats(db: db_dependency, user: user_dependency):
+    """Retrieve order counts by status, size and destination and vehicle counts by status and type."""
+    return read_summary(db)
@@ -0,0 +1,101 @@
+from app.core.events import event_broker, sse_frame, Subscription, STREAM_HEARTBEAT_SECONDS
+from app.core.security import get_current_user
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette import status
+from app.dependencies import user_dependency
+import asyncio
+
+
+router = APIRouter(
+    prefix='/stream',
+    tags=['Stream']
+)
+
+
+async def sse_events(filters: dict, heartbeat: float = STREAM_HEARTBEAT_SECONDS):
+    """Yield queued events as SSE frames, batching whatever has piled up into one write.
+
+    The subscription is opened on first iteration, so a client that leaves
+    before the body starts streaming never leaves one behind.
+    """
+    subscription = event_broker.subscribe(**filters)
+    try:
+        yield b'retry: 3000\n\n'
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), heartbeat)
+            except TimeoutError:
+                yield b': keepalive\n\n'
+                continue
+
+            frames = []
+            while event is not None:
+                frames.append(sse_frame(event))
+                event = subscription.queue.get_nowait() if not subscription.queue.empty() else None
+            if frames:
+                yield b''.join(frames)
+            if subscription.dropped:
+                yield b'event: dropped\ndata: {}\n\n'
+                return
+    finally:
+        event_broker.unsubscribe(subscription)
+
+
+@router.get('/', status_code=status.HTTP_200_OK, response_class=StreamingResponse)
+async def stream_events(
+        user: user_dependency,
+        vehicle_id: int = Query(None, description='Only events for this vehicle'),
+        driver_id: int = Query(None, description='Only events for vehicles of this driver and their orders'),
+        event_status: str = Query(None, alias='status', description='Only events entering or leaving this status')
+):
+    """Push order and vehicle changes as Server-Sent Events."""
+    return StreamingResponse(
+        sse_events({'vehicle_id': vehicle_id, 'driver_id': driver_id, 'status': event_status}),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+async def _forward(websocket: WebSocket, subscription: Subscription) -> None:
+    while (event := await subscription.get()) is not None:
+        await websocket.send_text(event.payload.decode())
+    await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+
+
+async def _wait_for_disconnect(websocket: WebSocket) -> None:
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+
+
+@router.websocket('/ws')
+async def stream_events_websocket(
+        websocket: WebSocket,
+        token: str = Query(..., description='Access token; browsers cannot set headers on WebSocket requests'),
+        vehicle_id: int = Query(None),
+        driver_id: int = Query(None),
+        event_status: str = Query(None, alias='status')
+):
+    """Push order and vehicle changes as JSON WebSocket messages."""
+    try:
+        await run_in_threadpool(get_current_user, token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscription = event_broker.subscribe(vehicle_id=vehicle_id, driver_id=driver_id, status=event_status)
+    tasks = {
+        asyncio.create_task(_forward(websocket, subscription)),
+        asyncio.create_task(_wait_for_disconnect(websocket)),
+    }
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        event_broker.unsubscribe(subscription)
@@ -0,0 +1,104 @@
+from app.schemas.telemetry import TelemetryPing, TelemetryAccepted, PositionResponse, TrackPoint, TrackResponse
+from app.core.telemetry import telemetry_buffer, Ping
+from app.core.downsampling import track_resolution, track_statement
+from app.core.intervals import naive_utc
+from app.core.responses import render_row, render_json
+from app.core.metrics import registry
+from fastapi import APIRouter, HTTPException, Path, Query, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
+from app.database import db_dependency
+from starlette import status
+from app.dependencies import user_dependency
+from app.models import Vehicle, utc_now
+from sqlalchemy import select
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+router = APIRouter(
+    prefix='/vehicles',
+    tags=['Telemetry']
+)
+
+MAX_TELEMETRY_PINGS = int(os.getenv('MAX_TELEMETRY_PINGS', 10_000))
+POSITION_FIELDS = tuple(PositionResponse.model_fields)
+TRACK_FIELDS = tuple(TrackPoint.model_fields)
+DEFAULT_TRACK_SPAN = timedelta(hours=1)
+
+_pings = TypeAdapter(list[TelemetryPing])
+
+
+@router.post('/telemetry', status_code=status.HTTP_202_ACCEPTED, response_model=TelemetryAccepted,
+             openapi_extra={'requestBody': {'content': {'application/json': {'schema': _pings.json_schema()}}}})
+async def ingest_telemetry(request: Request, user: user_dependency):
+    """Accept a JSON array of location pings; they are written to the database in batches (admin only)."""
+    if user.role != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail='You are not authorized to perform this action.'
+        )
+
+    # Parsing and validating the raw body in one pydantic call skips the
+    # intermediate Python objects a declared body parameter would build.
+    try:
+        pings = _pings.validate_json(await request.body())
+    except ValidationError as error:
+        raise RequestValidationError(error.errors(include_url=False))
+    if len(pings) > MAX_TELEMETRY_PINGS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f'A telemetry request may contain at most {MAX_TELEMETRY_PINGS} pings.'
+        )
+
+    telemetry_buffer.add(
+        Ping(ping.vehicle_id, naive_utc(ping.recorded_at), ping.latitude, ping.longitude, ping.speed_kmh, ping.heading)
+        for ping in pings
+    )
+    registry.inc('logitrack_telemetry_pings_total', len(pings), result='accepted')
+    return {'accepted': len(pings)}
+
+
+@router.get('/{vehicle_id}/position', status_code=status.HTTP_200_OK, response_model=PositionResponse)
+def get_vehicle_position(db: db_dependency, user: user_dependency, vehicle_id: int = Path(gt=0)):
+    """Retrieve the latest reported position of a vehicle."""
+    position = telemetry_buffer.current_position(db, vehicle_id)
+    if position is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='No position has been reported for this vehicle.'
+        )
+    return render_row(position, POSITION_FIELDS)
+
+
+@router.get('/{vehicle_id}/track', status_code=status.HTTP_200_OK, response_model=TrackResponse)
+def get_vehicle_track(
+        db: db_dependency,
+        user: user_dependency,
+        vehicle_id: int = Path(gt=0),
+        start: datetime = Query(None, description='Start of the range; defaults to an hour before its end'),
+        end: datetime = Query(None, description='End of the range; defaults to now')
+):
+    """Retrieve a vehicle's track, read from raw pings, 1-minute or 15-minute rollups depending on the range."""
+    end = naive_utc(end) or utc_now().replace(tzinfo=None)
+    start = naive_utc(start) or end - DEFAULT_TRACK_SPAN
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='The start of the range must be before its end.'
+        )
+    if db.scalar(select(Vehicle.id).where(Vehicle.id == vehicle_id)) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='The specified vehicle could not be found.'
+        )
+
+    resolution = track_resolution(start, end)
+    rows = db.execute(track_statement(resolution, vehicle_id, start, end)).all()
+    return render_json({
+        'vehicle_id': vehicle_id,
+        'resolution': resolution.name,
+        'points': [dict(zip(TRACK_FIELDS, row)) for row in rows]
+    })
@@ -1,11 +1,18 @@
 from app.schemas.user import UserResponse, UpdateUserRequest, UpdateRoleRequest, PasswordRequest
 from app.schemas.common import MessageResponse
-from app.core.security import bcrypt_context
+from app.core.security import revoke_tokens, token_versions
+from app.core.passwords import password_hasher
 from app.dependencies import user_dependency
 from app.database import db_dependency
 from starlette import status
-from app.models import User
-from fastapi import APIRouter, HTTPException, Path
+from app.core.cache import response_cache
+from app.models import User, Vehicle, Order
+from app.core.stats import summary_rows_statement, adjust_summary, removed_rows
+from app.core.changes import log_change, log_changes
+from app.core.purge import purge_orders, run_purge
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Path, Query, Response
+from sqlalchemy import select, delete
+from sqlalchemy.orm import Session
 
 
 router = APIRouter(
@@ -13,6 +20,53 @@ router = APIRouter(
     tags=['Users']
 )
 
+
+def remove_user_rows(db: Session, user_id: int) -> tuple[list[int], list[int], list[dict]]:
+    """Take the user's vehicles and their orders out of the summary counts before the cascade deletes them.
+
+    Returns the vehicle and order ids, for log_user_removal once the rows are
+    gone, and the dimension values of the orders for cache invalidation.
+    """
+    user_vehicles = Order.vehicle_id.in_(select(Vehicle.id).where(Vehicle.driver_id == user_id))
+    vehicle_ids = db.scalars(select(Vehicle.id).where(Vehicle.driver_id == user_id)).all()
+    if not vehicle_ids:
+        return [], [], []
+    order_ids = db.scalars(select(Order.id).where(user_vehicles)).all()
+    vehicle_rows = db.execute(summary_rows_statement('vehicles', Vehicle.driver_id == user_id)).all()
+    order_rows = db.execute(summary_rows_statement('orders', user_vehicles)).all() if order_ids else []
+    adjust_summary(db, 'vehicles', removed_rows(vehicle_rows))
+    adjust_summary(db, 'orders', removed_rows(order_rows))
+    return vehicle_ids, order_ids, [dict(row._mapping) for row in order_rows]
+
+
+def log_user_removal(db: Session, user_id: int, vehicle_ids: list[int], order_ids: list[int]) -> None:
+    """Log the removal of the user, their vehicles and their orders; the last step before the commit."""
+    log_changes(db, 'orders', 'delete', order_ids)
+    log_changes(db, 'vehicles', 'delete', vehicle_ids)
+    log_change(db, 'users', 'delete', user_id)
+
+
+def delete_user_statement(user_id: int):
+    """DELETE the user; ON DELETE CASCADE removes their vehicles and those vehicles' orders inside the database."""
+    return delete(User).where(User.id == user_id).execution_options(synchronize_session=False)
+
+
+def purge_user(db: Session, user_id: int) -> None:
+    """Background delete: remove the user's orders in committed batches, then their vehicles and the user."""
+    purge_orders(db, Order.vehicle_id.in_(select(Vehicle.id).where(Vehicle.driver_id == user_id)))
+    vehicle_ids, order_ids, order_rows = remove_user_rows(db, user_id)
+    db.execute(delete_user_statement(user_id))
+    log_user_removal(db, user_id, vehicle_ids, order_ids)
+    db.commit()
+    invalidate_user_listings(user_id, order_rows)
+
+
+def invalidate_user_listings(user_id: int, order_rows: list[dict]) -> None:
+    response_cache.invalidate('vehicles', {'driver_id': user_id})
+    if order_rows:
+        response_cache.invalidate('orders', *order_rows)
+
+
 @router.get('/me', status_code=status.HTTP_200_OK, response_model=UserResponse)
 def get_me(user: user_dependency):
     """Retrieve details of the currently authenticated user."""
@@ -41,14 +95,19 @@ def get_user_by_id(db: db_dependency, user: user_dependency, user_id: int = Path
 @router.put('/password', status_code=status.HTTP_200_OK, response_model=MessageResponse)
 def update_user_password(db: db_dependency, user: user_dependency, update_request: UpdateUserRequest):
     """Update the password of the currently authenticated user."""
-    if not bcrypt_context.verify(update_request.old_password, user.hashed_password):
+    me = db.get(User, user.id)
+    if me is None or not password_hasher.verify(update_request.old_password, me.hashed_password)[0]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail='The old password you entered is incorrect.'
         )
 
-    user.hashed_password = bcrypt_context.hash(update_request.new_password)
+    me.hashed_password = password_hasher.hash(update_request.new_password)
+    token_version = revoke_tokens(db, me)
+    db.flush()
+    log_change(db, 'users', 'update', me.id)
     db.commit()
+    token_versions.record(me.id, token_version)
 
     return MessageResponse(
         status='success',
@@ -77,10 +136,15 @@ def update_user_role(
         )
 
     target_user.role = update_request.role
+    token_version = revoke_tokens(db, target_user)
+    db.flush()
+    log_change(db, 'users', 'update', user_id)
+    # Serialize before the commit expires the instance, instead of reloading it after.
+    updated_user = UserResponse.model_validate(target_user)
     db.commit()
-    db.refresh(target_user)
+    token_versions.record(user_id, token_version)
 
-    return target_user
+    return updated_user
 
 
 @router.delete('/me', status_code=status.HTTP_204_NO_CONTENT)
@@ -88,18 +152,30 @@ def delete_me(db: db_dependency, user: user_dependency, password_request: Passwo
     """Delete the account of the currently authenticated user."""
     me = db.get(User, user.id)
 
-    if not bcrypt_context.verify(password_request.password, user.hashed_password):
+    if me is None or not password_hasher.verify(password_request.password, me.hashed_password)[0]:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='The password you entered is incorrect.'
         )
 
-    db.delete(me)
+    vehicle_ids, order_ids, order_rows = remove_user_rows(db, user.id)
+    revoke_tokens(db, me, deleted=True)
+    db.execute(delete_user_statement(user.id))
+    db.flush()
+    log_user_removal(db, user.id, vehicle_ids, order_ids)
     db.commit()
+    token_versions.record(user.id, None)
+    invalidate_user_listings(user.id, order_rows)
 
 
 @router.delete('/{user_id}', status_code=status.HTTP_204_NO_CONTENT)
-def delete_user_by_id(db: db_dependency, user: user_dependency, user_id: int = Path(gt=0)):
+def delete_user_by_id(
+        db: db_dependency,
+        user: user_dependency,
+        background_tasks: BackgroundTasks,
+        user_id: int = Path(gt=0),
+        background: bool = Query(False, description='Revoke access and respond 202 at once, then delete the orders in batches')
+    ):
     """Delete a user by their ID (admin only)."""
     target_user = db.get(User, user_id)
 
@@ -114,5 +190,18 @@ def delete_user_by_id(db: db_dependency, user: user_dependency, user_id: int = P
             detail='You are not authorized to perform this action.'
         )
 
-    db.delete(target_user)
+    if background:
+        revoke_tokens(db, target_user, deleted=True)
+        db.commit()
+        token_versions.record(user_id, None)
+        background_tasks.add_task(run_purge, db.get_bind(), purge_user, user_id)
+        return Response(status_code=status.HTTP_202_ACCEPTED)
+
+    vehicle_ids, order_ids, order_rows = remove_user_rows(db, user_id)
+    revoke_tokens(db, target_user, deleted=True)
+    db.execute(delete_user_statement(user_id))
+    db.flush()
+    log_user_removal(db, user_id, vehicle_ids, order_ids)
     db.commit()
+    token_versions.record(user_id, None)
+    invalidate_user_listings(user_id, order_rows)
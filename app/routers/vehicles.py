@@ -1,9 +1,29 @@
-from app.schemas.vehicle import VehicleResponse, VehicleRequest, VehicleStatusRequest, VehicleDriverRequest
-from fastapi import APIRouter, HTTPException, Path, Query
+from app.schemas.vehicle import (
+    VehicleResponse, VehicleRequest, VehicleStatusRequest, VehicleDriverRequest, VehiclePage, VehicleWithOrdersPage,
+    VehicleOrderPage
+)
+from app.schemas.order import OrderResponse
+from app.core.pagination import paginate, split_page, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core.responses import response_columns, render_page, render_row, render_json, sparse_fields, projection_columns
+from app.core.cache import response_cache, row_values, cached_response, CachedPage
+from app.core.stats import record_change, summary_rows_statement, adjust_summary, removed_rows
+from app.core.events import event_broker, vehicle_event
+from app.core.changes import log_change, log_changes
+from app.core.constraints import violation, UNIQUE_VIOLATION
+from app.core.purge import purge_orders, run_purge
+from app.core.dispatch import SIZE_WEIGHTS_KG, LOADED_STATUSES
+from app.core.etags import (
+    resource_etag, collection_etag, version_statement, collection_statement, etag_matches, not_modified, set_etag
+)
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Path, Query, Header, Response
 from app.database import db_dependency
 from starlette import status
-from app.models import Vehicle, User
+from app.models import Vehicle, User, Order, utc_now
 from app.dependencies import user_dependency
+from sqlalchemy import select, insert, update, delete, literal, exists, case, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from collections import defaultdict
 
 
 router = APIRouter(
@@ -11,8 +31,184 @@ router = APIRouter(
     tags=['Vehicles']
 )
 
+VEHICLE_COLUMNS = response_columns(Vehicle, VehicleResponse)
+VEHICLE_CACHE_COLUMNS = ('driver_id', 'type', 'capacity_kg', 'status')
+
+ORDER_FIELDS = tuple(OrderResponse.model_fields)
+ORDER_COLUMNS = response_columns(Order, OrderResponse)
+DEFAULT_ORDERS_PER_VEHICLE = 10
+
+# What an order adds to its vehicle's current load: the weight of its size
+# while it is pending or in transit, nothing once it is delivered or failed.
+LOADED_WEIGHT = case(
+    (Order.status.in_(LOADED_STATUSES), case(SIZE_WEIGHTS_KG, value=Order.size, else_=0)),
+    else_=0
+)
+
+
+def vehicle_filter_values(driver_id: int = None, vehicle_type: str = None, capacity_kg: int = None,
+                          vehicle_status: str = None) -> dict:
+    """Map the vehicle list filters that were given to the columns they compare."""
+    filters = {
+        'driver_id': driver_id,
+        'type': vehicle_type,
+        'capacity_kg': capacity_kg,
+        'status': vehicle_status
+    }
+    return {key: value for key, value in filters.items() if value is not None}
+
+
+def vehicle_filters(driver_id: int = None, vehicle_type: str = None, capacity_kg: int = None,
+                    vehicle_status: str = None) -> list:
+    """Build the WHERE clauses shared by the vehicle list endpoints."""
+    filter_values = vehicle_filter_values(driver_id, vehicle_type, capacity_kg, vehicle_status)
+    return [getattr(Vehicle, key) == value for key, value in filter_values.items()]
+
+
+def driver_condition(driver_id: int):
+    """Whether `driver_id` names a user with the driver role, which a foreign key cannot express."""
+    return exists().where(User.id == driver_id, User.role == 'driver')
+
+
+def insert_vehicle_statement(vehicle_request: VehicleRequest):
+    """INSERT ... SELECT ... RETURNING the response columns.
+
+    The SELECT yields no row unless the driver exists, so an empty result
+    means the driver was not found, and a duplicate plate fails the unique
+    index, all in one statement.
+    """
+    now = utc_now()
+    values = {
+        'license_plate': vehicle_request.license_plate,
+        'type': vehicle_request.vehicle_type,
+        'capacity_kg': vehicle_request.capacity_kg,
+        'status': vehicle_request.vehicle_status,
+        'created_at': now,
+        'updated_at': now,
+    }
+    return insert(Vehicle).from_select(
+        [*values, 'driver_id'],
+        select(*(literal(value, getattr(Vehicle, key).type) for key, value in values.items()), User.id)
+        .where(User.id == vehicle_request.driver_id, User.role == 'driver')
+    ).returning(*VEHICLE_COLUMNS)
+
+
+def update_vehicle_statement(vehicle_id: int, *conditions, **values):
+    """UPDATE ... RETURNING the response columns, so the handler needs no refresh after commit."""
+    return (
+        update(Vehicle)
+        .where(Vehicle.id == vehicle_id, *conditions)
+        .values(**values)
+        .returning(*VEHICLE_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def delete_vehicle_statement(vehicle_id: int):
+    """DELETE ... RETURNING the response columns; ON DELETE CASCADE removes the orders inside the database."""
+    return (
+        delete(Vehicle)
+        .where(Vehicle.id == vehicle_id)
+        .returning(*VEHICLE_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def remove_vehicle_rows(db: Session, vehicle_id: int) -> tuple[list[int], list[dict]]:
+    """Take the vehicle's orders out of the summary counts before the cascade deletes them.
+
+    Returns their ids, to log once the vehicle is gone, and their dimension
+    values for cache invalidation.
+    """
+    order_ids = db.scalars(select(Order.id).where(Order.vehicle_id == vehicle_id)).all()
+    if not order_ids:
+        return [], []
+    order_rows = db.execute(summary_rows_statement('orders', Order.vehicle_id == vehicle_id)).all()
+    adjust_summary(db, 'orders', removed_rows(order_rows))
+    return order_ids, [dict(row._mapping) for row in order_rows]
+
+
+def remove_vehicle(db: Session, vehicle_id: int) -> bool:
+    """Delete a vehicle and, through the cascade, its orders, then commit and announce it.
+
+    Neither the vehicle nor its orders are loaded into the session; only the
+    order ids are read, for the change log. Returns False if the vehicle does
+    not exist.
+    """
+    order_ids, order_rows = remove_vehicle_rows(db, vehicle_id)
+    deleted_vehicle = db.execute(delete_vehicle_statement(vehicle_id)).first()
+    if deleted_vehicle is None:
+        db.rollback()
+        return False
+
+    previous = row_values(deleted_vehicle, VEHICLE_CACHE_COLUMNS)
+    record_change(db, 'vehicles', previous, None)
+    log_changes(db, 'orders', 'delete', order_ids)
+    log_change(db, 'vehicles', 'delete', vehicle_id)
+    db.commit()
+    response_cache.invalidate('vehicles', previous)
+    if order_rows:
+        response_cache.invalidate('orders', *order_rows)
+    event_broker.publish('vehicle.deleted', vehicle_event(deleted_vehicle))
+    return True
+
+
+def purge_vehicle(db: Session, vehicle_id: int) -> None:
+    """Background delete: remove the vehicle's orders in committed batches, then the vehicle itself."""
+    purge_orders(db, Order.vehicle_id == vehicle_id)
+    remove_vehicle(db, vehicle_id)
+
+
+def vehicle_orders_statement(vehicle_ids: list[int], limit: int):
+    """The first `limit` + 1 orders of every vehicle in `vehicle_ids` and each vehicle's load, in one query.
+
+    ROW_NUMBER caps the orders per vehicle, which an IN-list eager load such
+    as selectinload cannot, and the extra row tells whether a vehicle has more.
+    The load is a window sum over all of a vehicle's orders, not just those
+    returned.
+    """
+    ranked = select(
+        *ORDER_COLUMNS,
+        func.row_number().over(partition_by=Order.vehicle_id, order_by=Order.id).label('position'),
+        func.sum(LOADED_WEIGHT).over(partition_by=Order.vehicle_id).label('load_kg')
+    ).where(Order.vehicle_id.in_(vehicle_ids)).subquery()
+    return select(ranked).where(ranked.c.position <= limit + 1).order_by(ranked.c.vehicle_id, ranked.c.id)
+
+
+def nest_orders(rows, names: tuple[str, ...], order_rows, limit: int) -> list[dict]:
+    """Render vehicle rows with their orders, the cursor for the rest of them and their load nested inside.
+
+    The cursor continues at GET /vehicles/{vehicle_id}/orders.
+    """
+    orders = defaultdict(list)
+    loads = {}
+    for order in order_rows:
+        orders[order.vehicle_id].append(order)
+        loads[order.vehicle_id] = order.load_kg
+
+    items = []
+    for row in rows:
+        vehicle_orders, orders_next_cursor = split_page(orders[row.id], 'id', limit)
+        items.append({
+            **dict(zip(names, row)),
+            'orders': [dict(zip(ORDER_FIELDS, order)) for order in vehicle_orders],
+            'orders_next_cursor': orders_next_cursor,
+            'load_kg': float(loads.get(row.id, 0))
+        })
+    return items
+
+
+def vehicle_load_statement(vehicle_id: int):
+    """The vehicle's id, its load and the count and latest update of its orders for the ETag; no row if it does not exist."""
+    return (
+        select(Vehicle.id, func.coalesce(func.sum(LOADED_WEIGHT), 0), func.count(Order.id), func.max(Order.updated_at))
+        .outerjoin(Order, Order.vehicle_id == Vehicle.id)
+        .where(Vehicle.id == vehicle_id)
+        .group_by(Vehicle.id)
+    )
 
-@router.get('/', status_code=status.HTTP_200_OK, response_model=list[VehicleResponse])
+
+@router.get('/', status_code=status.HTTP_200_OK, response_model=VehiclePage | VehicleWithOrdersPage)
 def get_all_vehicles(
         db: db_dependency,
         user: user_dependency,
@@ -20,27 +216,76 @@ def get_all_vehicles(
         vehicle_type: str = Query(None, description='Filter by vehicle type'),
         capacity_kg: int = Query(None, description='Filter by vehicle capacity in kg'),
         vehicle_status: str = Query(None, description='Filter by vehicle status'),
+        order_by: str = Query('id', pattern='^(id|updated_at)$', description='Sort key: id or updated_at'),
+        cursor: str = Query(None, description='Opaque cursor returned as next_cursor by the previous page'),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description='Maximum number of vehicles per page'),
+        fields: str = Query(None, description='Comma-separated vehicle fields to return, e.g. id,status,driver_id'),
+        include: str = Query(None, pattern='^orders$', description='Set to orders to nest each vehicle\'s orders and load'),
+        orders_limit: int = Query(DEFAULT_ORDERS_PER_VEHICLE, ge=1, le=MAX_PAGE_SIZE, description='Maximum number of orders nested per vehicle'),
+        if_none_match: str = Header(None)
 ):
-    """Retrieve a list of all vehicles, with optional filters (driver, type, capacity, status)."""
-    query = db.query(Vehicle)
-    filters = {
-        'driver_id': driver_id,
-        'type': vehicle_type,
-        'capacity_kg': capacity_kg,
-        'status': vehicle_status
-    }
+    """Retrieve a page of vehicles, with optional filters (driver, type, capacity, status) and their orders."""
+    names = sparse_fields(VehicleResponse, fields)
+    params = dict(order_by=order_by, cursor=cursor, limit=limit, fields=names)
+    if include is not None:
+        params.update(include=include, orders_limit=orders_limit)
+    # Order writes do not invalidate vehicle listings, so pages with orders
+    # nested skip the cache and are revalidated through the ETag alone.
+    cache_key = response_cache.key(
+        'vehicles', vehicle_filter_values(driver_id, vehicle_type, capacity_kg, vehicle_status), **params
+    )
+    generation = response_cache.generation('vehicles')
+    cached = response_cache.get(cache_key) if include is None else None
+    if cached is not None:
+        return cached_response(cached, if_none_match)
+
+    filters = vehicle_filters(driver_id, vehicle_type, capacity_kg, vehicle_status)
+    count, max_updated_at = db.execute(collection_statement(Vehicle, filters)).one()
+    if include is not None:
+        vehicle_orders = Order.vehicle_id.in_(select(Vehicle.id).where(*filters))
+        params.update(orders=tuple(db.execute(collection_statement(Order, [vehicle_orders])).one()))
+    etag = collection_etag(
+        Vehicle, count, max_updated_at,
+        driver_id=driver_id, vehicle_type=vehicle_type, capacity_kg=capacity_kg, vehicle_status=vehicle_status,
+        **params
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    query = db.query(*projection_columns(Vehicle, names, 'id', order_by)).filter(*filters)
+    rows, next_cursor = paginate(query, Vehicle, order_by, cursor, limit)
 
-    for key, value in filters.items():
-        if value is not None:
-            query = query.filter(getattr(Vehicle, key) == value)
+    if include is not None:
+        order_rows = db.execute(vehicle_orders_statement([row.id for row in rows], orders_limit)).all() if rows else []
+        page = render_json({'items': nest_orders(rows, names, order_rows, orders_limit), 'next_cursor': next_cursor})
+        set_etag(page, etag)
+        return page
 
-    return query.all()
+    page = render_page(rows, names, next_cursor)
+    set_etag(page, etag)
+    response_cache.set(cache_key, CachedPage(etag, page.body), generation)
+    return page
 
 
 @router.get('/{vehicle_id}', status_code=status.HTTP_200_OK, response_model=VehicleResponse)
-def get_vehicle_by_id(db: db_dependency, user: user_dependency, vehicle_id: int = Path(gt=0)):
+def get_vehicle_by_id(
+        db: db_dependency,
+        user: user_dependency,
+        vehicle_id: int = Path(gt=0),
+        fields: str = Query(None, description='Comma-separated vehicle fields to return, e.g. id,status,driver_id'),
+        if_none_match: str = Header(None)
+):
     """Retrieve details of a specific vehicle by its ID."""
-    target_vehicle = db.get(Vehicle, vehicle_id)
+    names = sparse_fields(VehicleResponse, fields)
+    if if_none_match:
+        updated_at = db.scalar(version_statement(Vehicle, vehicle_id))
+        if updated_at is not None:
+            etag = resource_etag(Vehicle, vehicle_id, updated_at)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+
+    statement = select(*projection_columns(Vehicle, names, 'updated_at')).where(Vehicle.id == vehicle_id)
+    target_vehicle = db.execute(statement).first()
 
     if target_vehicle is None:
         raise HTTPException(
@@ -48,7 +293,44 @@ def get_vehicle_by_id(db: db_dependency, user: user_dependency, vehicle_id: int
             detail='The specified vehicle could not be found.'
         )
 
-    return target_vehicle
+    response = render_row(target_vehicle, names)
+    set_etag(response, resource_etag(Vehicle, vehicle_id, target_vehicle.updated_at))
+    return response
+
+
+@router.get('/{vehicle_id}/orders', status_code=status.HTTP_200_OK, response_model=VehicleOrderPage)
+def get_vehicle_orders(
+        db: db_dependency,
+        user: user_dependency,
+        vehicle_id: int = Path(gt=0),
+        order_by: str = Query('id', pattern='^(id|updated_at)$', description='Sort key: id or updated_at'),
+        cursor: str = Query(None, description='Opaque cursor returned as next_cursor by the previous page'),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description='Maximum number of orders per page'),
+        fields: str = Query(None, description='Comma-separated order fields to return, e.g. id,status,vehicle_id'),
+        if_none_match: str = Header(None)
+):
+    """Retrieve a page of the orders assigned to a vehicle, with the vehicle's current load in kg."""
+    names = sparse_fields(OrderResponse, fields)
+    summary = db.execute(vehicle_load_statement(vehicle_id)).first()
+    if summary is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='The specified vehicle could not be found.'
+        )
+
+    _, load_kg, count, max_updated_at = summary
+    etag = collection_etag(
+        Order, count, max_updated_at, vehicle_id=vehicle_id, order_by=order_by, cursor=cursor, limit=limit, fields=names
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    query = db.query(*projection_columns(Order, names, 'id', order_by)).filter(Order.vehicle_id == vehicle_id)
+    rows, next_cursor = paginate(query, Order, order_by, cursor, limit)
+
+    page = render_page(rows, names, next_cursor, load_kg=float(load_kg))
+    set_etag(page, etag)
+    return page
 
 
 @router.post('/', status_code=status.HTTP_201_CREATED, response_model=VehicleResponse)
@@ -60,29 +342,28 @@ def add_vehicle(db: db_dependency, user: user_dependency, vehicle_request: Vehic
             detail='You are not authorized to perform this action.'
         )
 
-    assigned_driver = db.query(User).filter(User.id == vehicle_request.driver_id, User.role == 'driver').first()
-    if assigned_driver is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail='The specified driver could not be found.'
-        )
-
-    if db.query(Vehicle).filter(Vehicle.license_plate == vehicle_request.license_plate).first():
+    try:
+        new_vehicle = db.execute(insert_vehicle_statement(vehicle_request)).first()
+    except IntegrityError as error:
+        db.rollback()
+        if violation(error) != UNIQUE_VIOLATION:
+            raise
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail='A vehicle with this license plate already exists.'
         )
+    if new_vehicle is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='The specified driver could not be found.'
+        )
 
-    new_vehicle = Vehicle(
-        license_plate=vehicle_request.license_plate,
-        type=vehicle_request.vehicle_type,
-        capacity_kg=vehicle_request.capacity_kg,
-        status=vehicle_request.vehicle_status,
-        driver_id=assigned_driver.id
-    )
-    db.add(new_vehicle)
+    current = row_values(new_vehicle, VEHICLE_CACHE_COLUMNS)
+    record_change(db, 'vehicles', None, current)
+    log_change(db, 'vehicles', 'insert', new_vehicle.id)
     db.commit()
-    db.refresh(new_vehicle)
+    response_cache.invalidate('vehicles', current)
+    event_broker.publish('vehicle.created', vehicle_event(new_vehicle))
 
     return new_vehicle
 
@@ -113,11 +394,17 @@ def update_vehicle_status(
             detail= f"Vehicle status is already set to '{target_vehicle.status}'."
         )
 
-    target_vehicle.status = status_request.vehicle_status
+    previous = row_values(target_vehicle, VEHICLE_CACHE_COLUMNS)
+    updated_vehicle = db.execute(update_vehicle_statement(vehicle_id, status=status_request.vehicle_status)).one()
+    current = row_values(updated_vehicle, VEHICLE_CACHE_COLUMNS)
+    record_change(db, 'vehicles', previous, current)
+    log_change(db, 'vehicles', 'update', vehicle_id)
+    event = vehicle_event(updated_vehicle)
     db.commit()
-    db.refresh(target_vehicle)
+    response_cache.invalidate('vehicles', previous, current)
+    event_broker.publish('vehicle.status_changed', event, {'status': previous['status']})
 
-    return target_vehicle
+    return updated_vehicle
 
 
 @router.put('/{vehicle_id}/driver', status_code=status.HTTP_200_OK, response_model=VehicleResponse)
@@ -147,22 +434,34 @@ def change_vehicle_driver(
             detail="This vehicle is already assigned to the specified driver."
         )
 
-    new_driver = db.query(User).filter(User.id == driver_request.driver_id, User.role == 'driver').first()
-    if new_driver is None:
+    previous = row_values(target_vehicle, VEHICLE_CACHE_COLUMNS)
+    updated_vehicle = db.execute(update_vehicle_statement(
+        vehicle_id, driver_condition(driver_request.driver_id), driver_id=driver_request.driver_id
+    )).first()
+    if updated_vehicle is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='The specified driver could not be found.'
         )
 
-    target_vehicle.driver_id = new_driver.id
+    current = row_values(updated_vehicle, VEHICLE_CACHE_COLUMNS)
+    log_change(db, 'vehicles', 'update', vehicle_id)
+    event = vehicle_event(updated_vehicle)
     db.commit()
-    db.refresh(target_vehicle)
+    response_cache.invalidate('vehicles', previous, current)
+    event_broker.publish('vehicle.driver_changed', event, {'driver_id': previous['driver_id']})
 
-    return target_vehicle
+    return updated_vehicle
 
 
 @router.delete('/{vehicle_id}', status_code=status.HTTP_204_NO_CONTENT)
-def delete_vehicle(db: db_dependency, user: user_dependency, vehicle_id: int = Path(gt=0)):
+def delete_vehicle(
+        db: db_dependency,
+        user: user_dependency,
+        background_tasks: BackgroundTasks,
+        vehicle_id: int = Path(gt=0),
+        background: bool = Query(False, description='Respond 202 at once and delete the orders in batches first')
+    ):
     """Delete a vehicle by its ID (admin only)."""
     if user.role != 'admin':
         raise HTTPException(
@@ -170,12 +469,17 @@ def delete_vehicle(db: db_dependency, user: user_dependency, vehicle_id: int = P
             detail='You are not authorized to perform this action.'
         )
 
-    target_vehicle = db.get(Vehicle, vehicle_id)
-    if target_vehicle is None:
+    if background:
+        if db.scalar(select(Vehicle.id).where(Vehicle.id == vehicle_id)) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail='The specified vehicle could not be found.'
+            )
+        background_tasks.add_task(run_purge, db.get_bind(), purge_vehicle, vehicle_id)
+        return Response(status_code=status.HTTP_202_ACCEPTED)
+
+    if not remove_vehicle(db, vehicle_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='The specified vehicle could not be found.'
         )
-
-    db.delete(target_vehicle)
-    db.commit()
\ No newline at end of file
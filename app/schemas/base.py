@@ -1,9 +1,18 @@
-from pydantic import BaseModel, field_serializer
+from pydantic import BaseModel, PlainSerializer
 from datetime import datetime
+from typing import Annotated
+
+DATE_FORMAT = "%b %d, %Y %I:%M %p"
+
+
+def format_datetime(value: datetime) -> str:
+    return value.strftime(DATE_FORMAT)
+
+
+# Formatting is attached to the datetime fields only, so the other fields of a
+# response keep pydantic's native serializers.
+FormattedDatetime = Annotated[datetime, PlainSerializer(format_datetime, return_type=str, when_used="json")]
+
 
 class BaseModelWithDateFormatting(BaseModel):
-    @field_serializer("*", when_used="json")
-    def serialize_datetime(self, value, _info):
-        if isinstance(value, datetime):
-            return value.strftime("%b %d, %Y %I:%M %p")
-        return value
\ No newline at end of file
+    """Base for response models; declare datetime fields as FormattedDatetime."""
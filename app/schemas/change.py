@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from app.schemas.base import FormattedDatetime
+from typing import Optional
+
+
+class ChangeResponse(BaseModel):
+    seq: int
+    entity: str
+    entity_id: int
+    operation: str
+    changed_at: FormattedDatetime
+    data: Optional[dict]
+
+
+class ChangePage(BaseModel):
+    items: list[ChangeResponse]
+    next_since: int
+    latest_seq: int
@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+
+class DispatchAssignment(BaseModel):
+    order_id: int
+    vehicle_id: int
+
+
+class DispatchResponse(BaseModel):
+    dry_run: bool
+    assigned: int
+    assignments: list[DispatchAssignment]
+    unassigned_order_ids: list[int]
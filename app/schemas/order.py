@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, constr, field_validator
-from app.schemas.base import BaseModelWithDateFormatting
+from app.schemas.base import BaseModelWithDateFormatting, FormattedDatetime
 from datetime import datetime
 from typing import Optional
 
@@ -27,14 +27,33 @@ class OrderStatusRequest(BaseModel):
 
 class OrderResponse(BaseModelWithDateFormatting):
     id: int
-    updated_at: datetime
+    updated_at: FormattedDatetime
     destination: str
     size: str
     priority: bool
-    delivery_window_start: datetime
-    delivery_window_end: datetime
+    delivery_window_start: FormattedDatetime
+    delivery_window_end: FormattedDatetime
     status: str
     vehicle_id: Optional[int]
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class OrderPage(BaseModel):
+    items: list[OrderResponse]
+    next_cursor: Optional[str]
+
+    class Config:
+        from_attributes = True
+
+
+class BulkOrderError(BaseModel):
+    index: int
+    detail: str
+
+
+class BulkOrderResponse(BaseModel):
+    created: int
+    order_ids: list[int]
+    errors: list[BulkOrderError]
\ No newline at end of file
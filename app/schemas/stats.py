@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+
+
+class OrderStats(BaseModel):
+    total: int
+    status: dict[str, int]
+    size: dict[str, int]
+    destination: dict[str, int]
+
+
+class VehicleStats(BaseModel):
+    total: int
+    status: dict[str, int]
+    type: dict[str, int]
+
+
+class StatsResponse(BaseModel):
+    orders: OrderStats
+    vehicles: VehicleStats
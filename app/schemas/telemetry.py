@@ -0,0 +1,43 @@
+from pydantic import BaseModel, Field
+from app.schemas.base import BaseModelWithDateFormatting, FormattedDatetime
+from datetime import datetime
+from typing import Optional
+
+
+class TelemetryPing(BaseModel):
+    vehicle_id: int = Field(gt=0, examples=[1])
+    recorded_at: datetime = Field(examples=['2025-12-12T10:00:05Z'])
+    latitude: float = Field(ge=-90, le=90, examples=[14.5995])
+    longitude: float = Field(ge=-180, le=180, examples=[120.9842])
+    speed_kmh: Optional[float] = Field(None, ge=0, examples=[42.5])
+    heading: Optional[float] = Field(None, ge=0, lt=360, examples=[270])
+
+
+class TelemetryAccepted(BaseModel):
+    accepted: int
+
+
+class PositionResponse(BaseModelWithDateFormatting):
+    vehicle_id: int
+    recorded_at: FormattedDatetime
+    latitude: float
+    longitude: float
+    speed_kmh: Optional[float]
+    heading: Optional[float]
+
+    class Config:
+        from_attributes = True
+
+
+class TrackPoint(BaseModelWithDateFormatting):
+    recorded_at: FormattedDatetime
+    latitude: float
+    longitude: float
+    speed_kmh: Optional[float]
+    distance_km: Optional[float]
+
+
+class TrackResponse(BaseModel):
+    vehicle_id: int
+    resolution: str
+    points: list[TrackPoint]
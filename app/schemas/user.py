@@ -30,3 +30,10 @@ class UserResponse(BaseModel):
     class Config:
         from_attributes = True
 
+
+class CurrentUser(BaseModel):
+    id: int
+    username: str
+    email: str
+    role: str
+    token_version: int
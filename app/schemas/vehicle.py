@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field, constr
-from app.schemas.base import BaseModelWithDateFormatting
-from datetime import datetime
+from app.schemas.base import BaseModelWithDateFormatting, FormattedDatetime
+from app.schemas.order import OrderResponse
+from typing import Optional
 
 
 class VehicleRequest(BaseModel):
@@ -21,7 +22,7 @@ class VehicleDriverRequest(BaseModel):
 
 class VehicleResponse(BaseModelWithDateFormatting):
     id: int
-    updated_at: datetime
+    updated_at: FormattedDatetime
     license_plate: str
     type: str
     capacity_kg: int
@@ -30,3 +31,28 @@ class VehicleResponse(BaseModelWithDateFormatting):
 
     class Config:
         from_attributes = True
+
+
+class VehiclePage(BaseModel):
+    items: list[VehicleResponse]
+    next_cursor: Optional[str]
+
+    class Config:
+        from_attributes = True
+
+
+class VehicleWithOrdersResponse(VehicleResponse):
+    orders: list[OrderResponse]
+    orders_next_cursor: Optional[str]
+    load_kg: float
+
+
+class VehicleWithOrdersPage(BaseModel):
+    items: list[VehicleWithOrdersResponse]
+    next_cursor: Optional[str]
+
+
+class VehicleOrderPage(BaseModel):
+    items: list[OrderResponse]
+    next_cursor: Optional[str]
+    load_kg: float
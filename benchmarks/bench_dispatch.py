@@ -0,0 +1,30 @@
+"""Time the dispatch solver on synthetic data, 100k orders x 5k vehicles by default.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_dispatch [orders] [vehicles]
+"""
+from app.core.dispatch import solve, SIZE_WEIGHTS_KG
+import numpy as np
+import sys
+import time
+
+
+def main(order_count: int = 100_000, vehicle_count: int = 5_000) -> None:
+    rng = np.random.default_rng(7)
+    weights = rng.choice(list(SIZE_WEIGHTS_KG.values()), order_count).astype(np.float64)
+    priority = rng.random(order_count) < 0.1
+    starts = rng.integers(0, 14 * 24, order_count) * 3600
+    ends = starts + rng.integers(2, 48, order_count) * 3600
+    capacity = rng.choice([200, 500, 1000, 1500, 3000], vehicle_count).astype(np.float64)
+    ready = np.full(vehicle_count, np.iinfo(np.int64).min)
+
+    started = time.perf_counter()
+    assigned = solve(weights, priority, starts, ends, capacity, ready)
+    elapsed = time.perf_counter() - started
+
+    print(f'{order_count} orders x {vehicle_count} vehicles: {elapsed:.2f} s, {(assigned >= 0).sum()} assigned')
+
+
+if __name__ == '__main__':
+    main(*(int(value) for value in sys.argv[1:3]))
@@ -0,0 +1,104 @@
+"""Compare list-response serialization paths on a 10k-row page of orders.
+
+The last path renders the map view's `fields=id,status,vehicle_id` projection.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_serialization [rows]
+"""
+from app.schemas.base import DATE_FORMAT
+from app.schemas.order import OrderResponse, OrderPage
+from app.core.responses import render_page
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import BaseModel, field_serializer
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Optional
+import sys
+import timeit
+
+
+class LegacyOrderResponse(BaseModel):
+    """OrderResponse as it was with the wildcard datetime serializer."""
+    id: int
+    updated_at: datetime
+    destination: str
+    size: str
+    priority: bool
+    delivery_window_start: datetime
+    delivery_window_end: datetime
+    status: str
+    vehicle_id: Optional[int]
+
+    @field_serializer("*", when_used="json")
+    def serialize_datetime(self, value, _info):
+        if isinstance(value, datetime):
+            return value.strftime(DATE_FORMAT)
+        return value
+
+    class Config:
+        from_attributes = True
+
+
+class LegacyOrderPage(BaseModel):
+    items: list[LegacyOrderResponse]
+    next_cursor: Optional[str]
+
+
+def make_rows(count: int) -> list[tuple]:
+    start = datetime(2025, 10, 2, 9, 0)
+    return [
+        (
+            index,
+            start + timedelta(seconds=index),
+            f'city {index % 50}',
+            ('xs', 's', 'm', 'l', 'xl')[index % 5],
+            index % 7 == 0,
+            start + timedelta(hours=index % 48),
+            start + timedelta(hours=48 + index % 48),
+            'pending',
+            index % 200 or None,
+        )
+        for index in range(1, count + 1)
+    ]
+
+
+def main(count: int = 10_000) -> None:
+    fields = list(OrderResponse.model_fields)
+    rows = make_rows(count)
+    objects = [SimpleNamespace(**dict(zip(fields, row))) for row in rows]
+
+    def legacy():
+        # What FastAPI did per request: build models, dump, re-encode, json.dumps.
+        page = LegacyOrderPage(items=[LegacyOrderResponse.model_validate(obj) for obj in objects], next_cursor=None)
+        return JSONResponse(jsonable_encoder(page.model_dump(mode='json'))).body
+
+    def typed_models():
+        page = OrderPage.model_validate({'items': objects, 'next_cursor': None})
+        return ORJSONResponse(jsonable_encoder(page.model_dump(mode='json'))).body
+
+    def bulk_rows():
+        return render_page(rows, fields, None).body
+
+    sparse_names = ('id', 'status', 'vehicle_id')
+    sparse = [(row[0], row[7], row[8]) for row in rows]
+
+    def sparse_rows():
+        return render_page(sparse, sparse_names, None).body
+
+    expected = legacy()
+    assert typed_models() == expected, 'typed serializer output differs'
+    assert bulk_rows() == expected, 'bulk row output differs'
+
+    print(f'{count} rows, {len(expected) / 1024:.0f} KiB per response')
+    baseline = None
+    for name, function in (('wildcard serializer', legacy), ('typed serializer', typed_models), ('bulk rows', bulk_rows),
+                           ('sparse rows', sparse_rows)):
+        best = min(timeit.repeat(function, number=1, repeat=5))
+        baseline = baseline or best
+        print(f'{name:>20}: {best * 1000:8.1f} ms  ({baseline / best:.1f}x)')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
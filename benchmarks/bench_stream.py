@@ -0,0 +1,42 @@
+"""Time event fan-out to many stream subscribers, 10k subscribers x 2k events by default.
+
+Nine in ten subscribers follow a single vehicle, the rest see everything.
+Run from the repository root:
+
+    python -m benchmarks.bench_stream [subscribers] [events]
+"""
+from app.core.events import EventBroker
+import asyncio
+import random
+import sys
+import time
+
+
+async def run(subscriber_count: int, event_count: int) -> None:
+    rng = random.Random(7)
+    vehicle_count = max(subscriber_count // 10, 1)
+    broker = EventBroker(max_queue_size=event_count)
+    subscriptions = [
+        broker.subscribe() if index % 10 == 0 else broker.subscribe(vehicle_id=rng.randrange(vehicle_count))
+        for index in range(subscriber_count)
+    ]
+
+    started = time.perf_counter()
+    for order_id in range(event_count):
+        vehicle_id = rng.randrange(vehicle_count)
+        broker.publish('order.status_changed',
+                       {'id': order_id, 'vehicle_id': vehicle_id, 'driver_id': vehicle_id, 'status': 'completed'},
+                       {'status': 'in_transit'})
+    elapsed = time.perf_counter() - started
+
+    delivered = sum(subscription.queue.qsize() for subscription in subscriptions)
+    print(f'{subscriber_count} subscribers x {event_count} events: {elapsed:.2f} s, '
+          f'{delivered} deliveries ({delivered / elapsed:,.0f}/s)')
+
+
+def main(subscriber_count: int = 10_000, event_count: int = 2_000) -> None:
+    asyncio.run(run(subscriber_count, event_count))
+
+
+if __name__ == '__main__':
+    main(*(int(value) for value in sys.argv[1:3]))
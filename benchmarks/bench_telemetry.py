@@ -0,0 +1,95 @@
+"""Measure telemetry ingestion, write and compaction throughput in pings per second.
+
+Pings are posted in-process as JSON arrays, 1000 per request by default, then
+the buffer is flushed into a scratch SQLite database and rolled up into the
+1-minute and 15-minute tables. Run from the repository root:
+
+    python -m benchmarks.bench_telemetry [pings] [pings per request]
+"""
+from app.main import app
+from app.core.security import get_current_user
+from app.core.telemetry import TelemetryBuffer
+from app.core.downsampling import compact_chunk
+from app.database import Base, enable_foreign_keys
+from app.models import User, Vehicle
+from app.routers import telemetry
+from app.schemas.user import CurrentUser
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from datetime import datetime, timedelta
+from pathlib import Path
+import orjson
+import sys
+import tempfile
+import time
+
+VEHICLES = 5000
+
+
+def make_bodies(count: int, per_request: int) -> list[bytes]:
+    start = datetime.utcnow().replace(microsecond=0) - timedelta(hours=2)
+    pings = [
+        {
+            'vehicle_id': index % VEHICLES + 1,
+            'recorded_at': (start + timedelta(seconds=index // VEHICLES)).isoformat() + 'Z',
+            'latitude': 14.5 + index % 1000 / 10_000,
+            'longitude': 120.9 + index % 997 / 10_000,
+            'speed_kmh': 40.0,
+            'heading': 90.0,
+        }
+        for index in range(count)
+    ]
+    return [orjson.dumps(pings[offset:offset + per_request]) for offset in range(0, count, per_request)]
+
+
+def main(count: int = 200_000, per_request: int = 1000) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f'sqlite:///{Path(directory) / "bench.db"}')
+        enable_foreign_keys(engine)
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(autoflush=False, bind=engine)
+        with session_factory() as db:
+            driver = User(username='driver', email='driver@example.com', role='driver', hashed_password='-')
+            db.add(driver)
+            db.flush()
+            db.add_all([Vehicle(license_plate=f'BENCH{index:05d}', type='van', capacity_kg=1000, status='available',
+                                driver_id=driver.id) for index in range(VEHICLES)])
+            db.commit()
+
+        buffer = TelemetryBuffer(capacity=count)
+        telemetry.telemetry_buffer = buffer
+        app.dependency_overrides[get_current_user] = lambda: CurrentUser(
+            id=1, username='admin', email='admin@example.com', role='admin', token_version=0
+        )
+        client = TestClient(app)
+        bodies = make_bodies(count, per_request)
+        try:
+            started = time.perf_counter()
+            for body in bodies:
+                response = client.post('/vehicles/telemetry', content=body,
+                                       headers={'Content-Type': 'application/json'})
+                assert response.status_code == 202, response.text
+            elapsed = time.perf_counter() - started
+            print(f'{"ingest":>8}: {count / elapsed:10,.0f} pings/s  ({per_request} pings per request)')
+
+            with session_factory() as db:
+                started = time.perf_counter()
+                written = buffer.flush(db)
+                elapsed = time.perf_counter() - started
+            print(f'{"write":>8}: {written / elapsed:10,.0f} pings/s  ({buffer.batch_size} rows per INSERT)')
+
+            with session_factory() as db:
+                started = time.perf_counter()
+                compacted = 0
+                while rolled := compact_chunk(db):
+                    compacted += rolled
+                elapsed = time.perf_counter() - started
+            print(f'{"compact":>8}: {compacted / elapsed:10,.0f} pings/s  ({VEHICLES} vehicles)')
+        finally:
+            app.dependency_overrides.clear()
+            engine.dispose()
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,95 @@
+"""Measure write endpoint throughput and statements per request, 500 requests per endpoint by default.
+
+Requests go through the sync routers in-process, against a scratch SQLite
+database. Run from the repository root:
+
+    python -m benchmarks.bench_writes [requests]
+"""
+from app.main import app
+from app.core import querystats
+from app.core.security import get_current_user
+from app.database import Base, get_db
+from app.models import User
+from app.schemas.user import CurrentUser
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+try:
+    from app.database import enable_foreign_keys
+except ImportError:
+    enable_foreign_keys = None
+
+
+def run(client: TestClient, name: str, requests) -> None:
+    statements = 0
+    started = time.perf_counter()
+    for method, url, body in requests:
+        response = client.request(method, url, json=body)
+        assert response.status_code < 300, (url, response.status_code, response.text)
+        statements += int(response.headers['x-db-query-count'])
+    elapsed = time.perf_counter() - started
+    print(f'{name:>24}: {len(requests) / elapsed:8,.0f} req/s  {statements / len(requests):4.1f} statements/request')
+
+
+def main(count: int = 500) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f'sqlite:///{Path(directory) / "bench.db"}')
+        if enable_foreign_keys is not None:
+            enable_foreign_keys(engine)
+        querystats.instrument_engine(engine)
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(autoflush=False, bind=engine)
+
+        with session_factory() as db:
+            drivers = [User(username=f'driver{index}', email=f'driver{index}@example.com', role='driver',
+                            hashed_password='-') for index in range(2)]
+            admin = User(username='admin', email='admin@example.com', role='admin', hashed_password='-')
+            db.add_all([*drivers, admin])
+            db.commit()
+            driver_ids = [driver.id for driver in drivers]
+            current_user = CurrentUser(id=admin.id, username='admin', email='admin@example.com', role='admin',
+                                       token_version=0)
+
+        def get_bench_db():
+            with session_factory() as db:
+                yield db
+
+        app.dependency_overrides[get_db] = get_bench_db
+        app.dependency_overrides[get_current_user] = lambda: current_user
+        querystats.EXPOSE_HEADERS = True
+        client = TestClient(app)
+        try:
+            run(client, 'POST /vehicles/', [
+                ('POST', '/vehicles/', {'license_plate': f'BENCH{index:05d}', 'vehicle_type': 'van',
+                                        'capacity_kg': 1000, 'vehicle_status': 'available',
+                                        'driver_id': driver_ids[0]})
+                for index in range(count)
+            ])
+            run(client, 'PUT /vehicles/{id}/status', [
+                ('PUT', f'/vehicles/{index + 1}/status', {'vehicle_status': 'maintenance'}) for index in range(count)
+            ])
+            run(client, 'PUT /vehicles/{id}/driver', [
+                ('PUT', f'/vehicles/{index + 1}/driver', {'driver_id': driver_ids[1]}) for index in range(count)
+            ])
+            run(client, 'POST /orders/', [
+                ('POST', '/orders/', {'destination': 'Manila', 'size': 's', 'priority': False,
+                                      'delivery_window_start': '2025-12-12 10:00',
+                                      'delivery_window_end': '2025-12-15 10:00', 'status': 'pending',
+                                      'vehicle_id': index % count + 1})
+                for index in range(count)
+            ])
+            run(client, 'PUT /orders/{id}/status', [
+                ('PUT', f'/orders/{index + 1}/status', {'order_status': 'in_transit'}) for index in range(count)
+            ])
+        finally:
+            app.dependency_overrides.clear()
+            engine.dispose()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -1,7 +1,13 @@
-from app.core.security import bcrypt_context, get_current_user
+from app.core.security import bcrypt_context, get_current_user, token_versions
+from app.core import querystats
+from app.core.cache import response_cache
+from app.core.intervals import order_windows
+from app.core.archive import read_part
+from app.core.telemetry import telemetry_buffer
 from app.models import User, Vehicle, Order
+from app.schemas.user import CurrentUser
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, enable_foreign_keys
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from fastapi.testclient import TestClient
@@ -16,6 +22,8 @@ load_dotenv()
 SQLALCHEMY_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
 
 engine = create_engine(SQLALCHEMY_DATABASE_URL)
+enable_foreign_keys(engine)
+querystats.instrument_engine(engine)
 client = TestClient(app)
 
 
@@ -38,6 +46,11 @@ def override_get_db():
 def db_session():
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    token_versions.clear()
+    response_cache.clear()
+    order_windows.clear()
+    read_part.cache_clear()
+    telemetry_buffer.clear()
 
     db = TestingSessionLocal()
 
@@ -99,6 +112,29 @@ def test_order(db_session, test_vehicle):
     yield order
 
 
+@pytest.fixture
+def query_budget(monkeypatch, test_user):
+    """Return a checker asserting that a response stayed within a query budget without N+1 patterns."""
+    monkeypatch.setattr(querystats, 'EXPOSE_HEADERS', True)
+    # The ORM test user would reload itself after every commit; real requests
+    # authenticate from token claims without touching the database.
+    current_user = CurrentUser(
+        id=test_user.id,
+        username=test_user.username,
+        email=test_user.email,
+        role=test_user.role,
+        token_version=test_user.token_version
+    )
+    app.dependency_overrides[get_current_user] = lambda: current_user
+
+    def check(response, max_queries: int):
+        query_count = int(response.headers['x-db-query-count'])
+        assert query_count <= max_queries, f'{query_count} queries issued, budget is {max_queries}'
+        assert 'x-db-repeated-queries' not in response.headers
+
+    return check
+
+
 @pytest.fixture(autouse=True)
 def override_db_dependency():
     app.dependency_overrides[get_db] = override_get_db
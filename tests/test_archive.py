@@ -0,0 +1,137 @@
+from app.core.archive import archive_orders
+from app.core.stats import recount_summary
+from app.core.events import event_broker
+from app.models import Order, ArchivedOrder, ChangeLog
+from datetime import datetime, timedelta
+import asyncio
+import gzip
+import json
+import pytest
+from tests.conftest import (
+    client,
+    test_vehicle,
+    db_session
+)
+
+
+@pytest.fixture
+def archive_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr('app.core.archive.ORDER_ARCHIVE_DIR', tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def aged_orders(db_session, test_vehicle):
+    orders = []
+    for status, updated_at in (
+        ('completed', datetime(2025, 1, 10, 8, 0)),
+        ('pending', datetime(2025, 1, 11, 8, 0)),
+        ('failed', datetime(2025, 2, 3, 8, 0)),
+        ('completed', datetime.now()),
+    ):
+        order = Order(
+            destination='manila',
+            size='s',
+            priority=False,
+            delivery_window_start=datetime(2025, 1, 9, 9, 0),
+            delivery_window_end=datetime(2025, 1, 9, 18, 0),
+            status=status,
+            vehicle_id=test_vehicle.id,
+            updated_at=updated_at
+        )
+        db_session.add(order)
+        db_session.commit()
+        orders.append(order)
+    return orders
+
+
+def test_archive_orders(db_session, archive_dir, aged_orders):
+    completed, pending, failed, recent = (order.id for order in aged_orders)
+    recount_summary(db_session)
+    db_session.commit()
+
+    assert archive_orders(db_session, older_than=timedelta(days=30)) == 2
+    assert archive_orders(db_session, older_than=timedelta(days=30)) == 0
+
+    assert [row.id for row in db_session.query(Order.id).order_by(Order.id)] == [pending, recent]
+    assert db_session.query(ArchivedOrder).count() == 2
+    parts = sorted(path.relative_to(archive_dir).as_posix() for path in archive_dir.rglob('*.ndjson.gz'))
+    assert parts == [f'2025-01/part-{completed:010d}-{completed:010d}.ndjson.gz',
+                     f'2025-02/part-{failed:010d}-{failed:010d}.ndjson.gz']
+    with gzip.open(archive_dir / parts[1]) as part:
+        assert json.loads(part.readline())['status'] == 'failed'
+
+    assert client.get('/stats/').json()['orders']['status'] == {'completed': 1, 'pending': 1}
+
+
+def test_archive_orders_logs_and_publishes_deletes(db_session, archive_dir, aged_orders):
+    completed, _, failed, _ = (order.id for order in aged_orders)
+
+    async def scenario():
+        subscription = event_broker.subscribe()
+        try:
+            archive_orders(db_session, older_than=timedelta(days=30))
+            return [json.loads((await subscription.get()).payload) for _ in range(2)]
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    events = asyncio.run(scenario())
+
+    assert sorted((event['event'], event['id']) for event in events) == [('order.deleted', completed),
+                                                                    ('order.deleted', failed)]
+    changes = db_session.query(ChangeLog).filter(ChangeLog.operation == 'delete').all()
+    assert sorted((change.entity, change.entity_id) for change in changes) == [('orders', completed), ('orders', failed)]
+
+
+def test_archived_order_ids_are_not_reused(db_session, archive_dir, aged_orders):
+    archived_id = aged_orders[0].id
+    for order in aged_orders[1:]:
+        db_session.delete(order)
+    db_session.commit()
+    assert archive_orders(db_session, older_than=timedelta(days=30)) == 1
+
+    response = client.post('/orders/', json={
+        'destination': 'manila', 'size': 's', 'priority': False, 'status': 'pending',
+        'delivery_window_start': '2025-01-09 09:00', 'delivery_window_end': '2025-01-09 18:00'
+    })
+
+    assert response.status_code == 201
+    assert response.json()['id'] > archived_id
+
+
+def test_get_archived_order_by_id(db_session, archive_dir, aged_orders):
+    hot = client.get(f'/orders/{aged_orders[0].id}').json()
+    archive_orders(db_session, older_than=timedelta(days=30))
+    order_id = hot['id']
+
+    assert client.get(f'/orders/{order_id}').status_code == 404
+    response = client.get(f'/orders/{order_id}', params={'include_archived': True})
+    assert response.status_code == 200
+    assert response.json() == hot
+
+    cached = client.get(f'/orders/{order_id}', params={'include_archived': True},
+                        headers={'If-None-Match': response.headers['etag']})
+    assert cached.status_code == 304
+    assert client.get('/orders/999', params={'include_archived': True}).status_code == 404
+
+
+def test_get_all_orders_include_archived(db_session, archive_dir, aged_orders):
+    order_ids = [order.id for order in aged_orders]
+    archive_orders(db_session, older_than=timedelta(days=30))
+
+    assert [item['id'] for item in client.get('/orders/').json()['items']] == [order_ids[1], order_ids[3]]
+
+    for order_by in ('id', 'updated_at'):
+        seen, cursor = [], None
+        while True:
+            page = client.get('/orders/', params={
+                'include_archived': True, 'order_by': order_by, 'limit': 1, **({'cursor': cursor} if cursor else {})
+            }).json()
+            seen.extend(item['id'] for item in page['items'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        assert seen == order_ids
+
+    failed = client.get('/orders/', params={'include_archived': True, 'order_status': 'failed'}).json()
+    assert [item['id'] for item in failed['items']] == [order_ids[2]]
@@ -0,0 +1,172 @@
+from app.database import get_async_db, get_db, to_async_url, enable_foreign_keys
+from app.core.security import get_current_user
+from app.main import select_routers
+from app.models import Order, Vehicle
+from app.core.archive import archive_orders
+from tests.conftest import (
+    SQLALCHEMY_DATABASE_URL,
+    override_get_db,
+    test_user,
+    test_vehicle,
+    test_order,
+    db_session
+)
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import NullPool
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from datetime import datetime, timedelta
+import pytest
+
+
+async_engine = create_async_engine(to_async_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+enable_foreign_keys(async_engine.sync_engine)
+TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+async_app = FastAPI()
+for router in select_routers('async'):
+    async_app.include_router(router)
+
+client = TestClient(async_app)
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+@pytest.fixture(autouse=True)
+def override_async_dependencies(test_user):
+    async_app.dependency_overrides[get_db] = override_get_db
+    async_app.dependency_overrides[get_async_db] = override_get_async_db
+    async_app.dependency_overrides[get_current_user] = lambda: test_user
+
+
+def test_select_routers_async_handlers():
+    routes = {
+        (route.path, method): route.endpoint
+        for router in select_routers('async')
+        for route in router.routes
+        for method in route.methods
+    }
+
+    assert routes[('/orders/', 'GET')].__module__ == 'app.routers.aio.orders'
+    assert routes[('/orders/export', 'GET')].__module__ == 'app.routers.orders'
+    assert routes[('/vehicles/{vehicle_id}', 'DELETE')].__module__ == 'app.routers.aio.vehicles'
+
+
+def test_async_get_all_orders(test_order):
+    response = client.get('/orders/')
+    data = response.json()
+
+    assert response.status_code == 200
+    assert data['items'][0].get('id') == test_order.id
+
+
+def test_async_conditional_get(test_order, test_vehicle):
+    for url in (f'/orders/{test_order.id}', '/orders/', f'/vehicles/{test_vehicle.id}', '/vehicles/'):
+        etag = client.get(url).headers['etag']
+        assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_async_delivery_window_filters(test_order):
+    inside = client.get('/orders/', params={'window_from': '2025-10-03T00:00', 'window_to': '2025-10-03T01:00'})
+    outside = client.get('/orders/', params={'window_from': '2025-10-05T00:00', 'window_to': '2025-10-05T01:00'})
+
+    assert [item['id'] for item in inside.json()['items']] == [test_order.id]
+    assert outside.json()['items'] == []
+
+
+def test_async_include_archived(db_session, monkeypatch, tmp_path, test_order):
+    monkeypatch.setattr('app.core.archive.ORDER_ARCHIVE_DIR', tmp_path)
+    test_order.status = 'completed'
+    test_order.updated_at = datetime(2025, 1, 10, 8, 0)
+    db_session.commit()
+    order_id = test_order.id
+    archive_orders(db_session, older_than=timedelta(days=30))
+
+    assert client.get(f'/orders/{order_id}').status_code == 404
+    assert client.get(f'/orders/{order_id}', params={'include_archived': True}).json()['status'] == 'completed'
+    assert [item['id'] for item in client.get('/orders/', params={'include_archived': True}).json()['items']] == [order_id]
+    sparse = {'include_archived': True, 'fields': 'status'}
+    assert client.get(f'/orders/{order_id}', params=sparse).json() == {'status': 'completed'}
+    assert client.get('/orders/', params=sparse).json()['items'] == [{'status': 'completed'}]
+
+
+def test_async_export_orders_falls_back_to_sync(test_order):
+    response = client.get('/orders/export')
+
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 1
+
+
+def test_async_add_and_update_order(test_vehicle):
+    data_request = {
+        'destination': 'Manila',
+        'size': 'xs',
+        'priority': False,
+        'delivery_window_start': '2025-09-02 10:00',
+        'delivery_window_end': '2025-09-03 10:00',
+        'status': 'pending',
+        'vehicle_id': test_vehicle.id
+    }
+    created = client.post('/orders/', json=data_request)
+    assert created.status_code == 201
+
+    order_id = created.json().get('id')
+    updated = client.put(f'/orders/{order_id}/status', json={'order_status': 'in_transit'})
+    assert updated.status_code == 200
+    assert updated.json().get('status') == 'in_transit'
+
+
+def test_async_vehicle_orders(test_order, test_vehicle):
+    page = client.get(f'/vehicles/{test_vehicle.id}/orders').json()
+    assert [order['id'] for order in page['items']] == [test_order.id]
+    assert page['load_kg'] == 20.0
+
+    items = client.get('/vehicles/', params={'include': 'orders'}).json()['items']
+    assert items[0]['orders'] == page['items']
+    assert items[0]['load_kg'] == 20.0
+    assert client.get('/vehicles/999/orders').status_code == 404
+
+
+def test_async_get_vehicle_not_found():
+    response = client.get('/vehicles/999')
+
+    assert response.status_code == 404
+    assert response.json() == {'detail': 'The specified vehicle could not be found.'}
+
+
+def test_async_delete_vehicle(db_session, test_vehicle, test_order):
+    vehicle_id, order_id = test_vehicle.id, test_order.id
+    response = client.delete(f'/vehicles/{vehicle_id}')
+    assert response.status_code == 204
+
+    db_session.expire_all()
+    assert db_session.get(Vehicle, vehicle_id) is None
+    assert db_session.get(Order, order_id) is None
+
+
+def test_async_delete_vehicle_in_background(db_session, test_vehicle, test_order):
+    vehicle_id, order_id = test_vehicle.id, test_order.id
+    response = client.delete(f'/vehicles/{vehicle_id}', params={'background': True})
+    assert response.status_code == 202
+
+    db_session.expire_all()
+    assert db_session.get(Vehicle, vehicle_id) is None
+    assert db_session.get(Order, order_id) is None
+
+
+def test_async_create_user_and_login():
+    request_data = {
+        'username': 'async_user',
+        'email': 'async_user@email.com',
+        'role': 'driver',
+        'password': '12345',
+    }
+    created = client.post('/auth/', json=request_data)
+    assert created.status_code == 201
+
+    login = client.post('/auth/token', data={'username': 'async_user', 'password': '12345'})
+    assert login.status_code == 200
+    assert 'access_token' in login.json()
@@ -1,5 +1,14 @@
-from app.core.security import SECRET_KEY, ALGORITHM, create_access_token, get_current_user
-from app.models import User
+from app.core.security import (
+    SECRET_KEY,
+    ALGORITHM,
+    TokenVersionTable,
+    create_access_token,
+    get_current_user,
+    token_versions
+)
+from app.core.passwords import PasswordHasher, calibrate_rounds, password_hasher
+from app.schemas.user import CurrentUser
+from app.models import User, TokenRevocation
 from datetime import datetime, timezone, timedelta
 from tests.conftest import (
     client,
@@ -7,7 +16,11 @@ from tests.conftest import (
     db_session
 )
 from jose import jwt
-from fastapi import status
+from fastapi import status, HTTPException
+from sqlalchemy.orm import sessionmaker
+import asyncio
+import pytest
+import time
 
 
 def test_create_user():
@@ -26,13 +39,15 @@ def test_create_user():
     assert data.get('role') == request_data.get('role')
 
 
-def test_create_user_duplicate(test_user):
+def test_create_user_duplicate(test_user, monkeypatch):
     request_data = {
         'username': test_user.username,
         'email': test_user.email,
         'role': 'admin',
         'password': '12345',
     }
+    # A duplicate is refused without spending a hash on the worker pool.
+    monkeypatch.setattr(password_hasher, 'hash', lambda password: pytest.fail('password was hashed'))
     response = client.post('/auth/', json=request_data)
     data = response.json()
 
@@ -68,7 +83,10 @@ def test_create_access_token(test_user):
     token = create_access_token(
         test_user.username,
         test_user.id,
-        timedelta(minutes=60)
+        timedelta(minutes=60),
+        role=test_user.role,
+        email=test_user.email,
+        token_version=test_user.token_version
     )
 
     assert token is not None
@@ -79,6 +97,8 @@ def test_create_access_token(test_user):
     assert payload is not None
     assert payload.get('sub') == test_user.username
     assert payload.get('id') == test_user.id
+    assert payload.get('role') == test_user.role
+    assert payload.get('ver') == 0
 
 
 def test_get_current_user(db_session, test_user):
@@ -87,11 +107,107 @@ def test_get_current_user(db_session, test_user):
     payload = {
         'sub': test_user.username,
         'id': test_user.id,
+        'email': test_user.email,
+        'role': test_user.role,
+        'ver': test_user.token_version,
         'exp': expires
     }
     token = jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
-    user = get_current_user(db_session, token)
+    user = get_current_user(token)
 
     assert user is not None
-    assert isinstance(user, User)
-    assert user.id == test_user.id
\ No newline at end of file
+    assert isinstance(user, CurrentUser)
+    assert user.id == test_user.id
+    assert user.role == test_user.role
+
+
+def test_get_current_user_missing_claims(test_user):
+    expires = datetime.now(timezone.utc) + timedelta(minutes=60)
+    token = jwt.encode({'sub': test_user.username, 'id': test_user.id, 'exp': expires}, SECRET_KEY, algorithm=ALGORITHM)
+
+    with pytest.raises(HTTPException) as exc_info:
+        get_current_user(token)
+
+    assert exc_info.value.status_code == 401
+
+
+def test_get_current_user_revoked(test_user):
+    token = create_access_token(
+        test_user.username,
+        test_user.id,
+        timedelta(minutes=60),
+        role=test_user.role,
+        email=test_user.email,
+        token_version=0
+    )
+    token_versions.record(test_user.id, 1)
+
+    with pytest.raises(HTTPException) as exc_info:
+        get_current_user(token)
+
+    assert exc_info.value.status_code == 401
+
+
+def test_token_version_table_refresh(db_session):
+    table = TokenVersionTable(sessionmaker(bind=db_session.get_bind()))
+    db_session.add_all([
+        TokenRevocation(user_id=1, token_version=2),
+        TokenRevocation(user_id=2, token_version=None),
+    ])
+    db_session.commit()
+
+    table.refresh(db_session)
+
+    assert not table.is_current(1, 1)
+    assert table.is_current(1, 2)
+    assert not table.is_current(2, 5)
+    assert table.is_current(3, 0)
+
+
+def test_login_rehashes_outdated_cost(db_session, test_user):
+    test_user.hashed_password = PasswordHasher(workers=0, rounds=4).hash('12345')
+    db_session.commit()
+
+    response = client.post('/auth/token', data={'username': test_user.username, 'password': '12345'})
+    assert response.status_code == status.HTTP_200_OK
+
+    db_session.expire_all()
+    rehashed = db_session.get(User, test_user.id).hashed_password
+    assert rehashed.startswith(f'$2b${password_hasher.rounds:02d}$')
+    assert password_hasher.verify('12345', rehashed) == (True, None)
+
+
+def test_password_hasher_rejects_when_saturated():
+    hasher = PasswordHasher(workers=0, queue_depth=0, rounds=4)
+    hasher._slots.acquire()
+
+    with pytest.raises(HTTPException) as exc_info:
+        hasher.hash('12345')
+
+    assert exc_info.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+def test_calibrate_rounds():
+    assert calibrate_rounds(target_ms=0) == 4
+    assert 4 <= calibrate_rounds(target_ms=50) <= 16
+
+def test_async_hashing_calibrates_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr('app.core.passwords.calibrate_rounds', lambda target_ms: time.sleep(0.2) or 4)
+    hasher = PasswordHasher(workers=0, rounds=None)
+    ticks = []
+
+    async def tick():
+        while True:
+            ticks.append(None)
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        ticker = asyncio.create_task(tick())
+        hashed = await hasher.ahash('12345')
+        ticker.cancel()
+        return hashed
+
+    hashed = asyncio.run(scenario())
+
+    assert hashed.startswith('$2b$04$')
+    assert len(ticks) > 5
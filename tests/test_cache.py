@@ -0,0 +1,102 @@
+from app.core.cache import LocalCacheBackend, ResponseCache, CachedPage, response_cache
+from app.core.metrics import registry
+from tests.conftest import (
+    client,
+    test_vehicle,
+    test_order,
+    db_session,
+    query_budget
+)
+import time
+
+
+def test_local_backend_expires_entries():
+    cache = ResponseCache(LocalCacheBackend(ttl=0.05))
+    key = cache.key('orders', {'status': 'pending'}, limit=50)
+    cache.set(key, CachedPage('"a"', b'[]'))
+
+    assert cache.get(key) == CachedPage('"a"', b'[]')
+    time.sleep(0.06)
+    assert cache.get(key) is None
+
+
+def test_local_backend_evicts_least_recently_used():
+    backend = LocalCacheBackend(ttl=60, max_bytes=30)
+    cache = ResponseCache(backend)
+    first, second, third = (cache.key('orders', {}, limit=limit) for limit in (1, 2, 3))
+
+    cache.set(first, CachedPage('"1"', b'x' * 10))
+    cache.set(second, CachedPage('"2"', b'x' * 10))
+    cache.get(first)
+    cache.set(third, CachedPage('"3"', b'x' * 10))
+
+    assert cache.get(first) is not None
+    assert cache.get(second) is None
+    assert cache.get(third) is not None
+    assert backend.size <= 30
+
+
+def test_invalidation_only_drops_matching_listings():
+    cache = ResponseCache(LocalCacheBackend(ttl=60))
+    pending = cache.key('orders', {'status': 'pending'}, limit=50)
+    completed = cache.key('orders', {'status': 'completed'}, limit=50)
+    unfiltered = cache.key('orders', {}, limit=50)
+    vehicles = cache.key('vehicles', {}, limit=50)
+    for key in (pending, completed, unfiltered, vehicles):
+        cache.set(key, CachedPage('"etag"', b'[]'))
+
+    dropped = cache.invalidate('orders', {'destination': 'Manila', 'size': 'xs', 'status': 'pending'})
+
+    assert dropped == 2
+    assert cache.get(pending) is None
+    assert cache.get(unfiltered) is None
+    assert cache.get(completed) is not None
+    assert cache.get(vehicles) is not None
+
+
+def test_page_read_before_invalidation_is_not_stored():
+    cache = ResponseCache(LocalCacheBackend(ttl=60))
+    orders = cache.key('orders', {}, limit=50)
+    vehicles = cache.key('vehicles', {}, limit=50)
+    generations = cache.generation('orders'), cache.generation('vehicles')
+
+    cache.invalidate('orders', {'destination': 'Manila', 'size': 'xs', 'status': 'pending'})
+    cache.set(orders, CachedPage('"stale"', b'[]'), generations[0])
+    cache.set(vehicles, CachedPage('"fresh"', b'[]'), generations[1])
+
+    assert cache.get(orders) is None
+    assert cache.get(vehicles) is not None
+
+
+def test_list_endpoint_served_from_cache(query_budget, test_order):
+    misses = registry.value('logitrack_response_cache_requests_total', namespace='orders', result='miss')
+    hits = registry.value('logitrack_response_cache_requests_total', namespace='orders', result='hit')
+
+    first = client.get('/orders/', params={'order_status': 'pending'})
+    second = client.get('/orders/', params={'order_status': 'pending'})
+
+    assert second.content == first.content
+    assert second.headers['etag'] == first.headers['etag']
+    query_budget(second, max_queries=0)
+    assert client.get('/orders/', params={'order_status': 'pending'}, headers={'If-None-Match': first.headers['etag']}).status_code == 304
+    assert registry.value('logitrack_response_cache_requests_total', namespace='orders', result='miss') == misses + 1
+    assert registry.value('logitrack_response_cache_requests_total', namespace='orders', result='hit') == hits + 2
+
+
+def test_writes_invalidate_cached_listings(test_order, test_vehicle):
+    client.get('/orders/', params={'order_status': 'pending'})
+    client.get('/orders/', params={'order_status': 'failed'})
+    client.get('/vehicles/', params={'vehicle_status': 'available'})
+
+    client.put(f'/orders/{test_order.id}/status', json={'order_status': 'completed'})
+    assert client.get('/orders/', params={'order_status': 'pending'}).json()['items'] == []
+    hits = registry.value('logitrack_response_cache_requests_total', namespace='orders', result='hit')
+    client.get('/orders/', params={'order_status': 'failed'})
+    assert registry.value('logitrack_response_cache_requests_total', namespace='orders', result='hit') == hits + 1
+
+    client.put(f'/vehicles/{test_vehicle.id}/status', json={'vehicle_status': 'maintenance'})
+    assert client.get('/vehicles/', params={'vehicle_status': 'available'}).json()['items'] == []
+
+    assert len(client.get('/orders/', params={'order_status': 'completed'}).json()['items']) == 1
+    client.delete(f'/vehicles/{test_vehicle.id}')
+    assert client.get('/orders/', params={'order_status': 'completed'}).json()['items'] == []
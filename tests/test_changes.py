@@ -0,0 +1,92 @@
+from app.core.changes import purge_change_log
+from app.models import ChangeLog
+from datetime import datetime, timedelta
+from tests.conftest import (
+    client,
+    test_vehicle,
+    test_order,
+    db_session
+)
+
+
+def order_request(vehicle_id: int) -> dict:
+    return {
+        'destination': 'Manila',
+        'size': 's',
+        'priority': False,
+        'delivery_window_start': '2025-09-02 10:00',
+        'delivery_window_end': '2025-09-03 10:00',
+        'status': 'pending',
+        'vehicle_id': vehicle_id
+    }
+
+
+def test_get_changes_follows_writes(test_order, test_vehicle):
+    new_order = client.post('/orders/', json=order_request(test_vehicle.id)).json()
+    client.post('/orders/bulk', json=[order_request(test_vehicle.id)] * 2)
+    client.put(f'/orders/{new_order["id"]}/status', json={'order_status': 'completed'})
+
+    changes = client.get('/changes/').json()
+    assert [(item['entity'], item['operation']) for item in changes['items']] == [
+        ('orders', 'insert'), ('orders', 'insert'), ('orders', 'insert'), ('orders', 'update')
+    ]
+    assert changes['items'][-1]['data'] == client.get(f'/orders/{new_order["id"]}').json()
+    assert changes['next_since'] == changes['items'][-1]['seq'] == changes['latest_seq']
+
+    order_id, vehicle_id = test_order.id, test_vehicle.id
+    client.delete(f'/vehicles/{vehicle_id}')
+    deletes = client.get('/changes/', params={'since': changes['next_since']}).json()
+    assert sorted((item['entity'], item['entity_id']) for item in deletes['items']) == sorted(
+        [('orders', order_id), ('orders', new_order['id'])]
+        + [('orders', bulk_id) for bulk_id in range(new_order['id'] + 1, new_order['id'] + 3)]
+        + [('vehicles', vehicle_id)]
+    )
+    assert all(item['operation'] == 'delete' and item['data'] is None for item in deletes['items'])
+
+    first_page = client.get('/changes/', params={'limit': 2}).json()
+    second_page = client.get('/changes/', params={'limit': 2, 'since': first_page['next_since']}).json()
+    assert [item['seq'] for item in first_page['items'] + second_page['items']] == [1, 2, 3, 4]
+
+
+def test_get_changes_after_retention(db_session, test_order):
+    old = datetime(2025, 1, 1)
+    db_session.add_all([
+        ChangeLog(entity='orders', entity_id=test_order.id, operation='insert', changed_at=old),
+        ChangeLog(entity='orders', entity_id=test_order.id, operation='update', changed_at=old),
+        ChangeLog(entity='orders', entity_id=test_order.id, operation='update'),
+    ])
+    db_session.commit()
+
+    assert purge_change_log(db_session, retention=timedelta(days=1)) == 2
+    db_session.commit()
+
+    response = client.get('/changes/', params={'since': 1})
+    assert response.status_code == 410
+    assert response.json() == {
+        'detail': 'Changes after this sequence number have been purged; resynchronize from the list endpoints.'
+    }
+    # A consumer without a cursor learns where to start from the 410 as well.
+    response = client.get('/changes/')
+    assert response.status_code == 410
+    assert response.headers['x-latest-seq'] == '3'
+
+    changes = client.get('/changes/', params={'since': 2}).json()
+    assert [item['seq'] for item in changes['items']] == [3]
+    assert changes['items'][0]['data']['status'] == 'pending'
+    assert changes['latest_seq'] == 3
+
+    changes = client.get('/changes/', params={'since': 3}).json()
+    assert changes == {'items': [], 'next_since': 3, 'latest_seq': 3}
+
+    response = client.get('/changes/', params={'since': 10})
+    assert response.status_code == 400
+    assert response.json() == {'detail': 'The sequence number is ahead of the change log.'}
+    assert response.headers['x-latest-seq'] == '3'
+
+
+def test_get_changes_unauthorized(db_session, test_user):
+    test_user.role = 'driver'
+    db_session.commit()
+
+    response = client.get('/changes/')
+    assert response.status_code == 403
@@ -0,0 +1,164 @@
+from app.models import Vehicle, Order
+from app.core.dispatch import solve, plan_dispatch, apply_dispatch, SIZE_WEIGHTS_KG
+from sqlalchemy import event
+from datetime import datetime
+import numpy as np
+from tests.conftest import (
+    client,
+    test_vehicle,
+    test_order,
+    test_user,
+    db_session
+)
+
+OPEN_START = np.iinfo(np.int64).min
+
+
+def run_solve(weights, priority, windows, capacity, ready=None, service=1):
+    ready = ready or [OPEN_START] * len(capacity)
+    return solve(
+        np.array(weights, dtype=float),
+        np.array(priority, dtype=bool),
+        np.array([start for start, _ in windows], dtype=np.int64),
+        np.array([end for _, end in windows], dtype=np.int64),
+        np.array(capacity, dtype=float),
+        np.array(ready, dtype=np.int64),
+        service
+    ).tolist()
+
+
+def test_solve_serves_priority_orders_first():
+    assert run_solve([50, 50], [False, True], [(0, 10), (0, 10)], [60]) == [-1, 0]
+
+
+def test_solve_picks_best_fitting_vehicle():
+    assert run_solve([20], [False], [(0, 10)], [1000, 25, 100]) == [1]
+
+
+def test_solve_respects_capacity():
+    assert run_solve([150, 5], [False, False], [(0, 10), (0, 10)], [100]) == [-1, 0]
+
+
+def test_solve_avoids_window_conflicts():
+    # Only two 4-second stops fit back to back in a 10-second window.
+    assert run_solve([1, 1, 1], [False, False, False], [(0, 10)] * 3, [100], service=4) == [0, 0, -1]
+    assert run_solve([1, 1, 1], [False, False, False], [(0, 10)] * 3, [100, 100], service=4) == [0, 0, 1]
+    assert run_solve([1], [False], [(20, 30)], [100], ready=[28], service=4) == [-1]
+    assert run_solve([1], [False], [(20, 30)], [100], ready=[26], service=4) == [0]
+
+
+def test_solve_shares_vehicles_across_disjoint_windows():
+    # A 9-10 drop and a 14-15 drop, in hours, with a 15-minute stop each.
+    windows = [(14 * 3600, 15 * 3600), (9 * 3600, 10 * 3600)]
+    assert run_solve([1, 1], [False, False], windows, [100], service=900) == [0, 0]
+
+
+def add_unassigned_orders(db_session, sizes):
+    orders = [
+        Order(
+            destination='manila',
+            size=size,
+            priority=index == len(sizes) - 1,
+            delivery_window_start=datetime(2025, 10, 2, 9, 0),
+            delivery_window_end=datetime(2025, 10, 4, 18, 0),
+            status='pending',
+            vehicle_id=None
+        )
+        for index, size in enumerate(sizes)
+    ]
+    db_session.add_all(orders)
+    db_session.commit()
+    return orders
+
+
+def test_dispatch_dry_run(db_session, test_vehicle):
+    orders = add_unassigned_orders(db_session, ['m', 'xl'])
+
+    response = client.post('/dispatch/run', params={'dry_run': True})
+    data = response.json()
+
+    assert response.status_code == 200
+    assert data['dry_run'] is True
+    assert data['assigned'] == 2
+    assert {item['order_id'] for item in data['assignments']} == {order.id for order in orders}
+    db_session.expire_all()
+    assert all(order.vehicle_id is None for order in db_session.query(Order).all())
+
+
+def test_dispatch_run_assigns_within_capacity(db_session, test_order, test_vehicle):
+    # The fixture order already loads the vehicle with an 'm' package.
+    spare = test_vehicle.capacity_kg - SIZE_WEIGHTS_KG['m']
+    sizes = ['xl'] * (int(spare // SIZE_WEIGHTS_KG['xl']) + 1)
+    orders = add_unassigned_orders(db_session, sizes)
+
+    data = client.post('/dispatch/run').json()
+
+    assert data['assigned'] == len(sizes) - 1
+    # The last order is the priority one, so the latest regular order misses out.
+    assert data['unassigned_order_ids'] == [orders[-2].id]
+    db_session.expire_all()
+    assigned = db_session.query(Order).filter(Order.vehicle_id == test_vehicle.id).count()
+    assert assigned == len(sizes)
+
+
+def test_dispatch_ignores_unavailable_vehicles(db_session, test_vehicle):
+    test_vehicle.status = 'maintenance'
+    db_session.commit()
+    orders = add_unassigned_orders(db_session, ['xs'])
+
+    data = client.post('/dispatch/run').json()
+
+    assert data['assigned'] == 0
+    assert data['unassigned_order_ids'] == [orders[0].id]
+
+
+def test_plan_dispatch_skips_vehicles_made_available_meanwhile(db_session, test_order, test_vehicle):
+    later = Vehicle(license_plate='later1', type='van', capacity_kg=1000, status='maintenance',
+                    driver_id=test_vehicle.driver_id)
+    db_session.add(later)
+    db_session.commit()
+    later_id = later.id
+    db_session.add(Order(destination='manila', size='xl', priority=False, status='in_transit', vehicle_id=later_id,
+                         delivery_window_start=datetime(2025, 10, 2, 9, 0),
+                         delivery_window_end=datetime(2025, 10, 4, 18, 0)))
+    db_session.commit()
+    orders = add_unassigned_orders(db_session, ['xs'])
+
+    # Between the query for available vehicles and the one for their loads.
+    def make_available(connection, cursor, statement, parameters, context, executemany):
+        if statement.startswith('SELECT orders.vehicle_id, orders.size'):
+            cursor.connection.execute("UPDATE vehicles SET status = 'available' WHERE id = ?", (later_id,))
+
+    connection = db_session.connection()
+    event.listen(connection, 'before_cursor_execute', make_available)
+    try:
+        plan = plan_dispatch(db_session)
+    finally:
+        event.remove(connection, 'before_cursor_execute', make_available)
+
+    assert plan.assignments == [(orders[0].id, test_vehicle.id)]
+
+
+def test_apply_dispatch_returns_only_written_assignments(db_session, test_vehicle):
+    orders = add_unassigned_orders(db_session, ['xs', 's', 'm'])
+    plan = plan_dispatch(db_session)
+    orders[1].status = 'failed'
+    db_session.commit()
+
+    applied = apply_dispatch(db_session, plan)
+    db_session.commit()
+
+    assert [(row.id, row.vehicle_id) for row in applied] == [
+        (orders[0].id, test_vehicle.id), (orders[2].id, test_vehicle.id)
+    ]
+    db_session.expire_all()
+    assert [order.vehicle_id for order in orders] == [test_vehicle.id, None, test_vehicle.id]
+
+
+def test_dispatch_unauthorized(db_session, test_user):
+    test_user.role = 'driver'
+    db_session.commit()
+
+    response = client.post('/dispatch/run')
+    assert response.status_code == 403
+    assert response.json() == {'detail': 'You are not authorized to perform this action.'}
@@ -0,0 +1,193 @@
+from app.core.downsampling import (
+    compact_telemetry, compact_chunk, apply_retention, track_resolution, haversine_km, bucket_start,
+    TELEMETRY_RAW_RETENTION
+)
+from app.models import VehiclePosition, VehiclePositionMinute, VehiclePositionQuarterHour, utc_now
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import pytest
+from tests.conftest import (
+    client,
+    test_vehicle,
+    db_session,
+    TestingSessionLocal
+)
+
+
+def recent_start() -> datetime:
+    """A quarter-hour boundary recent enough for every retention window."""
+    return bucket_start(utc_now().replace(tzinfo=None) - timedelta(hours=3), timedelta(minutes=15))
+
+
+def add_positions(db_session, vehicle_id: int, start: datetime, count: int, every: timedelta = timedelta(seconds=20)):
+    points = [
+        VehiclePosition(vehicle_id=vehicle_id, recorded_at=start + index * every, latitude=14.5,
+                        longitude=120.9 + index / 1000, speed_kmh=float(30 + index % 3 * 10))
+        for index in range(count)
+    ]
+    db_session.add_all(points)
+    db_session.commit()
+    return points
+
+
+def test_haversine_km():
+    assert haversine_km(14.5, 120.9, 14.5, 120.9) == 0
+    # One degree of latitude is about 111.2 km.
+    assert haversine_km(0, 0, 1, 0) == pytest.approx(111.19, abs=0.01)
+
+
+def test_bucket_start():
+    value = datetime(2025, 12, 12, 10, 29, 59)
+    assert bucket_start(value, timedelta(minutes=1)) == datetime(2025, 12, 12, 10, 29)
+    assert bucket_start(value, timedelta(minutes=15)) == datetime(2025, 12, 12, 10, 15)
+
+
+@pytest.mark.parametrize('chunk_size', [4, 1000])
+def test_compact_telemetry_rolls_up(db_session, test_vehicle, chunk_size):
+    start = recent_start()
+    points = add_positions(db_session, test_vehicle.id, start, 10)
+
+    assert compact_telemetry(db_session, chunk_size=chunk_size) == 10
+    assert compact_telemetry(db_session, chunk_size=chunk_size) == 0
+
+    minutes = db_session.query(VehiclePositionMinute).order_by(VehiclePositionMinute.bucket).all()
+    assert [((row.bucket - start) // timedelta(minutes=1), row.ping_count) for row in minutes] == [
+        (0, 3), (1, 3), (2, 3), (3, 1)
+    ]
+    assert minutes[0].recorded_at == points[2].recorded_at
+    assert minutes[0].longitude == points[2].longitude
+    assert minutes[0].avg_speed_kmh == pytest.approx(40.0)
+
+    legs = [haversine_km(a.latitude, a.longitude, b.latitude, b.longitude) for a, b in zip(points, points[1:])]
+    assert sum(row.distance_km for row in minutes) == pytest.approx(sum(legs))
+    # The leg into each minute belongs to the minute it ends in.
+    assert minutes[1].distance_km == pytest.approx(sum(legs[2:5]))
+
+    quarter = db_session.query(VehiclePositionQuarterHour).one()
+    assert quarter.bucket == start
+    assert quarter.ping_count == 10
+    assert quarter.distance_km == pytest.approx(sum(legs))
+    assert quarter.recorded_at == points[-1].recorded_at
+
+
+def test_concurrent_compactions_count_each_ping_once(db_session, test_vehicle):
+    start = recent_start()
+    add_positions(db_session, test_vehicle.id, start, 200, every=timedelta(seconds=1))
+    ready = threading.Barrier(2)
+
+    def compact() -> int:
+        with TestingSessionLocal() as db:
+            ready.wait()
+            return compact_telemetry(db, chunk_size=10)
+
+    with ThreadPoolExecutor(2) as pool:
+        compacted = [future.result() for future in [pool.submit(compact) for _ in range(2)]]
+
+    assert sum(compacted) == 200
+    minutes = db_session.query(VehiclePositionMinute).all()
+    assert sum(row.ping_count for row in minutes) == 200
+    assert db_session.query(VehiclePositionQuarterHour).one().ping_count == 200
+
+
+def test_compact_telemetry_merges_late_pings(db_session, test_vehicle):
+    start = recent_start()
+    add_positions(db_session, test_vehicle.id, start, 3)
+    compact_telemetry(db_session)
+
+    db_session.add(VehiclePosition(vehicle_id=test_vehicle.id, recorded_at=start + timedelta(seconds=10),
+                                   latitude=14.6, longitude=121.0, speed_kmh=None))
+    db_session.commit()
+    compact_telemetry(db_session)
+
+    minute = db_session.query(VehiclePositionMinute).one()
+    assert minute.ping_count == 4
+    assert minute.speed_samples == 3
+    assert minute.avg_speed_kmh == pytest.approx(40.0)
+    # Older than the last rolled-up point: counted, but it moves neither the position nor the distance.
+    assert minute.recorded_at == start + timedelta(seconds=40)
+    assert minute.latitude == 14.5
+
+
+def test_apply_retention(db_session, test_vehicle):
+    now = utc_now().replace(tzinfo=None)
+    old = bucket_start(now - TELEMETRY_RAW_RETENTION - timedelta(days=1), timedelta(minutes=15))
+    add_positions(db_session, test_vehicle.id, old, 5)
+    compact_chunk(db_session)
+    add_positions(db_session, test_vehicle.id, old, 2)
+    add_positions(db_session, test_vehicle.id, now - timedelta(hours=1), 3)
+
+    # Only the five old rows already rolled up go; the two written since wait for the next compaction.
+    assert apply_retention(db_session, now=now, chunk_size=2) == 5
+    assert db_session.query(VehiclePosition).count() == 5
+    assert db_session.query(VehiclePositionMinute).count() == 2
+
+    compact_chunk(db_session)
+    apply_retention(db_session, now=now + timedelta(days=365))
+    assert db_session.query(VehiclePosition).count() == 0
+    assert db_session.query(VehiclePositionMinute).count() == 0
+    assert db_session.query(VehiclePositionQuarterHour).count() > 0
+
+
+def test_compaction_after_retention_empties_the_table(db_session, test_vehicle):
+    old = bucket_start(utc_now().replace(tzinfo=None) - TELEMETRY_RAW_RETENTION - timedelta(days=1),
+                       timedelta(minutes=15))
+    add_positions(db_session, test_vehicle.id, old, 3)
+    assert compact_telemetry(db_session) == 3
+    assert db_session.query(VehiclePosition).count() == 0
+
+    add_positions(db_session, test_vehicle.id, recent_start(), 1)
+
+    assert compact_telemetry(db_session) == 1
+    assert db_session.query(VehiclePosition).count() == 1
+
+
+def test_track_resolution():
+    now = datetime(2026, 3, 1, 12, 0)
+    assert track_resolution(now - timedelta(minutes=30), now, now).name == 'raw'
+    assert track_resolution(now - timedelta(hours=6), now, now).name == '1m'
+    assert track_resolution(now - timedelta(days=3), now, now).name == '15m'
+    # Raw pings no longer reach that far back.
+    assert track_resolution(now - timedelta(days=30), now - timedelta(days=30) + timedelta(minutes=5), now).name == '1m'
+    assert track_resolution(now - timedelta(days=365), now - timedelta(days=364), now).name == '15m'
+
+
+def test_get_vehicle_track(db_session, test_vehicle):
+    start = recent_start()
+    add_positions(db_session, test_vehicle.id, start, 90)
+    compact_telemetry(db_session)
+
+    def track(span: timedelta) -> dict:
+        response = client.get(f'/vehicles/{test_vehicle.id}/track', params={
+            'start': start.isoformat(), 'end': (start + span).isoformat()
+        })
+        assert response.status_code == 200
+        return response.json()
+
+    raw = track(timedelta(minutes=10))
+    assert raw['resolution'] == 'raw'
+    assert len(raw['points']) == 30
+    assert raw['points'][0]['distance_km'] is None
+
+    minutes = track(timedelta(hours=2))
+    assert minutes['resolution'] == '1m'
+    assert len(minutes['points']) == 30
+
+    quarters = track(timedelta(days=2))
+    assert quarters['resolution'] == '15m'
+    assert len(quarters['points']) == 2
+    assert sum(point['distance_km'] for point in quarters['points']) == pytest.approx(
+        sum(point['distance_km'] for point in minutes['points'])
+    )
+
+
+def test_get_vehicle_track_errors(test_vehicle):
+    response = client.get('/vehicles/999/track')
+    assert response.status_code == 404
+    assert response.json() == {'detail': 'The specified vehicle could not be found.'}
+
+    response = client.get(f'/vehicles/{test_vehicle.id}/track', params={
+        'start': '2025-12-12T11:00:00', 'end': '2025-12-12T10:00:00'
+    })
+    assert response.status_code == 400
+    assert response.json() == {'detail': 'The start of the range must be before its end.'}
@@ -0,0 +1,76 @@
+from app.core.intervals import IntervalTree, OrderWindowIndex
+from app.models import Order
+from datetime import datetime, timedelta
+import numpy as np
+from tests.conftest import (
+    test_vehicle,
+    db_session
+)
+
+
+def test_interval_tree_matches_brute_force():
+    rng = np.random.default_rng(3)
+    starts = rng.integers(0, 10_000, 5_000)
+    ends = starts + rng.integers(0, 500, 5_000)
+    tree = IntervalTree(starts, ends, leaf_size=8)
+
+    for low in rng.integers(-100, 10_500, 200):
+        high = low + rng.integers(0, 800)
+        expected = np.flatnonzero((starts <= high) & (ends >= low))
+        assert np.array_equal(np.sort(tree.overlapping(low, high)), expected)
+
+
+def test_interval_tree_handles_identical_and_empty_input():
+    tree = IntervalTree(np.full(300, 5), np.full(300, 5), leaf_size=4)
+    assert len(tree.overlapping(0, 5)) == 300
+    assert len(tree.overlapping(6, 9)) == 0
+    assert len(IntervalTree(np.empty(0), np.empty(0)).overlapping(0, 1)) == 0
+
+
+def add_order(db_session, start: datetime, hours: int) -> Order:
+    order = Order(
+        destination='manila',
+        size='s',
+        priority=False,
+        delivery_window_start=start,
+        delivery_window_end=start + timedelta(hours=hours),
+        status='pending'
+    )
+    db_session.add(order)
+    db_session.commit()
+    return order
+
+
+def test_order_window_index_follows_writes(db_session):
+    index = OrderWindowIndex(refresh_interval=0)
+    morning = add_order(db_session, datetime(2025, 10, 2, 8, 0), 2)
+    assert index.stale()
+    assert index.candidates(db_session, None, None, 'id') is None
+    index.rebuild(db_session)
+    assert not index.stale()
+
+    afternoon = add_order(db_session, datetime(2025, 10, 2, 14, 0), 2)
+    assert index.candidates(db_session, datetime(2025, 10, 2, 13, 0), datetime(2025, 10, 2, 15, 0), 'id') == [afternoon.id]
+
+    morning.delivery_window_start = datetime(2025, 10, 2, 13, 0)
+    morning.delivery_window_end = datetime(2025, 10, 2, 17, 0)
+    db_session.commit()
+    assert index.candidates(db_session, datetime(2025, 10, 2, 13, 0), datetime(2025, 10, 2, 15, 0), 'id') == [morning.id, afternoon.id]
+    assert index.candidates(db_session, datetime(2025, 10, 2, 8, 0), datetime(2025, 10, 2, 9, 0), 'id') == []
+    assert index.candidates(db_session, None, None, 'id', after=[morning.id]) == [afternoon.id]
+
+
+def test_order_window_index_goes_stale_without_blocking_reads(db_session):
+    index = OrderWindowIndex(refresh_interval=0, overlay_limit=1)
+    first = add_order(db_session, datetime(2025, 10, 2, 8, 0), 2)
+    index.rebuild(db_session)
+
+    second = add_order(db_session, datetime(2025, 10, 2, 9, 0), 2)
+    third = add_order(db_session, datetime(2025, 10, 2, 10, 0), 2)
+    # Past the overlay limit the index asks for a rebuild, but keeps answering from the overlay.
+    assert index.candidates(db_session, None, None, 'id') == [first.id, second.id, third.id]
+    assert index.stale()
+
+    index.rebuild(db_session)
+    assert not index.stale()
+    assert index.candidates(db_session, None, None, 'id') == [first.id, second.id, third.id]
@@ -0,0 +1,78 @@
+from app.core.metrics import MetricsRegistry
+from app.core.querystats import QueryStatsMiddleware
+from tests.conftest import (
+    client,
+    engine,
+    test_order,
+    query_budget
+)
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+import threading
+
+
+def test_metrics_endpoint(test_order):
+    client.get('/orders/')
+    client.get(f'/orders/{test_order.id}')
+    client.get('/orders/999')
+
+    response = client.get('/metrics')
+    body = response.text
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+    assert '# TYPE logitrack_http_request_duration_seconds histogram' in body
+    assert 'logitrack_http_request_duration_seconds_bucket{method="GET",route="/orders/",le="+Inf"}' in body
+    assert 'logitrack_http_requests_total{method="GET",route="/orders/{order_id}",status="404"}' in body
+    assert 'logitrack_http_requests_in_flight' in body
+    assert 'logitrack_db_pool_checked_out' in body
+
+
+def test_metrics_unmatched_route():
+    client.get('/does-not-exist')
+
+    assert 'route="unmatched",status="404"' in client.get('/metrics').text
+
+
+def test_registry_merges_thread_shards():
+    metrics = MetricsRegistry(buckets=(0.1, 1.0))
+    metrics.describe('jobs_total', 'counter', 'Jobs.')
+    metrics.describe('job_seconds', 'histogram', 'Job latency.')
+
+    def work():
+        for _ in range(100):
+            metrics.inc('jobs_total', queue='default')
+            metrics.observe('job_seconds', 0.5, queue='default')
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    metrics.inc('jobs_total', queue='default')
+
+    body = metrics.render()
+
+    assert metrics.value('jobs_total', queue='default') == 401
+    assert 'job_seconds_bucket{queue="default",le="0.1"} 0' in body
+    assert 'job_seconds_bucket{queue="default",le="1.0"} 400' in body
+    assert 'job_seconds_count{queue="default"} 400' in body
+
+
+
+def test_query_stats_flags_repeated_statements(query_budget):
+    probe_app = FastAPI()
+    probe_app.add_middleware(QueryStatsMiddleware)
+
+    @probe_app.get('/probe')
+    def probe():
+        with engine.connect() as connection:
+            for value in range(3):
+                connection.execute(text('SELECT :value'), {'value': value})
+
+    response = TestClient(probe_app).get('/probe')
+
+    assert response.headers['x-db-query-count'] == '3'
+    assert response.headers['x-db-repeated-queries'] == '3'
+    assert float(response.headers['x-db-time-ms']) >= 0
\ No newline at end of file
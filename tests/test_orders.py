@@ -1,9 +1,19 @@
 from app.models import User, Vehicle, Order
+from app.core.pagination import MAX_PAGE_SIZE
+from app.core.intervals import order_windows
+from app.schemas.order import OrderPage
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from datetime import datetime
+import csv
+import io
+import json
 from tests.conftest import (
     client,
     test_vehicle,
     test_order,
-    db_session
+    db_session,
+    query_budget
 )
 
 
@@ -12,8 +22,171 @@ def test_get_all_orders(test_order):
     data = response.json()
 
     assert response.status_code == 200
-    assert isinstance(data, list)
-    assert data[0].get('id') == test_order.id
+    assert isinstance(data.get('items'), list)
+    assert data['items'][0].get('id') == test_order.id
+    assert data.get('next_cursor') is None
+
+
+def test_get_all_orders_matches_response_model(db_session, test_order):
+    db_session.add(Order(
+        destination='Parañaque',
+        size='m',
+        priority=True,
+        delivery_window_start=datetime(2025, 12, 24, 15, 30),
+        delivery_window_end=datetime(2025, 12, 25, 0, 5),
+        status='in_transit',
+        vehicle_id=None
+    ))
+    db_session.commit()
+
+    response = client.get('/orders/', params={'limit': 1})
+    next_page = client.get('/orders/', params={'limit': 1, 'cursor': response.json()['next_cursor']})
+    orders = db_session.query(Order).order_by(Order.id).all()
+
+    for page, order in ((response, orders[0]), (next_page, orders[1])):
+        expected = OrderPage.model_validate({'items': [order], 'next_cursor': page.json()['next_cursor']})
+        assert page.content == JSONResponse(jsonable_encoder(expected.model_dump(mode='json'))).body
+    assert '"delivery_window_start":"Dec 24, 2025 03:30 PM"' in next_page.text
+
+
+def test_get_all_orders_delivery_window_filters(db_session, test_vehicle):
+    windows = {
+        'morning': (datetime(2025, 10, 2, 8, 0), datetime(2025, 10, 2, 12, 0)),
+        'afternoon': (datetime(2025, 10, 2, 13, 0), datetime(2025, 10, 2, 15, 30)),
+        'all day': (datetime(2025, 10, 2, 6, 0), datetime(2025, 10, 2, 20, 0)),
+        'next day': (datetime(2025, 10, 3, 9, 0), datetime(2025, 10, 3, 11, 0)),
+    }
+    for destination, (start, end) in windows.items():
+        db_session.add(Order(
+            destination=destination,
+            size='s',
+            priority=False,
+            delivery_window_start=start,
+            delivery_window_end=end,
+            status='pending',
+            vehicle_id=test_vehicle.id
+        ))
+    db_session.commit()
+
+    overlapping = client.get('/orders/', params={
+        'window_from': '2025-10-02T14:00', 'window_to': '2025-10-02T16:00'
+    }).json()
+    assert [item['destination'] for item in overlapping['items']] == ['afternoon', 'all day']
+    # The same answer from SQL before the window index is built and from the index after.
+    order_windows.rebuild(db_session)
+
+    first_page = client.get('/orders/', params={
+        'window_from': '2025-10-02T11:00', 'window_to': '2025-10-02T14:00', 'limit': 2, 'order_by': 'updated_at'
+    }).json()
+    second_page = client.get('/orders/', params={
+        'window_from': '2025-10-02T11:00', 'window_to': '2025-10-02T14:00', 'limit': 2, 'order_by': 'updated_at',
+        'cursor': first_page['next_cursor']
+    }).json()
+    destinations = [item['destination'] for item in first_page['items'] + second_page['items']]
+    assert destinations == ['morning', 'afternoon', 'all day']
+    assert second_page['next_cursor'] is None
+
+    due = client.get('/orders/', params={
+        'due_from': '2025-10-02T15:00Z', 'due_to': '2025-10-02T16:00Z'
+    }).json()
+    assert [item['destination'] for item in due['items']] == ['afternoon']
+
+
+def test_get_all_orders_pagination(db_session, test_vehicle):
+    for destination in ('manila', 'cebu', 'davao'):
+        db_session.add(Order(
+            destination=destination,
+            size='s',
+            priority=False,
+            delivery_window_start=datetime(2025, 10, 2, 9, 0),
+            delivery_window_end=datetime(2025, 10, 4, 18, 0),
+            status='pending',
+            vehicle_id=test_vehicle.id
+        ))
+    db_session.commit()
+
+    for order_by in ('id', 'updated_at'):
+        first_page = client.get('/orders/', params={'limit': 2, 'order_by': order_by}).json()
+        assert len(first_page['items']) == 2
+        assert first_page['next_cursor'] is not None
+
+        second_page = client.get('/orders/', params={
+            'limit': 2,
+            'order_by': order_by,
+            'cursor': first_page['next_cursor']
+        }).json()
+        assert len(second_page['items']) == 1
+        assert second_page['next_cursor'] is None
+
+        seen = [order['id'] for order in first_page['items'] + second_page['items']]
+        assert sorted(seen) == sorted(set(seen))
+        assert len(seen) == 3
+
+
+def test_get_all_orders_invalid_cursor(test_order):
+    response = client.get('/orders/', params={'cursor': 'not-a-cursor'})
+
+    assert response.status_code == 400
+    assert response.json() == {'detail': 'The provided cursor is invalid.'}
+
+
+def test_get_all_orders_sparse_fields(db_session, test_order):
+    db_session.add(Order(
+        destination='cebu',
+        size='s',
+        priority=False,
+        delivery_window_start=datetime(2025, 10, 2, 9, 0),
+        delivery_window_end=datetime(2025, 10, 4, 18, 0),
+        status='pending',
+        vehicle_id=None
+    ))
+    db_session.commit()
+
+    for order_by in ('id', 'updated_at'):
+        first_page = client.get('/orders/', params={'fields': 'status,id', 'limit': 1, 'order_by': order_by}).json()
+        assert list(first_page['items'][0]) == ['id', 'status']
+        second_page = client.get('/orders/', params={
+            'fields': 'status,id', 'limit': 1, 'order_by': order_by, 'cursor': first_page['next_cursor']
+        }).json()
+        assert second_page['items'][0]['id'] != first_page['items'][0]['id']
+        assert second_page['next_cursor'] is None
+
+    response = client.get('/orders/', params={'fields': 'id,weight'})
+    assert response.status_code == 400
+    assert response.json() == {'detail': 'Unknown fields: weight.'}
+
+
+def test_get_all_orders_limit_too_large(test_order):
+    response = client.get('/orders/', params={'limit': MAX_PAGE_SIZE + 1})
+
+    assert response.status_code == 422
+
+
+def test_export_orders_ndjson(test_order):
+    response = client.get('/orders/export')
+    lines = response.text.splitlines()
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+    assert len(lines) == 1
+    assert json.loads(lines[0]) == client.get(f'/orders/{test_order.id}').json()
+
+
+def test_export_orders_csv(test_order):
+    response = client.get('/orders/export', params={'format': 'csv'})
+    rows = list(csv.reader(io.StringIO(response.text)))
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/csv')
+    assert rows[0][0] == 'id'
+    assert rows[1][0] == str(test_order.id)
+
+
+def test_export_orders_filters(test_order):
+    response = client.get('/orders/export', params={'order_status': 'completed'})
+
+    assert response.status_code == 200
+    assert response.text == ''
 
 
 def test_get_order_by_id(test_order):
@@ -23,6 +196,13 @@ def test_get_order_by_id(test_order):
     assert response.json().get('id') == test_order.id
 
 
+def test_get_order_by_id_sparse_fields(test_order, test_vehicle):
+    response = client.get(f'/orders/{test_order.id}', params={'fields': 'id,status,vehicle_id'})
+
+    assert response.json() == {'id': test_order.id, 'status': 'pending', 'vehicle_id': test_vehicle.id}
+    assert response.headers['etag'] == client.get(f'/orders/{test_order.id}').headers['etag']
+
+
 def test_get_order_by_id_not_found():
     response = client.get('/orders/999')
 
@@ -49,6 +229,77 @@ def test_add_order(test_vehicle):
     assert data.get('vehicle_id') == test_vehicle.id
 
 
+def test_add_order_vehicle_not_found(db_session, test_vehicle):
+    data_request = {
+        'destination': 'Manila',
+        'size': 'xs',
+        'priority': False,
+        'delivery_window_start': '2025-09-02 10:00',
+        'delivery_window_end': '2025-09-03 10:00',
+        'status': 'pending',
+        'vehicle_id': 999
+    }
+    response = client.post('/orders/', json=data_request)
+
+    assert response.status_code == 404
+    assert response.json() == {'detail': 'The specified vehicle could not be found.'}
+    assert db_session.query(Order).count() == 0
+
+
+def test_add_orders_bulk(db_session, test_vehicle):
+    valid_order = {
+        'destination': 'Manila',
+        'size': 's',
+        'priority': True,
+        'delivery_window_start': '2025-09-02 10:00',
+        'delivery_window_end': '2025-09-03 10:00',
+        'status': 'pending',
+        'vehicle_id': test_vehicle.id
+    }
+    data_request = [
+        valid_order,
+        {**valid_order, 'size': 'huge'},
+        {**valid_order, 'vehicle_id': 999},
+        {**valid_order, 'delivery_window_start': 'tomorrow'},
+        {**valid_order, 'vehicle_id': None},
+    ]
+
+    response = client.post('/orders/bulk', json=data_request, params={'chunk_size': 1})
+    data = response.json()
+
+    assert response.status_code == 200
+    assert data.get('created') == 2
+    assert [error['index'] for error in data.get('errors')] == [1, 2, 3]
+    assert db_session.query(Order).filter(Order.id.in_(data.get('order_ids'))).count() == 2
+
+
+def test_add_orders_bulk_ndjson(test_vehicle):
+    valid_order = {
+        'destination': 'Cebu',
+        'size': 'xl',
+        'priority': False,
+        'delivery_window_start': '2025-09-02 10:00',
+        'delivery_window_end': '2025-09-03 10:00',
+        'status': 'pending',
+        'vehicle_id': test_vehicle.id
+    }
+    body = '\n'.join([json.dumps(valid_order), '{not json', json.dumps(valid_order)])
+
+    response = client.post('/orders/bulk', content=body, headers={'Content-Type': 'application/x-ndjson'})
+    data = response.json()
+
+    assert response.status_code == 200
+    assert data.get('created') == 2
+    assert data.get('errors') == [{'index': 1, 'detail': 'Invalid JSON.'}]
+
+
+def test_add_orders_bulk_invalid_body():
+    response = client.post('/orders/bulk', json={'destination': 'Manila'})
+
+    assert response.status_code == 400
+    assert response.json() == {'detail': 'The request body must be a JSON array or NDJSON.'}
+
+
 def test_update_order_status(test_order):
     data_request = {
         'order_status': 'completed',
@@ -61,6 +312,47 @@ def test_update_order_status(test_order):
     assert data.get('status') == data_request.get('order_status')
 
 
+def test_get_order_by_id_not_modified(query_budget, test_order):
+    response = client.get(f'/orders/{test_order.id}')
+    etag = response.headers['etag']
+
+    cached = client.get(f'/orders/{test_order.id}', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.headers['etag'] == etag
+    assert cached.content == b''
+    query_budget(cached, max_queries=1)
+
+    client.put(f'/orders/{test_order.id}/status', json={'order_status': 'completed'})
+    changed = client.get(f'/orders/{test_order.id}', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['etag'] != etag
+    assert changed.json().get('status') == 'completed'
+
+
+def test_get_all_orders_not_modified(test_order, test_vehicle):
+    response = client.get('/orders/', params={'order_status': 'pending'})
+    etag = response.headers['etag']
+
+    cached = client.get('/orders/', params={'order_status': 'pending'}, headers={'If-None-Match': f'W/{etag}, "other"'})
+    assert cached.status_code == 304
+
+    other_filter = client.get('/orders/', params={'order_status': 'completed'}, headers={'If-None-Match': etag})
+    assert other_filter.status_code == 200
+
+    client.post('/orders/', json={
+        'destination': 'Manila',
+        'size': 'xs',
+        'priority': False,
+        'delivery_window_start': '2025-09-02 10:00',
+        'delivery_window_end': '2025-09-03 10:00',
+        'status': 'pending',
+        'vehicle_id': test_vehicle.id
+    })
+    changed = client.get('/orders/', params={'order_status': 'pending'}, headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert len(changed.json()['items']) == 2
+
+
 def test_update_order_status_duplicate(test_order):
     data_request = {
         'order_status': test_order.status,
@@ -103,4 +395,26 @@ def test_order_response_serialization(test_order):
     'vehicle_id',
     }
 
-    assert set(data[0].keys()) == expected_keys
\ No newline at end of file
+    assert set(data['items'][0].keys()) == expected_keys
+
+
+def test_order_routes_query_budget(query_budget, test_order, test_vehicle):
+    query_budget(client.get('/orders/'), max_queries=2)
+    query_budget(client.get(f'/orders/{test_order.id}'), max_queries=1)
+
+    data_request = {
+        'destination': 'Manila',
+        'size': 'xs',
+        'priority': False,
+        'delivery_window_start': '2025-09-02 10:00',
+        'delivery_window_end': '2025-09-03 10:00',
+        'status': 'pending',
+        'vehicle_id': test_vehicle.id
+    }
+    # INSERT ... RETURNING, the change log entry and the summary upsert.
+    created = client.post('/orders/', json=data_request)
+    query_budget(created, max_queries=3)
+    query_budget(client.post('/orders/bulk', json=[data_request] * 20), max_queries=4)
+    updated = client.put(f"/orders/{created.json()['id']}/status", json={'order_status': 'completed'})
+    query_budget(updated, max_queries=4)
+    assert updated.json()['status'] == 'completed'
\ No newline at end of file
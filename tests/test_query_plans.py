@@ -0,0 +1,171 @@
+from app.models import User, Vehicle, Order
+from app.core.intervals import order_windows
+from tests.conftest import (
+    client,
+    engine,
+    db_session
+)
+from sqlalchemy import event, insert, select, text
+from datetime import datetime
+import bcrypt
+import pytest
+
+
+SIZES = ('xs', 's', 'm', 'l', 'xl')
+ORDER_STATUSES = ('pending', 'in_transit', 'completed', 'failed')
+VEHICLE_TYPES = ('motorcycle', 'sedan', 'pickup', 'van', 'truck')
+VEHICLE_STATUSES = ('available', 'on_route', 'maintenance', 'inactive')
+
+
+@pytest.fixture
+def seeded_db(db_session):
+    driver = User(
+        username='seed_driver',
+        email='seed_driver@email.com',
+        role='driver',
+        hashed_password=bcrypt.hashpw(b'12345', bcrypt.gensalt(4)).decode()
+    )
+    db_session.add(driver)
+    db_session.commit()
+
+    db_session.execute(insert(User), [
+        {
+            'username': f'seed_driver_{index}',
+            'email': f'seed_driver_{index}@email.com',
+            'role': 'driver',
+            'hashed_password': driver.hashed_password
+        }
+        for index in range(19)
+    ])
+    driver_ids = db_session.scalars(select(User.id).where(User.role == 'driver')).all()
+
+    db_session.execute(insert(Vehicle), [
+        {
+            'license_plate': f'seed{index:04d}',
+            'type': VEHICLE_TYPES[index % len(VEHICLE_TYPES)],
+            'capacity_kg': 500 + 250 * (index % 8),
+            'status': VEHICLE_STATUSES[index % len(VEHICLE_STATUSES)],
+            'driver_id': driver_ids[index % len(driver_ids)]
+        }
+        for index in range(200)
+    ])
+    vehicle_ids = db_session.scalars(select(Vehicle.id)).all()
+
+    db_session.execute(insert(Order), [
+        {
+            'destination': f'city {index % 50}',
+            'size': SIZES[index % len(SIZES)],
+            'priority': index % 7 == 0,
+            'delivery_window_start': datetime(2025, 10, 2, 9, 0),
+            'delivery_window_end': datetime(2025, 10, 4, 18, 0),
+            'status': ORDER_STATUSES[index % len(ORDER_STATUSES)],
+            'vehicle_id': vehicle_ids[index % len(vehicle_ids)]
+        }
+        for index in range(2000)
+    ])
+    db_session.commit()
+
+    with engine.connect() as connection:
+        connection.execute(text('ANALYZE'))
+        connection.commit()
+
+    # The lifespan task builds the in-memory window index off the request
+    # path; only the incremental reads made per request are checked.
+    order_windows.rebuild(db_session)
+
+    yield db_session
+
+
+def capture_selects(method: str, url: str, **kwargs) -> list:
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        client.request(method, url, **kwargs)
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    return statements
+
+
+def explain(statement: str, parameters) -> str:
+    with engine.connect() as connection:
+        if connection.dialect.name == 'sqlite':
+            rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+            return '\n'.join(row[-1] for row in rows)
+
+        # Tiny seeded tables are cheaper to scan, so make the planner show
+        # whether a usable index exists at all.
+        connection.exec_driver_sql('SET enable_seqscan = off')
+        rows = connection.exec_driver_sql(f'EXPLAIN {statement}', parameters).all()
+        return '\n'.join(row[0] for row in rows)
+
+
+def has_sequential_scan(plan: str) -> bool:
+    for line in plan.splitlines():
+        line = line.strip()
+        if 'Seq Scan' in line:
+            return True
+        if line.startswith('SCAN ') and ' USING ' not in line:
+            return True
+    return False
+
+
+ROUTER_QUERIES = [
+    ('GET', '/orders/?destination=city 7'),
+    ('GET', '/orders/?size=m'),
+    ('GET', '/orders/?order_status=pending'),
+    ('GET', '/orders/?destination=city 7&order_status=pending'),
+    ('GET', '/orders/?size=m&order_status=pending'),
+    ('GET', '/orders/?destination=city 7&size=m'),
+    ('GET', '/orders/?order_status=pending&order_by=updated_at'),
+    ('GET', '/orders/export?order_status=failed'),
+    ('GET', '/orders/?due_from=2025-10-04T00:00&due_to=2025-10-04T12:00'),
+    ('GET', '/orders/?window_from=2025-10-03T00:00&window_to=2025-10-03T01:00&order_status=pending'),
+    ('GET', '/vehicles/?vehicle_type=van'),
+    ('GET', '/vehicles/?vehicle_status=available'),
+    ('GET', '/vehicles/?capacity_kg=1000'),
+    ('GET', '/vehicles/?vehicle_type=van&capacity_kg=1000'),
+    ('GET', '/vehicles/?vehicle_type=van&vehicle_status=available'),
+    ('GET', '/vehicles/?driver_id=1'),
+]
+
+
+@pytest.mark.parametrize('method, url', ROUTER_QUERIES)
+def test_router_query_uses_index(seeded_db, method, url):
+    statements = capture_selects(method, url)
+    assert statements
+
+    for statement, parameters in statements:
+        plan = explain(statement, parameters)
+        assert not has_sequential_scan(plan), f'{url} regressed to a sequential scan:\n{statement}\n{plan}'
+
+
+def test_add_vehicle_lookups_use_index(seeded_db):
+    driver = seeded_db.query(User).filter(User.username == 'seed_driver').first()
+    data_request = {
+        'license_plate': 'seed0001',
+        'vehicle_type': 'van',
+        'capacity_kg': 1500,
+        'vehicle_status': 'available',
+        'driver_id': driver.id
+    }
+    statements = capture_selects('POST', '/vehicles/', json=data_request)
+    assert statements
+
+    for statement, parameters in statements:
+        plan = explain(statement, parameters)
+        assert not has_sequential_scan(plan), f'add_vehicle regressed to a sequential scan:\n{statement}\n{plan}'
+
+
+def test_login_lookup_uses_index(seeded_db):
+    statements = capture_selects('POST', '/auth/token', data={'username': 'seed_driver', 'password': 'wrong'})
+    assert statements
+
+    for statement, parameters in statements:
+        plan = explain(statement, parameters)
+        assert not has_sequential_scan(plan), f'login regressed to a sequential scan:\n{statement}\n{plan}'
@@ -0,0 +1,128 @@
+from app.core.search import match_destinations, similarity
+from app.core.stats import recount_summary
+from app.models import Order
+from datetime import datetime
+import pytest
+from tests.conftest import (
+    client,
+    test_vehicle,
+    db_session
+)
+
+
+@pytest.fixture
+def destination_orders(db_session, test_vehicle):
+    orders = {}
+    for destination, size in (
+        ('Manila', 's'), ('Mandaluyong', 'm'), ('Manila', 'l'), ('San Juan', 's'), ('Makati', 's'), ('Manila', 's'),
+    ):
+        order = Order(
+            destination=destination,
+            size=size,
+            priority=False,
+            delivery_window_start=datetime(2025, 1, 9, 9, 0),
+            delivery_window_end=datetime(2025, 1, 9, 18, 0),
+            status='pending',
+            vehicle_id=test_vehicle.id
+        )
+        db_session.add(order)
+        db_session.commit()
+        orders.setdefault(destination, []).append(order.id)
+    # Fixture rows skip the write handlers, so rebuild the destination counts the search reads.
+    recount_summary(db_session)
+    db_session.commit()
+    return orders
+
+
+def test_similarity_matches_pg_trgm():
+    assert similarity('manila', 'manila') == 1
+    assert similarity('manla', 'manila') == pytest.approx(4 / 9)
+    assert similarity('', 'manila') == 0
+
+
+def test_match_destinations_ranks_prefix_then_typos(db_session, destination_orders):
+    assert match_destinations(db_session, 'man') == ['Manila', 'Mandaluyong']
+    assert match_destinations(db_session, 'juan') == ['San Juan']
+    assert match_destinations(db_session, 'manla') == ['Manila']
+    assert match_destinations(db_session, 'ma') == ['Makati', 'Manila', 'Mandaluyong']
+    assert match_destinations(db_session, 'cebu') == []
+
+
+def test_search_orders_with_typo(destination_orders):
+    response = client.get('/orders/', params={'q': 'manla'})
+    assert response.status_code == 200
+    assert [order['id'] for order in response.json()['items']] == destination_orders['Manila']
+
+
+def test_search_orders_paginates_across_destinations(destination_orders):
+    expected = destination_orders['Manila'] + destination_orders['Mandaluyong']
+    seen, cursor = [], None
+    while True:
+        params = {'q': 'man', 'limit': 2}
+        if cursor is not None:
+            params['cursor'] = cursor
+        page = client.get('/orders/', params=params).json()
+        seen.extend(order['id'] for order in page['items'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+
+    assert seen == expected
+
+
+def test_search_cursor_survives_ranking_changes(destination_orders):
+    def add_order(destination: str) -> int:
+        return client.post('/orders/', json={
+            'destination': destination, 'size': 's', 'priority': False, 'status': 'pending',
+            'delivery_window_start': '2025-01-09 09:00', 'delivery_window_end': '2025-01-09 18:00'
+        }).json()['id']
+
+    mandaluyong = destination_orders['Mandaluyong'] + [add_order('Mandaluyong')]
+    substring_match = add_order('Tondo, Manila')
+    first_page = client.get('/orders/', params={'q': 'man', 'limit': 4}).json()
+    assert [order['id'] for order in first_page['items']] == destination_orders['Manila'] + mandaluyong[:1]
+
+    # The destination the cursor stopped in leaves the ranking, and a new one ranks ahead of where it was.
+    for order_id in mandaluyong:
+        client.delete(f'/orders/{order_id}')
+    add_order('Manaoag')
+
+    page = client.get('/orders/', params={'q': 'man', 'limit': 4, 'cursor': first_page['next_cursor']})
+    assert page.status_code == 200
+    assert page.json() == {'items': [client.get(f'/orders/{substring_match}').json()], 'next_cursor': None}
+
+
+def test_search_returns_every_matching_destination(db_session, test_vehicle):
+    destinations = [f'Manila District {number:02d}' for number in range(60)]
+    db_session.add_all(
+        Order(destination=destination, size='s', priority=False, status='pending', vehicle_id=test_vehicle.id,
+              delivery_window_start=datetime(2025, 1, 9, 9, 0), delivery_window_end=datetime(2025, 1, 9, 18, 0))
+        for destination in destinations
+    )
+    db_session.commit()
+    recount_summary(db_session)
+    db_session.commit()
+
+    assert sorted(match_destinations(db_session, 'manila district')) == destinations
+    page = client.get('/orders/', params={'q': 'manila district', 'limit': 100}).json()
+    assert sorted(order['destination'] for order in page['items']) == destinations
+
+
+def test_search_orders_with_filters(destination_orders):
+    response = client.get('/orders/', params={'q': 'man', 'size': 's', 'window_from': '2025-01-09T12:00:00'})
+    assert [order['id'] for order in response.json()['items']] == [
+        destination_orders['Manila'][0], destination_orders['Manila'][2]
+    ]
+
+    response = client.get('/orders/', params={'q': 'man', 'window_from': '2025-01-10T00:00:00'})
+    assert response.json()['items'] == []
+
+
+def test_search_orders_rejects_bad_requests(destination_orders):
+    response = client.get('/orders/', params={'q': 'man', 'cursor': 'bogus'})
+    assert response.status_code == 400
+    assert response.json() == {'detail': 'The provided cursor is invalid.'}
+
+    response = client.get('/orders/', params={'q': 'man', 'include_archived': True})
+    assert response.status_code == 400
+    assert response.json() == {'detail': 'Search cannot be combined with include_archived.'}
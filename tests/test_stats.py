@@ -0,0 +1,78 @@
+from app.core.stats import recount_summary
+from app.models import Order, SummaryCount
+from datetime import datetime
+from tests.conftest import (
+    client,
+    test_vehicle,
+    test_order,
+    db_session,
+    query_budget
+)
+
+
+def order_request(vehicle_id: int, **overrides) -> dict:
+    return {
+        'destination': 'Manila',
+        'size': 's',
+        'priority': False,
+        'delivery_window_start': '2025-09-02 10:00',
+        'delivery_window_end': '2025-09-03 10:00',
+        'status': 'pending',
+        'vehicle_id': vehicle_id,
+        **overrides
+    }
+
+
+def test_get_stats_follows_writes(db_session, test_order, test_vehicle):
+    recount_summary(db_session)
+    db_session.commit()
+
+    stats = client.get('/stats/').json()
+    assert stats['orders'] == {
+        'total': 1, 'status': {'pending': 1}, 'size': {'m': 1}, 'destination': {'quezon city': 1}
+    }
+    assert stats['vehicles'] == {'total': 1, 'status': {'available': 1}, 'type': {'pickup': 1}}
+
+    new_order = client.post('/orders/', json=order_request(test_vehicle.id)).json()
+    client.post('/orders/bulk', json=[order_request(test_vehicle.id, size='xl')] * 3)
+    client.put(f'/orders/{test_order.id}/status', json={'order_status': 'completed'})
+    client.delete(f'/orders/{new_order["id"]}')
+    client.put(f'/vehicles/{test_vehicle.id}/status', json={'vehicle_status': 'maintenance'})
+
+    stats = client.get('/stats/').json()
+    assert stats['orders'] == {
+        'total': 4,
+        'status': {'completed': 1, 'pending': 3},
+        'size': {'m': 1, 'xl': 3},
+        'destination': {'Manila': 3, 'quezon city': 1}
+    }
+    assert stats['vehicles']['status'] == {'maintenance': 1}
+
+    client.delete(f'/vehicles/{test_vehicle.id}')
+    stats = client.get('/stats/').json()
+    assert stats['orders']['total'] == 0
+    assert stats['vehicles']['total'] == 0
+
+
+def test_recount_summary_corrects_drift(db_session, test_order):
+    recount_summary(db_session)
+    db_session.add(Order(
+        destination='cebu',
+        size='l',
+        priority=True,
+        delivery_window_start=datetime(2025, 10, 2, 9, 0),
+        delivery_window_end=datetime(2025, 10, 3, 9, 0),
+        status='pending',
+        vehicle_id=None
+    ))
+    db_session.query(SummaryCount).filter(SummaryCount.value == 'pending').update({'count': 7})
+    db_session.commit()
+    assert client.get('/stats/').json()['orders']['status'] == {'pending': 7}
+
+    recount_summary(db_session)
+    db_session.commit()
+    assert client.get('/stats/').json()['orders']['status'] == {'pending': 2}
+
+
+def test_get_stats_query_budget(query_budget, test_order):
+    query_budget(client.get('/stats/'), max_queries=1)
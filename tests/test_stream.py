@@ -0,0 +1,144 @@
+from app.core.events import EventBroker, event_broker
+from app.core.security import create_access_token
+from app.routers.stream import sse_events
+from datetime import timedelta
+from starlette.websockets import WebSocketDisconnect
+import asyncio
+import json
+import pytest
+from tests.conftest import (
+    client,
+    test_vehicle,
+    test_order,
+    db_session
+)
+
+
+def access_token(user) -> str:
+    return create_access_token(
+        username=user.username,
+        user_id=user.id,
+        expiry_time=timedelta(minutes=5),
+        role=user.role,
+        email=user.email,
+        token_version=user.token_version or 0
+    )
+
+
+def test_broker_filters_by_vehicle_driver_and_status():
+    async def scenario():
+        broker = EventBroker()
+        everyone = broker.subscribe()
+        by_vehicle = broker.subscribe(vehicle_id=1)
+        by_driver = broker.subscribe(driver_id=7, status='pending')
+        by_status = broker.subscribe(status='pending')
+
+        broker.publish('order.status_changed', {'id': 5, 'vehicle_id': 1, 'driver_id': 7, 'status': 'completed'},
+                       {'status': 'pending'})
+        broker.publish('vehicle.status_changed', {'id': 2, 'vehicle_id': 2, 'driver_id': 8, 'status': 'available'},
+                       {'status': 'maintenance'})
+
+        assert everyone.queue.qsize() == 2
+        assert by_vehicle.queue.qsize() == 1
+        assert by_driver.queue.qsize() == 1
+        assert by_status.queue.qsize() == 1
+        assert json.loads((await by_status.get()).payload) == {
+            'event': 'order.status_changed', 'id': 5, 'vehicle_id': 1, 'driver_id': 7, 'status': 'completed',
+            'previous': {'status': 'pending'}
+        }
+
+        for subscription in (everyone, by_vehicle, by_driver, by_status):
+            broker.unsubscribe(subscription)
+        assert len(broker) == 0
+
+    asyncio.run(scenario())
+
+
+def test_broker_drops_slow_subscribers():
+    async def scenario():
+        broker = EventBroker(max_queue_size=2)
+        slow = broker.subscribe()
+        fast = broker.subscribe()
+
+        for order_id in range(3):
+            broker.publish('order.created', {'id': order_id, 'vehicle_id': None, 'driver_id': None, 'status': 'pending'})
+            if fast.queue.full():
+                fast.queue.get_nowait()
+
+        assert slow.dropped
+        assert await slow.get() is None
+        assert not fast.dropped
+        assert len(broker) == 1
+
+    asyncio.run(scenario())
+
+
+def test_sse_events_frames(monkeypatch):
+    async def scenario():
+        broker = EventBroker()
+        monkeypatch.setattr('app.routers.stream.event_broker', broker)
+        stream = sse_events({'vehicle_id': 3}, heartbeat=0.01)
+        assert len(broker) == 0
+
+        assert await anext(stream) == b'retry: 3000\n\n'
+        assert await anext(stream) == b': keepalive\n\n'
+        broker.publish('vehicle.deleted', {'id': 3, 'vehicle_id': 3, 'driver_id': 1, 'status': 'available'})
+        frame = await anext(stream)
+        assert frame.startswith(b'event: vehicle.deleted\ndata: {')
+        await stream.aclose()
+        assert len(broker) == 0
+
+    asyncio.run(scenario())
+
+
+def test_stream_websocket_pushes_changes(test_user, test_order, test_vehicle):
+    token = access_token(test_user)
+    with client.websocket_connect(f'/stream/ws?token={token}&driver_id={test_vehicle.driver_id}') as ws:
+        client.put(f'/orders/{test_order.id}/status', json={'order_status': 'completed'})
+        event = ws.receive_json()
+        assert event == {
+            'event': 'order.status_changed',
+            'id': test_order.id,
+            'vehicle_id': test_vehicle.id,
+            'driver_id': test_vehicle.driver_id,
+            'status': 'completed',
+            'previous': {'status': 'pending'}
+        }
+
+        client.put(f'/vehicles/{test_vehicle.id}/status', json={'vehicle_status': 'maintenance'})
+        assert ws.receive_json()['event'] == 'vehicle.status_changed'
+
+    assert len(event_broker) == 0
+
+
+def test_stream_websocket_rejects_invalid_token():
+    with pytest.raises(WebSocketDisconnect) as error:
+        with client.websocket_connect('/stream/ws?token=invalid') as ws:
+            ws.receive_json()
+
+    assert error.value.code == 1008
+
+
+def test_stream_websocket_pushes_bulk_and_dispatch_changes(test_user, test_vehicle):
+    token = access_token(test_user)
+    order = {
+        'destination': 'Manila',
+        'size': 's',
+        'priority': False,
+        'delivery_window_start': '2025-09-02 10:00',
+        'delivery_window_end': '2025-09-03 10:00',
+        'status': 'pending',
+        'vehicle_id': None
+    }
+    with client.websocket_connect(f'/stream/ws?token={token}&status=pending') as ws:
+        order_ids = client.post('/orders/bulk', json=[order, order]).json()['order_ids']
+        created = [ws.receive_json() for _ in order_ids]
+        assert [(event['event'], event['id']) for event in created] == [('order.created', id) for id in order_ids]
+
+        client.post('/dispatch/run')
+        updated = [ws.receive_json() for _ in order_ids]
+        assert sorted((event['event'], event['id'], event['vehicle_id'], event['driver_id']) for event in updated) == [
+            ('order.updated', id, test_vehicle.id, test_vehicle.driver_id) for id in order_ids
+        ]
+
+    assert len(event_broker) == 0
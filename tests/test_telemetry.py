@@ -0,0 +1,160 @@
+from app.core.telemetry import TelemetryBuffer, Ping, telemetry_buffer
+from app.models import VehiclePosition
+from sqlalchemy.exc import OperationalError
+from datetime import datetime
+import asyncio
+import pytest
+from tests.conftest import (
+    client,
+    test_user,
+    test_vehicle,
+    db_session
+)
+
+
+def ping(vehicle_id: int, second: int, **overrides) -> dict:
+    return {
+        'vehicle_id': vehicle_id,
+        'recorded_at': f'2025-12-12T10:00:{second:02d}Z',
+        'latitude': 14.5995,
+        'longitude': 120.9842 + second / 1000,
+        **overrides
+    }
+
+
+def test_ingest_telemetry_updates_latest_position(test_vehicle):
+    pings = [ping(test_vehicle.id, second) for second in (3, 1, 2)]
+    response = client.post('/vehicles/telemetry', json=pings)
+
+    assert response.status_code == 202
+    assert response.json() == {'accepted': 3}
+    assert len(telemetry_buffer) == 3
+
+    position = client.get(f'/vehicles/{test_vehicle.id}/position')
+    assert position.status_code == 200
+    assert position.json() == {
+        'vehicle_id': test_vehicle.id,
+        'recorded_at': 'Dec 12, 2025 10:00 AM',
+        'latitude': 14.5995,
+        'longitude': 120.9872,
+        'speed_kmh': None,
+        'heading': None
+    }
+
+
+def test_flush_writes_batches(db_session, test_vehicle):
+    client.post('/vehicles/telemetry', json=[ping(test_vehicle.id, second) for second in range(25)])
+
+    buffer_batch_size, telemetry_buffer.batch_size = telemetry_buffer.batch_size, 10
+    try:
+        assert telemetry_buffer.flush(db_session) == 25
+    finally:
+        telemetry_buffer.batch_size = buffer_batch_size
+
+    assert len(telemetry_buffer) == 0
+    assert db_session.query(VehiclePosition).count() == 25
+
+    # A worker that has not seen the vehicle falls back to the stored rows.
+    telemetry_buffer.clear()
+    position = client.get(f'/vehicles/{test_vehicle.id}/position').json()
+    assert position['recorded_at'] == 'Dec 12, 2025 10:00 AM'
+    assert position['longitude'] == 120.9842 + 24 / 1000
+
+
+def test_flush_drops_pings_of_unknown_vehicles(db_session, test_vehicle):
+    client.post('/vehicles/telemetry', json=[ping(test_vehicle.id, 1), ping(999, 2), ping(test_vehicle.id, 3)])
+
+    assert telemetry_buffer.flush(db_session) == 2
+    assert {row.vehicle_id for row in db_session.query(VehiclePosition)} == {test_vehicle.id}
+    assert client.get('/vehicles/999/position').status_code == 404
+
+
+def test_position_prefers_newer_stored_rows(db_session, test_vehicle):
+    client.post('/vehicles/telemetry', json=[ping(test_vehicle.id, 1)])
+    # Written by another worker that received a later ping.
+    db_session.add(VehiclePosition(vehicle_id=test_vehicle.id, recorded_at=datetime(2025, 12, 12, 11, 30),
+                                   latitude=14.6, longitude=121.0))
+    db_session.commit()
+
+    position = client.get(f'/vehicles/{test_vehicle.id}/position').json()
+    assert position['recorded_at'] == 'Dec 12, 2025 11:30 AM'
+    assert position['latitude'] == 14.6
+
+
+def test_flush_keeps_batch_on_failed_write(db_session, test_vehicle, monkeypatch):
+    client.post('/vehicles/telemetry', json=[ping(test_vehicle.id, second) for second in range(5)])
+
+    def lost_connection(db, pings):
+        raise OperationalError('INSERT', {}, Exception('server closed the connection unexpectedly'))
+
+    monkeypatch.setattr('app.core.telemetry._insert', lost_connection)
+    with pytest.raises(OperationalError):
+        telemetry_buffer.flush(db_session)
+    assert len(telemetry_buffer) == 5
+
+    monkeypatch.undo()
+    assert telemetry_buffer.flush(db_session) == 5
+    assert sorted(row.recorded_at.second for row in db_session.query(VehiclePosition)) == list(range(5))
+
+
+def test_requeue_drops_oldest_pings_that_no_longer_fit():
+    buffer = TelemetryBuffer(capacity=4, batch_size=2)
+    pings = [Ping(1, datetime(2025, 12, 12, 10, 0, second), 0.0, 0.0, None, None) for second in range(6)]
+
+    buffer.add(pings[:3])
+    batch = buffer.take(2)
+    buffer.add(pings[3:6])
+    assert buffer.requeue(batch) == 2
+    assert buffer.take(10) == pings[2:6]
+
+    buffer.add(pings[2:3])
+    assert buffer.requeue(pings[:2]) == 0
+    assert buffer.take(10) == pings[:3]
+
+
+def test_ring_overwrites_oldest_pings():
+    buffer = TelemetryBuffer(capacity=4, batch_size=2)
+    pings = [Ping(1, datetime(2025, 12, 12, 10, 0, second), 0.0, 0.0, None, None) for second in range(6)]
+
+    assert buffer.add(pings[:3]) == 0
+    assert buffer.take(2) == pings[:2]
+    assert buffer.add(pings[3:]) == 0
+    assert buffer.add(pings[:2]) == 2
+    assert buffer.take(10) == [pings[4], pings[5], pings[0], pings[1]]
+    assert len(buffer) == 0
+    assert buffer.latest(1) == pings[5]
+
+
+def test_wait_wakes_on_full_batch():
+    buffer = TelemetryBuffer(capacity=8, batch_size=2)
+
+    async def scenario():
+        waiting = asyncio.create_task(buffer.wait(10))
+        await asyncio.sleep(0)
+        buffer.add([Ping(1, datetime(2025, 12, 12, 10, 0, second), 0.0, 0.0, None, None) for second in range(2)])
+        await asyncio.wait_for(waiting, 1)
+
+    asyncio.run(scenario())
+
+
+def test_ingest_telemetry_invalid_ping(test_vehicle):
+    response = client.post('/vehicles/telemetry', json=[ping(test_vehicle.id, 1, latitude=91)])
+
+    assert response.status_code == 422
+    assert response.json()['detail'][0]['loc'] == [0, 'latitude']
+    assert len(telemetry_buffer) == 0
+
+
+def test_ingest_telemetry_unauthorized(db_session, test_user, test_vehicle):
+    test_user.role = 'driver'
+    db_session.commit()
+
+    response = client.post('/vehicles/telemetry', json=[ping(test_vehicle.id, 1)])
+    assert response.status_code == 403
+    assert response.json() == {'detail': 'You are not authorized to perform this action.'}
+
+
+def test_get_position_not_reported(test_vehicle):
+    response = client.get(f'/vehicles/{test_vehicle.id}/position')
+    assert response.status_code == 404
+    assert response.json() == {'detail': 'No position has been reported for this vehicle.'}
@@ -1,8 +1,11 @@
-from app.core.security import bcrypt_context
-from app.models import User
+from app.core.security import bcrypt_context, get_current_user
+from app.models import User, Vehicle, Order
+from app.main import app
 from tests.conftest import (
     client,
     test_user,
+    test_vehicle,
+    test_order,
     db_session
 )
 
@@ -56,10 +59,32 @@ def test_update_user_password(db_session, test_user):
         'message':'Password has been updated successfully.'
         }
 
+    db_session.expire_all()
     updated_user = db_session.get(User, test_user.id)
+    assert updated_user.token_version == 1
     assert bcrypt_context.verify(request_data.get('new_password'), updated_user.hashed_password)
 
 
+def test_update_user_password_revokes_token(test_user):
+    app.dependency_overrides.pop(get_current_user)
+    login = client.post('/auth/token', data={'username': test_user.username, 'password': '12345'})
+    headers = {'Authorization': f"Bearer {login.json().get('access_token')}"}
+
+    assert client.get('/users/me', headers=headers).status_code == 200
+
+    request_data = {
+        'old_password': '12345',
+        'new_password': '54321'
+    }
+    response = client.put('/users/password', json=request_data, headers=headers)
+    assert response.status_code == 200
+    assert client.get('/users/me', headers=headers).status_code == 401
+
+    login = client.post('/auth/token', data={'username': test_user.username, 'password': '54321'})
+    headers = {'Authorization': f"Bearer {login.json().get('access_token')}"}
+    assert client.get('/users/me', headers=headers).status_code == 200
+
+
 def test_update_user_password_incorrect():
     request_data = {
         'old_password': 'wrongpassword',
@@ -132,6 +157,17 @@ def test_delete_user_by_id(db_session):
     assert deleted_user is None
 
 
+def test_delete_user_by_id_in_background(db_session, test_vehicle, test_order):
+    driver_id = test_vehicle.driver_id
+
+    response = client.delete(f'/users/{driver_id}', params={'background': True})
+    assert response.status_code == 202
+
+    assert db_session.query(User).filter(User.id == driver_id).first() is None
+    assert db_session.query(Vehicle).count() == 0
+    assert db_session.query(Order).count() == 0
+
+
 def test_user_response_serialization():
     response = client.get('/users/me')
     data = response.json()
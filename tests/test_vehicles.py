@@ -1,9 +1,13 @@
-from app.models import User, Vehicle
+from app.models import User, Vehicle, Order
 from app.core.security import bcrypt_context
+from app.core.stats import recount_summary
+from app.core.purge import purge_orders
+from datetime import datetime
 from tests.conftest import (
     client,
     test_vehicle,
-    db_session
+    db_session,
+    query_budget
 )
 
 
@@ -12,8 +16,28 @@ def test_get_all_vehicles(test_vehicle):
     data = response.json()
 
     assert response.status_code == 200
-    assert isinstance(data, list)
-    assert data[0].get('id') == test_vehicle.id
+    assert isinstance(data.get('items'), list)
+    assert data['items'][0].get('id') == test_vehicle.id
+    assert data.get('next_cursor') is None
+
+
+def test_get_all_vehicles_pagination(db_session, test_vehicle):
+    db_session.add(Vehicle(
+        license_plate='67890def',
+        type='van',
+        capacity_kg=1000,
+        status='available',
+        driver_id=test_vehicle.driver_id
+    ))
+    db_session.commit()
+
+    first_page = client.get('/vehicles/', params={'limit': 1}).json()
+    assert first_page['items'][0].get('id') == test_vehicle.id
+    assert first_page['next_cursor'] is not None
+
+    second_page = client.get('/vehicles/', params={'limit': 1, 'cursor': first_page['next_cursor']}).json()
+    assert second_page['items'][0].get('id') != test_vehicle.id
+    assert second_page['next_cursor'] is None
 
 
 def test_get_vehicle_by_id(test_vehicle):
@@ -23,6 +47,18 @@ def test_get_vehicle_by_id(test_vehicle):
     assert response.json().get('id') == test_vehicle.id
 
 
+def test_get_vehicles_sparse_fields(test_vehicle):
+    page = client.get('/vehicles/', params={'fields': 'id,status,driver_id'}).json()
+    assert page['items'] == [{'id': test_vehicle.id, 'status': 'available', 'driver_id': test_vehicle.driver_id}]
+
+    response = client.get(f'/vehicles/{test_vehicle.id}', params={'fields': 'license_plate'})
+    assert response.json() == {'license_plate': test_vehicle.license_plate}
+
+    response = client.get('/vehicles/', params={'fields': ','})
+    assert response.status_code == 400
+    assert response.json() == {'detail': 'No fields were requested.'}
+
+
 def test_get_vehicle_by_id_not_found():
     response = client.get('/vehicles/999')
 
@@ -136,4 +172,164 @@ def test_vehicle_response_serialization(test_vehicle):
     data = response.json()
     expected_keys = {'id', 'updated_at', 'license_plate', 'type', 'capacity_kg', 'status', 'driver_id'}
 
-    assert set(data[0].keys()) == expected_keys
\ No newline at end of file
+    assert set(data['items'][0].keys()) == expected_keys
+
+
+def test_vehicle_routes_query_budget(query_budget, test_vehicle):
+    query_budget(client.get('/vehicles/'), max_queries=2)
+    query_budget(client.get(f'/vehicles/{test_vehicle.id}'), max_queries=1)
+
+    data_request = {
+        'license_plate': 'abc222',
+        'vehicle_type': 'van',
+        'capacity_kg': 1000,
+        'vehicle_status': 'available',
+        'driver_id': test_vehicle.driver_id
+    }
+    # INSERT ... SELECT ... RETURNING, the change log entry and the summary upsert.
+    created = client.post('/vehicles/', json=data_request)
+    query_budget(created, max_queries=3)
+    vehicle_id = created.json()['id']
+    query_budget(client.put(f'/vehicles/{vehicle_id}/status', json={'vehicle_status': 'maintenance'}), max_queries=4)
+    new_driver = client.post('/auth/', json={
+        'username': 'driver222', 'email': 'driver222@example.com', 'role': 'driver', 'password': 'secret123'
+    }).json()
+    changed = client.put(f'/vehicles/{vehicle_id}/driver', json={'driver_id': new_driver['id']})
+    query_budget(changed, max_queries=3)
+    assert changed.json()['driver_id'] == new_driver['id']
+
+
+def test_get_vehicle_not_modified(test_vehicle):
+    response = client.get(f'/vehicles/{test_vehicle.id}')
+    etag = response.headers['etag']
+    assert client.get(f'/vehicles/{test_vehicle.id}', headers={'If-None-Match': etag}).status_code == 304
+
+    collection_etag = client.get('/vehicles/').headers['etag']
+    assert client.get('/vehicles/', headers={'If-None-Match': collection_etag}).status_code == 304
+
+    client.put(f'/vehicles/{test_vehicle.id}/status', json={'vehicle_status': 'maintenance'})
+    assert client.get(f'/vehicles/{test_vehicle.id}', headers={'If-None-Match': etag}).status_code == 200
+    assert client.get('/vehicles/', headers={'If-None-Match': collection_etag}).status_code == 200
+
+
+def add_orders(db_session, vehicle_id: int, count: int) -> None:
+    db_session.add_all([
+        Order(destination=f'city {index % 3}', size='s', priority=False,
+              delivery_window_start=datetime(2025, 10, 2, 9, 0), delivery_window_end=datetime(2025, 10, 4, 18, 0),
+              status='pending', vehicle_id=vehicle_id)
+        for index in range(count)
+    ])
+    db_session.flush()
+    recount_summary(db_session)
+    db_session.commit()
+
+
+def test_delete_vehicle_query_budget(db_session, query_budget, test_vehicle):
+    add_orders(db_session, test_vehicle.id, 50)
+
+    # Order ids, summary rows, summary upserts, a single DELETE and the change
+    # log entries; the orders go with the vehicle through ON DELETE CASCADE.
+    response = client.delete(f'/vehicles/{test_vehicle.id}')
+    query_budget(response, max_queries=7)
+    assert db_session.query(Order).count() == 0
+    assert client.get('/stats/').json()['orders']['total'] == 0
+
+
+def test_delete_vehicle_in_background(db_session, test_vehicle):
+    add_orders(db_session, test_vehicle.id, 5)
+
+    response = client.delete(f'/vehicles/{test_vehicle.id}', params={'background': True})
+    assert response.status_code == 202
+
+    assert db_session.query(Order).count() == 0
+    assert db_session.query(Vehicle).filter(Vehicle.id == test_vehicle.id).first() is None
+    stats = client.get('/stats/').json()
+    assert stats['orders']['total'] == 0
+    assert stats['vehicles']['total'] == 0
+    assert client.get(f'/vehicles/{test_vehicle.id}').status_code == 404
+
+
+def test_delete_vehicle_in_background_not_found():
+    response = client.delete('/vehicles/999', params={'background': True})
+    assert response.status_code == 404
+    assert response.json() == {'detail': 'The specified vehicle could not be found.'}
+
+
+def test_purge_orders_in_batches(db_session, test_vehicle):
+    add_orders(db_session, test_vehicle.id, 5)
+
+    assert purge_orders(db_session, Order.vehicle_id == test_vehicle.id, batch_size=2) == 5
+    assert db_session.query(Order).count() == 0
+    assert client.get('/stats/').json()['orders']['total'] == 0
+    deletes = [item['entity_id'] for item in client.get('/changes/').json()['items'] if item['operation'] == 'delete']
+    assert sorted(deletes) == [1, 2, 3, 4, 5]
+
+
+def test_get_vehicle_orders(db_session, test_vehicle):
+    add_orders(db_session, test_vehicle.id, 3)
+    db_session.query(Order).filter(Order.id == 3).update({'status': 'completed', 'size': 'xl'})
+    db_session.commit()
+
+    response = client.get(f'/vehicles/{test_vehicle.id}/orders', params={'limit': 2})
+    assert response.status_code == 200
+    page = response.json()
+    assert [order['id'] for order in page['items']] == [1, 2]
+    assert page['load_kg'] == 10.0
+
+    rest = client.get(f'/vehicles/{test_vehicle.id}/orders', params={'cursor': page['next_cursor']}).json()
+    assert [order['id'] for order in rest['items']] == [3]
+    assert rest['next_cursor'] is None
+
+    sparse = client.get(f'/vehicles/{test_vehicle.id}/orders', params={'fields': 'id,status'}).json()
+    assert sparse['items'][-1] == {'id': 3, 'status': 'completed'}
+
+
+def test_get_vehicle_orders_not_found():
+    response = client.get('/vehicles/999/orders')
+    assert response.status_code == 404
+    assert response.json() == {'detail': 'The specified vehicle could not be found.'}
+
+
+def test_get_vehicle_orders_not_modified(test_order, test_vehicle):
+    response = client.get(f'/vehicles/{test_vehicle.id}/orders')
+    etag = response.headers['ETag']
+    assert client.get(f'/vehicles/{test_vehicle.id}/orders', headers={'If-None-Match': etag}).status_code == 304
+
+    client.put(f'/orders/{test_order.id}/status', json={'order_status': 'in_transit'})
+    assert client.get(f'/vehicles/{test_vehicle.id}/orders', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_get_all_vehicles_include_orders(db_session, query_budget, test_vehicle):
+    add_orders(db_session, test_vehicle.id, 3)
+    for index in range(4):
+        created = client.post('/vehicles/', json={
+            'license_plate': f'more{index}', 'vehicle_type': 'van', 'capacity_kg': 1000,
+            'vehicle_status': 'available', 'driver_id': test_vehicle.driver_id
+        }).json()
+        add_orders(db_session, created['id'], index)
+
+    # Vehicle ETag, order ETag, the vehicle page and every vehicle's orders, however many vehicles.
+    response = client.get('/vehicles/', params={'include': 'orders', 'orders_limit': 2})
+    query_budget(response, max_queries=4)
+    items = response.json()['items']
+    assert [len(item['orders']) for item in items] == [2, 0, 1, 2, 2]
+    assert [item['load_kg'] for item in items] == [15.0, 0.0, 5.0, 10.0, 15.0]
+    assert items[0]['orders_next_cursor'] is not None
+    assert items[3]['orders_next_cursor'] is None
+
+    rest = client.get(f'/vehicles/{test_vehicle.id}/orders', params={'cursor': items[0]['orders_next_cursor']}).json()
+    assert [order['id'] for order in rest['items']] == [3]
+
+
+def test_get_all_vehicles_include_orders_follows_order_writes(test_order, test_vehicle):
+    first = client.get('/vehicles/', params={'include': 'orders'})
+    assert first.json()['items'][0]['load_kg'] == 20.0
+
+    client.put(f'/orders/{test_order.id}/status', json={'order_status': 'completed'})
+    second = client.get('/vehicles/', params={'include': 'orders'}, headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert second.json()['items'][0]['load_kg'] == 0.0
+
+
+def test_get_all_vehicles_invalid_include():
+    assert client.get('/vehicles/', params={'include': 'drivers'}).status_code == 422